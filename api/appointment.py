@@ -1,63 +1,189 @@
+import json
+import base64
 import logging
-from flask import request
-from zoneinfo import ZoneInfo
+from functools import lru_cache
+from flask import request, url_for
+from sqlalchemy import and_, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import load_only
 from flask_restful import Resource
 from datetime import datetime, time, date, timedelta
 
-from services.email_service import Templates
-from services.email_service import EmailService
-from services.gemini_service import GeminiService
-from services.gcal_service import GoogleCalendarService
-from database import db, Appointment, AppointmentSchema
+from services.registry import service_registry
+from services.metrics import metrics
+from services.occupancy_cache import occupancy_cache
+from services.booking_pipeline import booking_pipeline, process_booking
+from services.availability_service import AvailabilityService
+from services.doctor_schedule import slot_to_minutes
+from database import db, read_only, is_slot_conflict, Appointment, AppointmentSchema, BookingStatus, Doctor, INACTIVE_BOOKING_STATUSES
 
 logger = logging.getLogger(__name__)
 
 appointment_schema = AppointmentSchema()
 appointments_schema = AppointmentSchema(many=True)
 
-DOCTOR_SLOTS = {
-    "Dr. Smith": [f"{hour}:00" for hour in range(8, 18)],  # 8AM to 5PM
-    "Dr. Lee": [f"{hour}:00" for hour in range(8, 18)],
-    "Dr. Patel": [f"{hour}:00" for hour in range(8, 18)],
-}
+availability_service = AvailabilityService(cache=occupancy_cache)
+
+DEFAULT_PAGE_SIZE = 50
+# Auto-assigned bookings try this many slots before giving up on concurrent claims
+AUTO_ASSIGN_ATTEMPTS = 5
+MAX_PAGE_SIZE = 500
+
+# Schema fields that map to Appointment columns and can be requested through `fields=`
+PROJECTABLE_FIELDS = tuple(
+    name for name in AppointmentSchema().fields
+    if name in Appointment.__table__.columns
+)
 
 def get_booked_slots(date, doctor=None):
-    query = Appointment.query.filter(db.func.date(Appointment.appointment_time) == date)
+    # Half-open [day, next day) range keeps appointment_time sargable so the
+    # (preferred_doctor, appointment_time) index is used instead of a full scan.
+    day_start = datetime.combine(date, time.min)
+    day_end = day_start + timedelta(days=1)
+    query = db.session.query(Appointment.appointment_time).filter(
+        Appointment.appointment_time >= day_start,
+        Appointment.appointment_time < day_end,
+        Appointment.booking_status.notin_(INACTIVE_BOOKING_STATUSES),
+    )
     if doctor:
-        query = query.filter_by(preferred_doctor=doctor)
-    response = [a.appointment_time.strftime("%H:%M") for a in query.all()]    
+        query = query.filter(Appointment.preferred_doctor == doctor)
+    response = [appointment_time.strftime("%H:%M") for (appointment_time,) in query.all()]
     return response
 
 
+@metrics.timed("booking.claim_slot")
+def claim_slot(appointment):
+    """
+    Commit a pending `appointment` to reserve its slot. The unique index on active
+    (preferred_doctor, appointment_time) rows makes this atomic; returns False when
+    another booking already holds the slot.
+    """
+    db.session.add(appointment)
+    try:
+        db.session.commit()
+    except IntegrityError as e:
+        db.session.rollback()
+        if not is_slot_conflict(e):
+            raise
+        logger.info(f"Slot {appointment.preferred_doctor} {appointment.appointment_time} was claimed concurrently.")
+        claimed = False
+    else:
+        claimed = True
+    # Either way the slot is now taken, so the cache should say so
+    occupancy_cache.mark_booked(appointment.preferred_doctor, appointment.appointment_time)
+    return claimed
+
+
+def wants_async_booking():
+    """Async booking is requested with ?async=true or a `Prefer: respond-async` header."""
+    if request.args.get("async", "").lower() in ("1", "true", "yes"):
+        return True
+    return "respond-async" in request.headers.get("Prefer", "")
+
+
+@metrics.timed("booking.find_slot")
 def find_next_available_slot(start_date=None, doctor=None):
     """Find next available slot from start_date onwards."""
-    if not start_date:
-        start_date = date.today()
-        
-    max_days = 30  # limit search to next 30 days
-    for i in range(max_days):
-        current_date = start_date + timedelta(days=i)
-        doctors_to_check = [doctor] if doctor else DOCTOR_SLOTS.keys()
-        for doc in doctors_to_check:
-            booked_slots = get_booked_slots(current_date, doc)
-            for slot in DOCTOR_SLOTS[doc]:
-                hour, minute = map(int, slot.split(":"))
-                slot_str = slot.zfill(5)
-                if slot_str not in booked_slots:
-                    hour, minute = map(int, slot.split(":"))
-                    return doc, datetime.combine(current_date, time(hour, minute))
-    return None, None  # no slots available in next 30 days
+    return availability_service.find_next_available_slot(start_date=start_date, doctor=doctor)
+
+
+def parse_fields(fields_param):
+    """Split a `fields=` parameter into (fields, invalid_fields); all projectable fields when empty."""
+    if not fields_param:
+        return PROJECTABLE_FIELDS, []
+    requested = [field.strip() for field in fields_param.split(",") if field.strip()]
+    invalid_fields = [field for field in requested if field not in PROJECTABLE_FIELDS]
+    return tuple(dict.fromkeys(requested)), invalid_fields
+
+
+def filter_appointments(query, args):
+    """
+    Apply the doctor, start_date and end_date (inclusive) filters from `args`.
+    Works on ORM queries and Core selects; raises ValueError on malformed dates.
+    """
+    if args.get("doctor"):
+        query = query.filter(Appointment.preferred_doctor == args["doctor"])
+    if args.get("start_date"):
+        start_date = datetime.strptime(args["start_date"], "%Y-%m-%d")
+        query = query.filter(Appointment.appointment_time >= start_date)
+    if args.get("end_date"):
+        end_date = datetime.strptime(args["end_date"], "%Y-%m-%d") + timedelta(days=1)
+        query = query.filter(Appointment.appointment_time < end_date)
+    return query
+
+
+def encode_cursor(appointment):
+    """Opaque keyset cursor pointing just after `appointment` in (appointment_time, id) order."""
+    payload = json.dumps([appointment.appointment_time.isoformat(), appointment.id])
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor):
+    appointment_time, appointment_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    return datetime.fromisoformat(appointment_time), int(appointment_id)
+
+
+@lru_cache(maxsize=64)
+def get_projection_schema(fields):
+    return AppointmentSchema(many=True, only=fields)
 
 
 class AppointmentListResource(Resource):
     @staticmethod
+    @read_only
     def get():
-        """Get all appointments"""
+        """
+        List appointments one page at a time, ordered by (appointment_time, id).
+        Query params: limit, cursor, fields (comma separated), doctor, start_date, end_date (inclusive).
+        """
         try:
-            appointments = Appointment.query.order_by(Appointment.appointment_time.asc()).all()
+            args = request.args
+            try:
+                limit = int(args.get("limit", DEFAULT_PAGE_SIZE))
+            except ValueError:
+                return {"status": "error", "message": "limit must be an integer"}, 400
+            if limit < 1 or limit > MAX_PAGE_SIZE:
+                return {"status": "error", "message": f"limit must be between 1 and {MAX_PAGE_SIZE}"}, 400
+
+            fields, invalid_fields = parse_fields(args.get("fields"))
+            if invalid_fields:
+                return {
+                    "status": "error",
+                    "message": f"Invalid field(s) {invalid_fields}. Available fields: {list(PROJECTABLE_FIELDS)}"
+                }, 400
+
+            # id and appointment_time are always loaded because the cursor is built from them
+            columns = {"id", "appointment_time", *fields}
+            query = Appointment.query.options(
+                load_only(*(getattr(Appointment, column) for column in columns))
+            )
+
+            try:
+                query = filter_appointments(query, args)
+            except ValueError:
+                return {"status": "error", "message": "Invalid date format. Use YYYY-MM-DD"}, 400
+
+            if args.get("cursor"):
+                try:
+                    cursor_time, cursor_id = decode_cursor(args["cursor"])
+                except (ValueError, TypeError):
+                    return {"status": "error", "message": "Invalid cursor"}, 400
+                query = query.filter(or_(
+                    Appointment.appointment_time > cursor_time,
+                    and_(Appointment.appointment_time == cursor_time, Appointment.id > cursor_id),
+                ))
+
+            # Fetch one extra row to know whether another page exists
+            appointments = query.order_by(
+                Appointment.appointment_time.asc(), Appointment.id.asc()
+            ).limit(limit + 1).all()
+            has_more = len(appointments) > limit
+            appointments = appointments[:limit]
+
             return {
                 "status": "success",
-                "data": appointments_schema.dump(appointments)
+                "data": get_projection_schema(fields).dump(appointments),
+                "next_cursor": encode_cursor(appointments[-1]) if has_more else None
             }, 200
         except Exception as e:
             return {"status": "error", "message": f"Unexpected error: {str(e)}"}, 500
@@ -91,129 +217,200 @@ class AppointmentListResource(Resource):
 
             date_of_birth = datetime.strptime(date_of_birth_str, "%Y-%m-%d").date()
 
-            # Determine final doctor and appointment datetime
+            def new_appointment(doctor, appointment_time):
+                return Appointment(
+                    patient_name=patient_name,
+                    patient_phone=patient_phone,
+                    patient_email=patient_email,
+                    date_of_birth=date_of_birth,
+                    symptoms=symptoms,
+                    appointment_time=appointment_time,
+                    preferred_doctor=doctor,
+                    booking_status=BookingStatus.PENDING.value,
+
+                    gender=json_data.get("gender"),
+                    known_allergies=json_data.get("known_allergies"),
+                    current_medication=json_data.get("current_medication"),
+                    medical_history=json_data.get("medical_history"),
+                    additional_note=json_data.get("additional_note")
+                )
+
+            # Claim the slot before any external API call: the pending row's insert is
+            # the atomic check, so a concurrent loser gets a 409 without side effects.
+            if preferred_doctor and preferred_doctor not in availability_service.schedules:
+                return {
+                    "status": "error",
+                    "message": f"Invalid doctor. Available doctors: {availability_service.doctors()}"
+                }, 400
+
             if time_slot and appointment_date:
                 # If both date and time provided
-                doctor_to_use = preferred_doctor or next(iter(DOCTOR_SLOTS.keys()))
-                if time_slot not in DOCTOR_SLOTS[doctor_to_use]:
+                active_doctors = availability_service.doctors()
+                if not preferred_doctor and not active_doctors:
+                    return {
+                        "status": "error",
+                        "message": "No doctors are currently accepting appointments"
+                    }, 409
+                doctor_to_use = preferred_doctor or active_doctors[0]
+                try:
+                    minutes = slot_to_minutes(time_slot)
+                    appointment_dt = datetime.combine(appointment_date, time(minutes // 60, minutes % 60))
+                except ValueError:
+                    appointment_dt = None
+                if appointment_dt is None or not availability_service.is_bookable(doctor_to_use, appointment_dt):
                     return {
                             "status": "error",
                             "message": "Invalid time slot"
                         }, 400
-                if time_slot in get_booked_slots(appointment_date, doctor_to_use):
+                appointment = new_appointment(doctor_to_use, appointment_dt)
+                if availability_service.is_slot_booked(doctor_to_use, appointment_dt) or not claim_slot(appointment):
                     return {
                         "status": "error",
                         "message": "Time slot already booked"
-                    }, 400
-                hour, minute = map(int, time_slot.split(":"))
-                appointment_dt = datetime.combine(appointment_date, time(hour, minute))
-                final_doctor = doctor_to_use
+                    }, 409
             else:
-                # Auto-assign next available slot
-                final_doctor, appointment_dt = find_next_available_slot(
-                    start_date=appointment_date,
-                    doctor=preferred_doctor
-                )
-                if not appointment_dt:
+                # Auto-assign next available slot, moving on if another request claims it first
+                for _ in range(AUTO_ASSIGN_ATTEMPTS):
+                    final_doctor, appointment_dt = find_next_available_slot(
+                        start_date=appointment_date,
+                        doctor=preferred_doctor
+                    )
+                    if not appointment_dt:
+                        return {
+                            "status": "error",
+                            "message": "No available slots in the next 30 days"
+                        }, 400
+                    appointment = new_appointment(final_doctor, appointment_dt)
+                    if claim_slot(appointment):
+                        break
+                else:
                     return {
                         "status": "error",
-                        "message": "No available slots in the next 30 days"
-                    }, 400
-                
-
-            # 1. Initialize services
-            gemini_service = GeminiService()
-            gcal_service = GoogleCalendarService()
-            email_service = EmailService()
-
-            # 2. Generate summary from symptoms
-            summary = gemini_service.summarize_symptoms(
-                symptoms=symptoms,
-                known_allergies=json_data.get("known_allergies"),
-                current_medication=json_data.get("current_medication"),
-                medical_history=json_data.get("medical_history"),
-                additional_note=json_data.get("additional_note")
-            )          
-
-            # 3. Create Google Calendar event
-            event_description = (
-                f"Symptoms Summary: {summary}\n"
-                f"Patient Phone: {patient_phone}\n"
-                f"Patient Email: {patient_email}\n"
-                f"Doctor: {final_doctor}"
-            )
+                        "message": "Could not reserve a slot, please try again"
+                    }, 409
 
-            event_id = gcal_service.create_event(
-                summary=patient_name,
-                description=event_description,
-                start_time=appointment_dt.replace(tzinfo=ZoneInfo("Africa/Addis_Ababa")),
-                duration_minutes=60,
-                timezone='Africa/Addis_Ababa'
-            )
-            if not event_id:
-                return {"status": "error", "message": "Failed to create calendar event"}, 500
+            if wants_async_booking():
+                # Summary, calendar event and email run in the background
+                booking_pipeline.submit(appointment.id)
+                return {
+                    "status": "success",
+                    "message": "Appointment accepted and is being processed",
+                    "data": appointment_schema.dump(appointment),
+                    "status_url": url_for("api.appointmentstatusresource", appointment_id=appointment.id)
+                }, 202
 
-            # 4. Send email to patient using EmailService
-            try:
-                email_context = {
-                    'patient_name': patient_name,
-                    'appointment_time': appointment_dt.strftime('%Y-%m-%d %H:%M %Z'),
-                    'doctor': final_doctor,
-                    'description': summary,
-                    'clinic_name': 'CareSync',
+            # Summarize, create the calendar event and send the email now; on failure the
+            # pipeline deletes the event and marks the booking failed, releasing the slot.
+            booking_pipeline.maybe_sweep()
+            booking_status = process_booking(appointment.id)
+            appointment = db.session.get(Appointment, appointment.id)
+            if booking_status == BookingStatus.CANCELLED.value:
+                return {
+                    "status": "error",
+                    "message": "The appointment was cancelled while it was being booked",
+                    "data": appointment_schema.dump(appointment)
+                }, 409
+            if booking_status != BookingStatus.CONFIRMED.value:
+                return {
+                    "status": "error",
+                    "message": "Failed to complete the booking",
+                    "data": appointment_schema.dump(appointment)
+                }, 500
+
+            return {
+                "status": "success",
+                "message": "Appointment created successfully",
+                "data": appointment_schema.dump(appointment)
+            }, 201            
+            
+        except Exception as e:
+            db.session.rollback()
+            return {"status": "error", "message": f"Unexpected error: {str(e)}"}, 500
+
+
+class AppointmentStatusResource(Resource):
+    @staticmethod
+    def get(appointment_id):
+        """Poll the booking status of an appointment created asynchronously"""
+        try:
+            appointment = db.session.get(Appointment, appointment_id)
+            if appointment is None:
+                return {"status": "error", "message": "Appointment not found"}, 404
+            return {
+                "status": "success",
+                "data": {
+                    "id": appointment.id,
+                    "booking_status": appointment.booking_status,
+                    "google_calendar_event_id": appointment.google_calendar_event_id,
+                    "appointment_time": appointment.appointment_time.isoformat(),
+                    "preferred_doctor": appointment.preferred_doctor,
                 }
-                email_sent = email_service.send_email(
-                    template=Templates.APPOINTMENT_CONFIRMATION.value,
-                    subject=f'Appointment Confirmation: {patient_name}',
-                    body_context=email_context,
-                    to_email=patient_email,
-                )
-                if not email_sent:
-                    gcal_service.delete_event(event_id)
-                    logger.warning(f"Failed to send email to {patient_email}, but event created.")
+            }, 200
+        except Exception as e:
+            return {"status": "error", "message": f"Unexpected error: {str(e)}"}, 500
 
-            except Exception as e:
-                logger.warning(f"Failed to send email to {patient_email}: {e}, deleting event {event_id}")
-                gcal_service.delete_event(event_id)
-                return {"status": "error", "message": f"Failed to send email: {str(e)}"}, 500
 
-            # 5. Create and save the new appointment to the database
+class DoctorDayCancellationResource(Resource):
+    @staticmethod
+    def post():
+        """Cancel every active appointment of a doctor on one day, deleting their calendar events in batches"""
+        try:
+            data = request.get_json(force=True)
+            doctor = data.get("doctor")
+            if not doctor:
+                return {"status": "error", "message": "Missing 'doctor'"}, 400
+            # Inactive doctors are not in the schedules but may still have appointments to cancel
+            if doctor not in availability_service.schedules and db.session.query(Doctor.id).filter(Doctor.name == doctor).first() is None:
+                return {"status": "error", "message": f"Unknown doctor '{doctor}'"}, 400
             try:
-                new_appointment = Appointment(
-                    patient_name=patient_name,
-                    patient_phone=patient_phone,
-                    patient_email=patient_email,
-                    date_of_birth=date_of_birth,
-                    symptoms=symptoms,
-                    summary=summary,
-                    appointment_time=appointment_dt,
-                    preferred_doctor=final_doctor,
-                    google_calendar_event_id=event_id,
+                day = datetime.strptime(data.get("date", ""), "%Y-%m-%d").date()
+            except (TypeError, ValueError):
+                return {"status": "error", "message": "Invalid or missing 'date'. Use YYYY-MM-DD."}, 400
 
-                    gender=json_data.get("gender"),
-                    known_allergies=json_data.get("known_allergies"),
-                    current_medication=json_data.get("current_medication"),
-                    medical_history=json_data.get("medical_history"),
-                    additional_note=json_data.get("additional_note")
-                )
-                db.session.add(new_appointment)
-                db.session.commit()
+            day_start = datetime.combine(day, time.min)
+            appointments = db.session.query(Appointment).options(
+                load_only(Appointment.id, Appointment.appointment_time, Appointment.google_calendar_event_id)
+            ).filter(
+                Appointment.preferred_doctor == doctor,
+                Appointment.appointment_time >= day_start,
+                Appointment.appointment_time < day_start + timedelta(days=1),
+                Appointment.booking_status.notin_(INACTIVE_BOOKING_STATUSES),
+            ).order_by(Appointment.appointment_time).all()
+
+            event_ids = [a.google_calendar_event_id for a in appointments if a.google_calendar_event_id]
+            deletions = {}
+            if event_ids:
+                deletions = {r["event_id"]: r for r in service_registry.calendar.delete_events_batch(event_ids)}
+
+            # Appointments whose event could not be deleted stay booked so they can be retried
+            results = []
+            cancelled_ids = []
+            for appointment in appointments:
+                deletion = deletions.get(appointment.google_calendar_event_id)
+                cancelled = deletion is None or deletion["deleted"]
+                if cancelled:
+                    cancelled_ids.append(appointment.id)
+                results.append({
+                    "id": appointment.id,
+                    "appointment_time": appointment.appointment_time.isoformat(),
+                    "cancelled": cancelled,
+                    "error": None if cancelled else deletion["error"],
+                })
 
-            except Exception as e:
-                logger.warning(f"Failed to save appointment to database: {e}, deleting event {event_id}")
-                gcal_service.delete_event(event_id)
-                db.session.rollback()
-                return {"status": "error", "message": f"Failed to save appointment to database: {str(e)}"}, 500
+            if cancelled_ids:
+                db.session.query(Appointment).filter(Appointment.id.in_(cancelled_ids)).update(
+                    {Appointment.booking_status: BookingStatus.CANCELLED.value}, synchronize_session=False
+                )
+            db.session.commit()
+            for appointment in appointments:
+                if appointment.id in cancelled_ids:
+                    occupancy_cache.release(doctor, appointment.appointment_time)
 
             return {
                 "status": "success",
-                "message": "Appointment created successfully",
-                "data": appointment_schema.dump(new_appointment)
-            }, 201            
-            
+                "message": f"Cancelled {len(cancelled_ids)} of {len(appointments)} appointments",
+                "data": results
+            }, 200
         except Exception as e:
             db.session.rollback()
-            if 'event_id' in locals():
-                logger.warning(f"Unexpected error occurred, deleting event {event_id}")
-                gcal_service.delete_event(event_id)
-            return {"status": "error", "message": f"Unexpected error: {str(e)}"}, 500
\ No newline at end of file
+            return {"status": "error", "message": f"Unexpected error: {str(e)}"}, 500
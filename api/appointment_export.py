@@ -0,0 +1,114 @@
+import io
+import csv
+import json
+import logging
+from datetime import datetime
+from marshmallow import fields
+from sqlalchemy import select
+from flask_restful import Resource
+from flask import request, Response, stream_with_context
+
+from database import db, Appointment, AppointmentSchema
+from api.appointment import PROJECTABLE_FIELDS, parse_fields, filter_appointments
+
+logger = logging.getLogger(__name__)
+
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", "appointments.ndjson"),
+    "csv": ("text/csv", "appointments.csv"),
+}
+
+_schema_fields = AppointmentSchema().fields
+
+
+def _format_date(value):
+    return value.date().isoformat() if isinstance(value, datetime) else value.isoformat()
+
+
+def _converter(field_name):
+    """Per-column converter producing the same values AppointmentSchema.dump would."""
+    schema_field = _schema_fields[field_name]
+    # fields.Date subclasses fields.DateTime, so check it first
+    if isinstance(schema_field, fields.Date):
+        return lambda value: _format_date(value) if value is not None else None
+    if isinstance(schema_field, fields.DateTime):
+        return lambda value: value.isoformat() if value is not None else None
+    return None
+
+
+def serialize_rows(rows, field_names):
+    """Convert Core result rows into dicts without building ORM objects or running marshmallow."""
+    converters = [(index, converter) for index, converter in enumerate(map(_converter, field_names)) if converter]
+    for row in rows:
+        values = list(row)
+        for index, converter in converters:
+            values[index] = converter(values[index])
+        yield dict(zip(field_names, values))
+
+
+def generate_ndjson(partitions, field_names):
+    for rows in partitions:
+        yield "".join(json.dumps(item) + "\n" for item in serialize_rows(rows, field_names))
+
+
+def generate_csv(partitions, field_names):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(field_names)
+    for rows in partitions:
+        for item in serialize_rows(rows, field_names):
+            writer.writerow(item.values())
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+class AppointmentExportResource(Resource):
+    @staticmethod
+    def get():
+        """
+        Stream appointments as NDJSON or CSV with a server-side cursor.
+        Query params: format (ndjson|csv), fields, doctor, start_date, end_date (inclusive).
+        """
+        try:
+            args = request.args
+            export_format = args.get("format", "ndjson")
+            if export_format not in EXPORT_FORMATS:
+                return {"status": "error", "message": f"Invalid format. Use one of {list(EXPORT_FORMATS)}"}, 400
+
+            field_names, invalid_fields = parse_fields(args.get("fields"))
+            if invalid_fields:
+                return {
+                    "status": "error",
+                    "message": f"Invalid field(s) {invalid_fields}. Available fields: {list(PROJECTABLE_FIELDS)}"
+                }, 400
+
+            statement = select(*(getattr(Appointment, field) for field in field_names))
+            try:
+                statement = filter_appointments(statement, args)
+            except ValueError:
+                return {"status": "error", "message": "Invalid date format. Use YYYY-MM-DD"}, 400
+            statement = statement.order_by(Appointment.appointment_time.asc(), Appointment.id.asc())
+
+            def generate():
+                # yield_per streams rows in fixed-size batches (server-side cursor on PostgreSQL)
+                result = db.session.execute(statement.execution_options(yield_per=EXPORT_BATCH_SIZE))
+                try:
+                    if export_format == "csv":
+                        yield from generate_csv(result.partitions(), field_names)
+                    else:
+                        yield from generate_ndjson(result.partitions(), field_names)
+                finally:
+                    result.close()
+
+            mimetype, filename = EXPORT_FORMATS[export_format]
+            return Response(
+                stream_with_context(generate()),
+                mimetype=mimetype,
+                headers={"Content-Disposition": f"attachment; filename={filename}"}
+            )
+        except Exception as e:
+            logger.error(f"Failed to export appointments: {e}")
+            return {"status": "error", "message": f"Unexpected error: {str(e)}"}, 500
@@ -0,0 +1,52 @@
+from flask import request
+from flask_restful import Resource
+
+from database import db
+from services.appointment_import import import_appointments, SIDE_EFFECTS
+
+MAX_IMPORT_ROWS = 50_000
+
+
+class AppointmentImportResource(Resource):
+    @staticmethod
+    def post():
+        """
+        Bulk import appointments. Body: a list of appointments, or {"appointments": [...],
+        "side_effects": "none"|"calendar"|"pipeline", "check_schedule": bool, "dry_run": bool}.
+        """
+        try:
+            json_data = request.get_json(force=True)
+            options = json_data if isinstance(json_data, dict) else {"appointments": json_data}
+            records = options.get("appointments")
+            side_effects = options.get("side_effects", "none")
+
+            if not isinstance(records, list) or not records:
+                return {"status": "error", "message": "appointments must be a non-empty list"}, 400
+            if len(records) > MAX_IMPORT_ROWS:
+                return {
+                    "status": "error",
+                    "message": f"At most {MAX_IMPORT_ROWS} appointments per request; use scripts/import_appointments.py for larger files"
+                }, 413
+            if side_effects not in SIDE_EFFECTS:
+                return {"status": "error", "message": f"Invalid side_effects. Use one of {list(SIDE_EFFECTS)}"}, 400
+            check_schedule = options.get("check_schedule", True)
+            dry_run = options.get("dry_run", False)
+            # A string such as "false" would otherwise count as true
+            if not isinstance(check_schedule, bool) or not isinstance(dry_run, bool):
+                return {"status": "error", "message": "check_schedule and dry_run must be true or false"}, 400
+
+            result = import_appointments(
+                records,
+                side_effects=side_effects,
+                check_schedule=check_schedule,
+                dry_run=dry_run,
+            )
+            stored = result["valid"] if result["dry_run"] else result["imported"]
+            return {
+                "status": "success" if stored else "error",
+                "message": f"{'Validated' if result['dry_run'] else 'Imported'} {stored} of {result['received']} appointments",
+                "data": result
+            }, 200 if result["dry_run"] else (201 if stored else 400)
+        except Exception as e:
+            db.session.rollback()
+            return {"status": "error", "message": f"Unexpected error: {str(e)}"}, 500
@@ -2,10 +2,14 @@ from flask import request
 from flask_restful import Resource
 from datetime import datetime, time, date, timedelta
 
-from api.appointment import DOCTOR_SLOTS, get_booked_slots
+from api.appointment import availability_service
+from services.availability_service import MAX_CALENDAR_DAYS
+from services.doctor_schedule import minutes_to_slot, mask_to_minutes
+from database import read_only
 
 class AvailableSlotsResource(Resource):
     @staticmethod
+    @read_only
     def post():
         """Get available time slots for a specific doctor on a specific date"""
         try:
@@ -21,10 +25,10 @@ class AvailableSlotsResource(Resource):
                 }, 400
 
             # Validate doctor
-            if doctor not in DOCTOR_SLOTS:
+            if doctor not in availability_service.schedules:
                 return {
                     "status": "error",
-                    "message": f"Invalid doctor. Available doctors: {list(DOCTOR_SLOTS.keys())}"
+                    "message": f"Invalid doctor. Available doctors: {availability_service.doctors()}"
                 }, 400
 
             # Parse date
@@ -36,11 +40,8 @@ class AvailableSlotsResource(Resource):
                     "message": "Invalid date format. Use YYYY-MM-DD"
                 }, 400
 
-            # Get booked slots for the date and doctor
-            booked_slots = get_booked_slots(appointment_date, doctor)
-
-            # Calculate available slots
-            available_slots = [slot for slot in DOCTOR_SLOTS[doctor] if slot not in booked_slots]
+            # Calculate available slots (served from the occupancy cache when warm)
+            available_slots = availability_service.get_available_slots(doctor, appointment_date)
 
             return {
                 "status": "success",
@@ -53,4 +54,96 @@ class AvailableSlotsResource(Resource):
             }, 200
 
         except Exception as e:
-            return {"status": "error", "message": f"Unexpected error: {str(e)}"}, 500
\ No newline at end of file
+            return {"status": "error", "message": f"Unexpected error: {str(e)}"}, 500
+
+class AvailabilityCalendarResource(Resource):
+    @staticmethod
+    @read_only
+    def post():
+        """Get availability for a date range and optional list of doctors in one request"""
+        try:
+            json_data = request.get_json(force=True)
+            start_date_str = json_data.get("start_date")
+            end_date_str = json_data.get("end_date")  # optional, inclusive
+            doctors = json_data.get("doctors") or availability_service.doctors()
+            if isinstance(doctors, str):
+                doctors = [doctors]
+            response_format = json_data.get("format", "slots")  # "slots" or "bitmask"
+
+            if not start_date_str:
+                return {
+                    "status": "error",
+                    "message": "start_date is required"
+                }, 400
+
+            if not isinstance(doctors, list) or not all(isinstance(doctor, str) for doctor in doctors):
+                return {
+                    "status": "error",
+                    "message": "doctors must be a doctor name or a list of doctor names"
+                }, 400
+
+            invalid_doctors = [doctor for doctor in doctors if doctor not in availability_service.schedules]
+            if invalid_doctors:
+                return {
+                    "status": "error",
+                    "message": f"Invalid doctor(s) {invalid_doctors}. Available doctors: {availability_service.doctors()}"
+                }, 400
+
+            if response_format not in ("slots", "bitmask"):
+                return {
+                    "status": "error",
+                    "message": "Invalid format. Use 'slots' or 'bitmask'"
+                }, 400
+
+            try:
+                start_date = datetime.strptime(start_date_str, "%Y-%m-%d").date()
+                end_date = datetime.strptime(end_date_str, "%Y-%m-%d").date() if end_date_str else start_date + timedelta(days=6)
+            except ValueError:
+                return {
+                    "status": "error",
+                    "message": "Invalid date format. Use YYYY-MM-DD"
+                }, 400
+
+            days = (end_date - start_date).days + 1
+            if days < 1 or days > MAX_CALENDAR_DAYS:
+                return {
+                    "status": "error",
+                    "message": f"end_date must be on or after start_date and at most {MAX_CALENDAR_DAYS} days later"
+                }, 400
+
+            calendar = availability_service.get_availability_calendar(doctors, start_date, end_date + timedelta(days=1))
+
+            availability = {}
+            slots = {}
+            for doctor, days_free in calendar.items():
+                if response_format == "bitmask":
+                    # Bit i of a day's mask is set when slots[doctor][i] is offered and free that day
+                    slot_minutes = availability_service.calendar_slots(doctor, days_free)
+                    slots[doctor] = [minutes_to_slot(minutes) for minutes in slot_minutes]
+                    availability[doctor] = {
+                        day.isoformat(): sum(1 << index for index, minutes in enumerate(slot_minutes) if free >> minutes & 1)
+                        for day, free in days_free.items()
+                    }
+                else:
+                    availability[doctor] = {
+                        day.isoformat(): [minutes_to_slot(minutes) for minutes in mask_to_minutes(free)]
+                        for day, free in days_free.items()
+                    }
+
+            data = {
+                "start_date": start_date.isoformat(),
+                "end_date": end_date.isoformat(),
+                "format": response_format,
+                "availability": availability,
+            }
+            if response_format == "bitmask":
+                data["slots"] = slots
+
+            return {
+                "status": "success",
+                "message": f"Availability from {data['start_date']} to {data['end_date']}",
+                "data": data
+            }, 200
+
+        except Exception as e:
+            return {"status": "error", "message": f"Unexpected error: {str(e)}"}, 500
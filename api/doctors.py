@@ -0,0 +1,155 @@
+from flask import request
+from flask_restful import Resource
+from datetime import datetime, date
+
+from database import db, Doctor, DoctorSchedule, ScheduleException
+from services.doctor_schedule import WEEKDAYS, schedule_store, slot_to_minutes, minutes_to_slot
+
+
+def parse_weekly_hours(weekly_hours: dict) -> list:
+    """{"mon": [["8:00", "12:00"], ...], ...} -> [(weekday, start_minute, end_minute), ...]"""
+    blocks = []
+    for day_name, ranges in (weekly_hours or {}).items():
+        if day_name not in WEEKDAYS:
+            raise ValueError(f"Unknown weekday '{day_name}'. Use one of {list(WEEKDAYS)}")
+        for start, end in ranges:
+            start_minute, end_minute = slot_to_minutes(start), slot_to_minutes(end)
+            if start_minute >= end_minute:
+                raise ValueError(f"Working hours {start}-{end} on {day_name} end before they start")
+            blocks.append((WEEKDAYS.index(day_name), start_minute, end_minute))
+    return blocks
+
+
+def dump_doctor(doctor, schedules, exceptions):
+    weekly_hours = {}
+    for block in sorted(schedules, key=lambda block: (block.weekday, block.start_minute)):
+        weekly_hours.setdefault(WEEKDAYS[block.weekday], []).append(
+            [minutes_to_slot(block.start_minute), minutes_to_slot(block.end_minute)])
+    return {
+        "id": doctor.id,
+        "name": doctor.name,
+        "slot_minutes": doctor.slot_minutes,
+        "active": doctor.active,
+        "weekly_hours": weekly_hours,
+        "exceptions": [dump_exception(exception) for exception in exceptions],
+    }
+
+
+def dump_exception(exception):
+    return {
+        "id": exception.id,
+        "date": exception.day.isoformat(),
+        "start": None if exception.start_minute is None else minutes_to_slot(exception.start_minute),
+        "end": None if exception.end_minute is None else minutes_to_slot(exception.end_minute),
+        "reason": exception.reason,
+    }
+
+
+class DoctorListResource(Resource):
+    @staticmethod
+    def get():
+        """List doctors with their weekly hours and upcoming exceptions"""
+        try:
+            doctors = Doctor.query.order_by(Doctor.id).all()
+            schedules, exceptions = {}, {}
+            for block in DoctorSchedule.query.all():
+                schedules.setdefault(block.doctor_id, []).append(block)
+            for exception in ScheduleException.query.filter(ScheduleException.day >= date.today()).order_by(ScheduleException.day):
+                exceptions.setdefault(exception.doctor_id, []).append(exception)
+            return {
+                "status": "success",
+                "data": {
+                    "doctors": [dump_doctor(d, schedules.get(d.id, []), exceptions.get(d.id, [])) for d in doctors],
+                    "clinic_holidays": [dump_exception(exception) for exception in exceptions.get(None, [])],
+                }
+            }, 200
+        except Exception as e:
+            return {"status": "error", "message": f"Unexpected error: {str(e)}"}, 500
+
+    @staticmethod
+    def post():
+        """
+        Create a doctor, or replace an existing doctor's slot length and weekly hours.
+        The built-in default doctors only apply while the doctors table is empty.
+        """
+        try:
+            json_data = request.get_json(force=True)
+            name = json_data.get("name")
+            slot_minutes = json_data.get("slot_minutes", 60)
+            active = json_data.get("active", True)
+            if not name:
+                return {"status": "error", "message": "name is required"}, 400
+            # A string such as "false" would otherwise count as true
+            if not isinstance(active, bool):
+                return {"status": "error", "message": "active must be true or false"}, 400
+            if not isinstance(slot_minutes, int) or not 5 <= slot_minutes <= 240:
+                return {"status": "error", "message": "slot_minutes must be an integer between 5 and 240"}, 400
+            try:
+                blocks = parse_weekly_hours(json_data.get("weekly_hours"))
+            except (ValueError, TypeError) as e:
+                return {"status": "error", "message": f"Invalid weekly_hours: {e}"}, 400
+
+            doctor = Doctor.query.filter_by(name=name).first()
+            created = doctor is None
+            if created:
+                doctor = Doctor(name=name)
+                db.session.add(doctor)
+            doctor.slot_minutes = slot_minutes
+            doctor.active = active
+            db.session.flush()
+
+            DoctorSchedule.query.filter_by(doctor_id=doctor.id).delete()
+            schedules = [
+                DoctorSchedule(doctor_id=doctor.id, weekday=weekday, start_minute=start, end_minute=end)
+                for weekday, start, end in blocks
+            ]
+            db.session.add_all(schedules)
+            db.session.commit()
+            schedule_store.invalidate()
+
+            return {
+                "status": "success",
+                "message": "Doctor created" if created else "Doctor updated",
+                "data": dump_doctor(doctor, schedules, [])
+            }, 201 if created else 200
+        except Exception as e:
+            db.session.rollback()
+            return {"status": "error", "message": f"Unexpected error: {str(e)}"}, 500
+
+
+class ScheduleExceptionResource(Resource):
+    @staticmethod
+    def post():
+        """Add time off for a doctor, or a clinic-wide holiday when no doctor is given"""
+        try:
+            json_data = request.get_json(force=True)
+            doctor_name = json_data.get("doctor")
+            start, end = json_data.get("start"), json_data.get("end")
+            try:
+                day = datetime.strptime(json_data.get("date", ""), "%Y-%m-%d").date()
+                start_minute = slot_to_minutes(start) if start else None
+                end_minute = slot_to_minutes(end) if end else None
+            except (TypeError, ValueError):
+                return {"status": "error", "message": "Invalid date (YYYY-MM-DD) or start/end (H:MM)"}, 400
+            if (start_minute is None) != (end_minute is None) or (start_minute is not None and start_minute >= end_minute):
+                return {"status": "error", "message": "Give both start and end with start before end, or neither for the whole day"}, 400
+
+            doctor_id = None
+            if doctor_name:
+                doctor = Doctor.query.filter_by(name=doctor_name).first()
+                if doctor is None:
+                    return {"status": "error", "message": f"Unknown doctor '{doctor_name}'"}, 404
+                doctor_id = doctor.id
+
+            exception = ScheduleException(
+                doctor_id=doctor_id, day=day, start_minute=start_minute, end_minute=end_minute,
+                reason=json_data.get("reason")
+            )
+            db.session.add(exception)
+            db.session.commit()
+            schedule_store.invalidate()
+
+            return {"status": "success", "message": "Schedule exception added", "data": dump_exception(exception)}, 201
+        except Exception as e:
+            db.session.rollback()
+            return {"status": "error", "message": f"Unexpected error: {str(e)}"}, 500
@@ -0,0 +1,13 @@
+from flask_restful import Resource
+
+from database import pool_metrics
+
+
+class DatabasePoolResource(Resource):
+    @staticmethod
+    def get():
+        """Connection pool usage for the primary database and the read replica"""
+        try:
+            return {"status": "success", "data": pool_metrics()}, 200
+        except Exception as e:
+            return {"status": "error", "message": f"Unexpected error: {str(e)}"}, 500
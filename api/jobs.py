@@ -0,0 +1,27 @@
+from flask_restful import Resource
+
+from database import db, Job
+
+
+class JobStatusResource(Resource):
+    @staticmethod
+    def get(job_id):
+        """Get the status of a background job"""
+        try:
+            job = db.session.get(Job, job_id)
+            if job is None:
+                return {"status": "error", "message": "Job not found"}, 404
+            return {
+                "status": "success",
+                "data": {
+                    "id": job.id,
+                    "kind": job.kind,
+                    "job_status": job.status,
+                    "attempts": job.attempts,
+                    "max_attempts": job.max_attempts,
+                    "run_at": job.run_at.isoformat(),
+                    "last_error": job.last_error,
+                }
+            }, 200
+        except Exception as e:
+            return {"status": "error", "message": f"Unexpected error: {str(e)}"}, 500
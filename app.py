@@ -6,10 +6,21 @@ from dotenv import load_dotenv
 from flask_migrate import Migrate
 from flask import Flask, Blueprint
 
-from database import db
-from api.appointment import AppointmentListResource
-from api.available_slots import AvailableSlotsResource
+from database import db, track_pool, configure_sqlite
+from services.metrics import metrics
+from services.occupancy_cache import occupancy_cache
+from services.sql_profiler import sql_profiler
+from services.doctor_schedule import schedule_store
+from services.registry import service_registry
+from services.booking_pipeline import booking_pipeline
+from api.appointment import AppointmentListResource, AppointmentStatusResource, DoctorDayCancellationResource
+from api.appointment_export import AppointmentExportResource
+from api.appointment_import import AppointmentImportResource
+from api.available_slots import AvailableSlotsResource, AvailabilityCalendarResource
 from api.appointment_reminder import SendRemindersResource
+from api.jobs import JobStatusResource
+from api.health import DatabasePoolResource
+from api.doctors import DoctorListResource, ScheduleExceptionResource
 
 # Load environment variables from .env
 env_file_name = ".env"
@@ -24,19 +35,47 @@ from config import Config
 api_bp = Blueprint("api", __name__)
 api = Api(api_bp)
 api.add_resource(AppointmentListResource, "/appointments")
+api.add_resource(AppointmentExportResource, "/appointments/export")
+api.add_resource(AppointmentImportResource, "/appointments/import")
+api.add_resource(DoctorDayCancellationResource, "/appointments/cancel-day")
+api.add_resource(AppointmentStatusResource, "/appointments/<int:appointment_id>/status")
+api.add_resource(DoctorListResource, "/doctors")
+api.add_resource(ScheduleExceptionResource, "/doctors/exceptions")
 api.add_resource(AvailableSlotsResource, '/available-slots')
+api.add_resource(AvailabilityCalendarResource, '/available-slots/calendar')
 api.add_resource(SendRemindersResource, "/send-reminders")
+api.add_resource(JobStatusResource, "/jobs/<int:job_id>")
+api.add_resource(DatabasePoolResource, "/health/db-pool")
 
-def create_app():
+def create_app(config_overrides=None):
     app = Flask(__name__)
     app.config.from_object(Config)
+    if config_overrides:
+        app.config.update(config_overrides)
 
     # Initialize extensions
     CORS(app)
 
     with app.app_context():
         db.init_app(app)
+        metrics.init_app(app)
+        sql_profiler.init_app(app)
+        for bind_key, engine in db.engines.items():
+            track_pool(bind_key or "primary", engine)
+            metrics.instrument_engine(bind_key or "primary", engine)
+            sql_profiler.instrument_engine(engine)
+            if app.config["SQLITE_PERFORMANCE_MODE"] and engine.dialect.name == "sqlite":
+                configure_sqlite(
+                    engine,
+                    busy_timeout_ms=app.config["SQLITE_BUSY_TIMEOUT_MS"],
+                    cache_size_kb=app.config["SQLITE_CACHE_SIZE_KB"],
+                    mmap_size=app.config["SQLITE_MMAP_SIZE"],
+                )
         Migrate(app, db)
+        occupancy_cache.init_app(app)
+        schedule_store.init_app(app)
+        booking_pipeline.init_app(app)
+        service_registry.init_app(app)
 
     # Register blueprint
     app.register_blueprint(api_bp, url_prefix="/api")
@@ -0,0 +1,55 @@
+"""
+Compare get_booked_slots latency against the legacy func.date() filter as the
+appointments table grows.
+
+    python benchmarks/bench_booked_slots.py --sizes 1000 10000 100000 1000000
+"""
+import os
+import json
+import argparse
+from datetime import date
+
+from common import make_app, seed_appointments, time_call, summarize, DOCTORS
+
+from database import db, Appointment
+from api.appointment import get_booked_slots
+
+BOOKINGS_PER_DOCTOR_DAY = 5
+
+
+def legacy_get_booked_slots(date, doctor=None):
+    """The pre-index implementation, kept here as the baseline."""
+    query = Appointment.query.filter(db.func.date(Appointment.appointment_time) == date)
+    if doctor:
+        query = query.filter_by(preferred_doctor=doctor)
+    return [a.appointment_time.strftime("%H:%M") for a in query.all()]
+
+
+def run(sizes, repeat):
+    results = []
+    for size in sizes:
+        app, db_path = make_app()
+        try:
+            with app.app_context():
+                # Hold per-day density constant so only the table size varies
+                seed_appointments(size, days=max(1, size // (len(DOCTORS) * BOOKINGS_PER_DOCTOR_DAY)))
+                target = date.today()
+                # Both implementations must agree before we time them
+                assert sorted(get_booked_slots(target, DOCTORS[0])) == sorted(legacy_get_booked_slots(target, DOCTORS[0]))
+                results.append({
+                    "rows": size,
+                    "range_query": summarize(time_call(get_booked_slots, target, DOCTORS[0], repeat=repeat)),
+                    "legacy_func_date": summarize(time_call(legacy_get_booked_slots, target, DOCTORS[0], repeat=repeat)),
+                })
+                print(json.dumps(results[-1]))
+        finally:
+            os.remove(db_path)
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    run(args.sizes, args.repeat)
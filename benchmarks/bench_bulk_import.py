@@ -0,0 +1,83 @@
+"""
+Bulk import throughput: import_appointments (schema validation, one conflict query,
+chunked executemany) against committing one appointment at a time, the way replaying
+history through POST /api/appointments stores rows (without its external calls).
+
+    python benchmarks/bench_bulk_import.py --rows 20000 --existing 10000
+"""
+import os
+import json
+import time
+import argparse
+from datetime import date, timedelta
+
+from common import make_app, appointment_rows, seed_appointments
+
+from database import db, Appointment, AppointmentSchema, BookingStatus
+from services.appointment_import import import_appointments, validate_rows
+
+# Existing appointments are seeded over this many days centred on today
+SEED_DAYS = 365
+
+
+def import_records(count):
+    """`count` records in the API's JSON format, starting the day after the seeded window."""
+    schema = AppointmentSchema()
+    rows = appointment_rows(count, start_date=date.today() + timedelta(days=SEED_DAYS - SEED_DAYS // 2),
+                            days=count // 25 + 1, seed=7)
+    return [schema.dump(row) for row in rows]
+
+
+def run_bulk(records, existing, chunk_size):
+    app, db_path = make_app()
+    try:
+        with app.app_context():
+            seed_appointments(existing, days=SEED_DAYS)
+            started = time.perf_counter()
+            validate_rows([dict(record) for record in records])
+            validated = time.perf_counter() - started
+            result = import_appointments(records, chunk_size=chunk_size)
+            assert result["imported"] == len(records), result["errors"][:3]
+            # Importing the same file again must report every row as a conflict
+            again = import_appointments(records, chunk_size=chunk_size)
+            assert again["imported"] == 0 and again["failed"] == len(records)
+            db.engine.dispose()
+        return {
+            "rows": len(records),
+            "seconds": round(result["duration_seconds"], 3),
+            "rows_per_second": round(len(records) / result["duration_seconds"]),
+            "validation_share": round(validated / result["duration_seconds"], 2),
+        }
+    finally:
+        os.remove(db_path)
+
+
+def run_row_by_row(records, existing):
+    app, db_path = make_app()
+    try:
+        with app.app_context():
+            seed_appointments(existing, days=SEED_DAYS)
+            schema = AppointmentSchema()
+            started = time.perf_counter()
+            for record in records:
+                values = schema.load({key: value for key, value in record.items() if key in schema.load_fields})
+                db.session.add(Appointment(**values, booking_status=BookingStatus.CONFIRMED.value))
+                db.session.commit()
+            elapsed = time.perf_counter() - started
+            db.engine.dispose()
+        return {"rows": len(records), "seconds": round(elapsed, 3), "rows_per_second": round(len(records) / elapsed)}
+    finally:
+        os.remove(db_path)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20_000, help="Appointments to import")
+    parser.add_argument("--existing", type=int, default=10_000, help="Appointments in the table before the import")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Rows per insert transaction")
+    parser.add_argument("--row-by-row", type=int, default=2000, help="Rows for the one-commit-per-row baseline")
+    args = parser.parse_args()
+
+    records = import_records(args.rows)
+    print(json.dumps({"bulk_import": run_bulk(records, args.existing, args.chunk_size)}))
+    print(json.dumps({"row_by_row": run_row_by_row(records[:args.row_by_row], args.existing)}))
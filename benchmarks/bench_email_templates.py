@@ -0,0 +1,61 @@
+"""
+Compare compiled email template rendering against the legacy read-and-replace
+EmailService.load_template.
+
+    python benchmarks/bench_email_templates.py --renders 5000
+"""
+import os
+import json
+import time
+import argparse
+
+import common  # noqa: F401  (makes app modules importable)
+
+from services.email_service import Templates
+from services.template_engine import TemplateEngine
+
+TEMPLATES_FOLDER = os.path.join(os.path.dirname(__file__), '..', 'email-templates')
+
+CONTEXT = {
+    'patient_name': 'Abebe Kebede',
+    'appointment_time': '2026-10-18 09:00',
+    'doctor': 'Dr. Lee',
+    'description': 'Three days of headache with mild fever; no known allergies.',
+    'clinic_name': 'CareSync',
+}
+
+
+def legacy_load_template(folder, template, body):
+    """The pre-engine implementation, kept here as the baseline."""
+    with open(f"{folder}/{template}") as f:
+        file = f.read()
+        for key, value in body.items():
+            file = file.replace(f"{{{key}}}", value)
+        return file
+
+
+def throughput(func, renders):
+    started = time.perf_counter()
+    for _ in range(renders):
+        func()
+    return round(renders / (time.perf_counter() - started), 1)
+
+
+def run(renders):
+    engine = TemplateEngine(TEMPLATES_FOLDER)
+    results = []
+    for template in (Templates.APPOINTMENT_CONFIRMATION.value, Templates.APPOINTMENT_REMINDER.value):
+        assert engine.render(template, CONTEXT) == legacy_load_template(TEMPLATES_FOLDER, template, CONTEXT)
+        results.append({
+            "template": template,
+            "compiled_renders_per_sec": throughput(lambda: engine.render(template, CONTEXT), renders),
+            "legacy_renders_per_sec": throughput(lambda: legacy_load_template(TEMPLATES_FOLDER, template, CONTEXT), renders),
+        })
+        print(json.dumps(results[-1]))
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--renders", type=int, default=5000)
+    run(parser.parse_args().renders)
@@ -0,0 +1,282 @@
+"""
+Throughput and p50/p99 latency of the booking and availability endpoints at several
+database sizes, through the Flask test client and a multi-worker gunicorn server.
+Gemini, Calendar, SendGrid and Twilio are local fakes with --fake-latency seconds per
+call. Results are written as JSON; compare two runs with benchmarks/compare.py.
+
+    python benchmarks/bench_endpoints.py --scales 1000,10000,100000 --requests 300
+    python benchmarks/bench_endpoints.py --database-url postgresql://localhost/caresync_bench
+
+--database-url must point at a scratch database: its tables are dropped and recreated per scale.
+"""
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import platform
+import itertools
+import subprocess
+import http.client
+from datetime import date, datetime, timedelta, timezone
+from urllib.parse import urlencode
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+from common import ROOT, DOCTORS, make_app, seed_appointments, register_fake_services, summarize
+
+from database import db
+from services.sql_profiler import sql_profiler
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+WARMUP_REQUESTS = 5
+SERVER_START_TIMEOUT = 30
+SERVER_STOP_TIMEOUT = 10
+
+
+def scenarios(mode):
+    """Endpoint name -> function of the request number returning (method, path, JSON body)."""
+    tomorrow = date.today() + timedelta(days=1)
+
+    def day(i, offset=0):
+        return (tomorrow + timedelta(days=i % 28 + offset)).isoformat()
+
+    def booking(i):
+        # Distinct symptoms, so every booking pays for a (fake) Gemini call instead of a cache hit
+        return {
+            "patient_name": f"Load Patient {i}",
+            "patient_phone": "+251900000000",
+            "patient_email": f"load{i}@example.com",
+            "date_of_birth": "1990-01-01",
+            "symptoms": f"Headache and mild fever ({mode} {i})",
+            "preferred_doctor": DOCTORS[i % len(DOCTORS)],
+        }
+
+    return {
+        "list_appointments": lambda i: ("GET", "/api/appointments?limit=50", None),
+        "list_by_doctor": lambda i: (
+            "GET", "/api/appointments?" + urlencode({"doctor": DOCTORS[i % len(DOCTORS)], "start_date": day(i), "limit": 50}), None),
+        "available_slots": lambda i: (
+            "POST", "/api/available-slots", {"doctor": DOCTORS[i % len(DOCTORS)], "date": day(i)}),
+        "availability_calendar": lambda i: (
+            "POST", "/api/available-slots/calendar", {"start_date": day(i), "end_date": day(i, offset=6)}),
+        "book_appointment": lambda i: ("POST", "/api/appointments", booking(i)),
+    }
+
+
+def result(samples, errors, elapsed, **fields):
+    return dict(fields, requests=len(samples), errors=errors,
+                throughput_rps=round(len(samples) / elapsed, 2), **summarize(samples))
+
+
+def run_client(app, requests):
+    """Sequential requests through the Flask test client: per-request cost without a server."""
+    client = app.test_client()
+    results = []
+    for name, scenario in scenarios("client").items():
+        for i in range(-WARMUP_REQUESTS, 0):
+            method, path, body = scenario(i)
+            client.open(path, method=method, json=body)
+        method, path, body = scenario(0)
+        with sql_profiler.profile(explain_slow=False) as profile:
+            client.open(path, method=method, json=body)
+
+        samples, errors = [], 0
+        started = time.perf_counter()
+        for i in range(1, requests + 1):
+            method, path, body = scenario(i)
+            sent = time.perf_counter()
+            response = client.open(path, method=method, json=body)
+            samples.append((time.perf_counter() - sent) * 1000)
+            errors += response.status_code >= 400
+        results.append(result(samples, errors, time.perf_counter() - started,
+                              endpoint=name, queries_per_request=profile.queries))
+    return results
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def gunicorn_server(database_url, workers, threads, fake_latency):
+    """Run bench_server.py under gunicorn.conf.py and yield its port."""
+    port = free_port()
+    env = dict(
+        os.environ,
+        DATABASE_URL=database_url,
+        SQLITE_PERFORMANCE_MODE="true",
+        BENCH_FAKE_LATENCY=str(fake_latency),
+        GUNICORN_BIND=f"127.0.0.1:{port}",
+        GUNICORN_WORKERS=str(workers),
+        GUNICORN_THREADS=str(threads),
+    )
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", os.path.join(ROOT, "gunicorn.conf.py"),
+         "--pythonpath", f"{ROOT},{BENCH_DIR}", "--log-level", "warning", "bench_server:app"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = time.monotonic() + SERVER_START_TIMEOUT
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"gunicorn exited with code {process.returncode}")
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            try:
+                connection.request("GET", "/api/doctors")
+                if connection.getresponse().status == 200:
+                    break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"gunicorn did not answer on port {port} within {SERVER_START_TIMEOUT}s")
+                time.sleep(0.2)
+            finally:
+                # Idle keep-alive connections hold up gunicorn's graceful shutdown
+                connection.close()
+        yield port
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=SERVER_STOP_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+def run_http(port, requests, concurrency):
+    """`concurrency` keep-alive clients sharing `requests` requests per endpoint."""
+    results = []
+    for name, scenario in scenarios("gunicorn").items():
+        numbers = itertools.count(-WARMUP_REQUESTS)
+
+        def client():
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+            samples, errors = [], 0
+            while True:
+                i = next(numbers)  # shared by all clients; negative numbers are warm-up requests
+                if i >= requests:
+                    break
+                method, path, body = scenario(i)
+                payload = json.dumps(body).encode() if body is not None else None
+                headers = {"Content-Type": "application/json"} if payload else {}
+                sent = time.perf_counter()
+                try:
+                    connection.request(method, path, body=payload, headers=headers)
+                    response = connection.getresponse()
+                    response.read()
+                    failed = response.status >= 400
+                except (OSError, http.client.HTTPException):
+                    connection.close()
+                    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+                    failed = True
+                if i >= 0:
+                    samples.append((time.perf_counter() - sent) * 1000)
+                    errors += failed
+            connection.close()
+            return samples, errors
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            outcomes = list(pool.map(lambda _: client(), range(concurrency)))
+        elapsed = time.perf_counter() - started
+        samples = [sample for worker_samples, _ in outcomes for sample in worker_samples]
+        results.append(result(samples, sum(errors for _, errors in outcomes), elapsed,
+                              endpoint=name, concurrency=concurrency))
+    return results
+
+
+@contextmanager
+def scaled_database(scale, database_url):
+    """An app whose database holds `scale` synthetic appointments."""
+    days = max(365, -(-scale // (len(DOCTORS) * 10)) * 2)  # half the seeded slots stay free
+    app, db_path = make_app(database_url=database_url, SQLITE_PERFORMANCE_MODE=database_url is None)
+    try:
+        with app.app_context():
+            if database_url:
+                db.drop_all()
+                db.create_all()
+            seed_appointments(scale, days=days)
+        yield app, app.config["SQLALCHEMY_DATABASE_URI"]
+    finally:
+        with app.app_context():
+            if database_url:
+                db.drop_all()
+            db.engine.dispose()
+        if db_path:
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(db_path + suffix):
+                    os.remove(db_path + suffix)
+
+
+def git_revision():
+    try:
+        commit = subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+        dirty = bool(subprocess.check_output(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT, text=True).strip())
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return commit, dirty
+
+
+def run(args):
+    commit, dirty = git_revision()
+    report = {
+        "meta": {
+            "commit": commit,
+            "dirty": dirty,
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "database": args.database_url.split(":", 1)[0] if args.database_url else "sqlite",
+            "scales": args.scales,
+            "requests": args.requests,
+            "fake_latency": args.fake_latency,
+            "workers": args.workers,
+            "threads": args.threads,
+            "concurrency": args.concurrency,
+        },
+        "results": [],
+    }
+    register_fake_services(latency=args.fake_latency)
+    for scale in args.scales:
+        with scaled_database(scale, args.database_url) as (app, database_url):
+            runs = []
+            if "client" in args.modes:
+                runs += [dict(mode="client", **row) for row in run_client(app, args.requests)]
+            if "gunicorn" in args.modes:
+                with gunicorn_server(database_url, args.workers, args.threads, args.fake_latency) as port:
+                    runs += [dict(mode="gunicorn", **row) for row in run_http(port, args.requests, args.concurrency)]
+            for row in runs:
+                row = dict(scale=scale, **row)
+                report["results"].append(row)
+                print(json.dumps(row))
+    return report
+
+
+def csv_list(cast):
+    return lambda value: [cast(item) for item in value.split(",") if item]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=csv_list(int), default=[1000, 10000, 100000], help="Seeded appointments per run")
+    parser.add_argument("--requests", type=int, default=200, help="Timed requests per endpoint")
+    parser.add_argument("--modes", type=csv_list(str), default=["client", "gunicorn"], help="client, gunicorn")
+    parser.add_argument("--fake-latency", type=float, default=0.02, help="Seconds per fake Gemini/Calendar/SendGrid call")
+    parser.add_argument("--database-url", help="Scratch server database (e.g. PostgreSQL) instead of a temporary SQLite file")
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn workers")
+    parser.add_argument("--threads", type=int, default=4, help="gunicorn threads per worker")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent HTTP clients against gunicorn")
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/<commit>.json)")
+    args = parser.parse_args()
+
+    report = run(args)
+    output = args.output or os.path.join(RESULTS_DIR, f"{report['meta']['commit'] or 'results'}{'-dirty' if report['meta']['dirty'] else ''}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}", file=sys.stderr)
@@ -0,0 +1,49 @@
+"""
+Latency of read endpoints with METRICS_ENABLED on and off, to keep the request,
+SQL and dependency instrumentation overhead in check.
+
+    python benchmarks/bench_metrics_overhead.py --appointments 5000 --repeat 500
+"""
+import os
+import json
+import argparse
+from datetime import date, timedelta
+
+from common import make_app, seed_appointments, time_call, summarize
+
+from database import db
+
+TOMORROW = (date.today() + timedelta(days=1)).isoformat()
+# name, method, path, JSON body
+ENDPOINTS = [
+    ("list", "GET", "/api/appointments?limit=20", None),
+    ("slots", "POST", "/api/available-slots", {"doctor": "Dr. Lee", "date": TOMORROW}),
+]
+
+
+def run(appointments, repeat, enabled):
+    app, db_path = make_app(METRICS_ENABLED=enabled)
+    try:
+        with app.app_context():
+            seed_appointments(appointments)
+        client = app.test_client()
+        results = {"metrics_enabled": enabled}
+        for name, method, path, body in ENDPOINTS:
+            assert client.open(path, method=method, json=body).status_code == 200  # also warms caches
+            results[name] = summarize(time_call(client.open, path, method=method, json=body, repeat=repeat))
+        if enabled:
+            results["metrics_scrape"] = summarize(time_call(client.get, "/metrics", repeat=repeat))
+        with app.app_context():
+            db.engine.dispose()
+    finally:
+        os.remove(db_path)
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--appointments", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=500)
+    args = parser.parse_args()
+    for enabled in (False, True):
+        print(json.dumps(run(args.appointments, args.repeat, enabled)))
@@ -0,0 +1,90 @@
+"""
+Micro-benchmark find_next_available_slot against the legacy per-day, per-doctor loop.
+
+The first --full-days days are fully booked for every doctor so the search has to
+walk past them, which is the worst case for the legacy implementation.
+
+    python benchmarks/bench_next_available_slot.py --full-days 0 10 29
+"""
+import os
+import json
+import argparse
+from datetime import datetime, time, date, timedelta
+
+from sqlalchemy import insert
+
+from common import make_app, time_call, summarize
+
+from database import db, Appointment
+from api.appointment import get_booked_slots, find_next_available_slot
+from services.doctor_schedule import DOCTOR_SLOTS
+from services.availability_service import AvailabilityService
+
+
+def legacy_find_next_available_slot(start_date=None, doctor=None):
+    """The pre-engine implementation, kept here as the baseline."""
+    if not start_date:
+        start_date = date.today()
+    for i in range(30):
+        current_date = start_date + timedelta(days=i)
+        doctors_to_check = [doctor] if doctor else DOCTOR_SLOTS.keys()
+        for doc in doctors_to_check:
+            booked_slots = get_booked_slots(current_date, doc)
+            for slot in DOCTOR_SLOTS[doc]:
+                if slot.zfill(5) not in booked_slots:
+                    hour, minute = map(int, slot.split(":"))
+                    return doc, datetime.combine(current_date, time(hour, minute))
+    return None, None
+
+
+def fill_days(start_date, days):
+    rows = []
+    for i in range(days):
+        current_date = start_date + timedelta(days=i)
+        for doctor, slots in DOCTOR_SLOTS.items():
+            for slot in slots:
+                hour, minute = map(int, slot.split(":"))
+                rows.append({
+                    "patient_name": "Benchmark",
+                    "patient_email": "bench@example.com",
+                    "patient_phone": "+251900000000",
+                    "date_of_birth": datetime(1990, 1, 1),
+                    "preferred_doctor": doctor,
+                    "symptoms": "Benchmark",
+                    "appointment_time": datetime.combine(current_date, time(hour, minute)),
+                    "reminder_sent": False,
+                    "created_at": datetime.utcnow(),
+                })
+    if rows:
+        db.session.execute(insert(Appointment), rows)
+    db.session.commit()
+
+
+def run(full_days_list, repeat):
+    results = []
+    for full_days in full_days_list:
+        app, db_path = make_app()
+        try:
+            with app.app_context():
+                start_date = date.today()
+                fill_days(start_date, full_days)
+                uncached = AvailabilityService()
+                assert uncached.find_next_available_slot(start_date) == legacy_find_next_available_slot(start_date)
+                results.append({
+                    "fully_booked_days": full_days,
+                    "engine": summarize(time_call(uncached.find_next_available_slot, start_date, repeat=repeat)),
+                    "engine_with_occupancy_cache": summarize(time_call(find_next_available_slot, start_date, repeat=repeat)),
+                    "legacy_loop": summarize(time_call(legacy_find_next_available_slot, start_date, repeat=repeat)),
+                })
+                print(json.dumps(results[-1]))
+        finally:
+            os.remove(db_path)
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--full-days", type=int, nargs="+", default=[0, 10, 29])
+    parser.add_argument("--repeat", type=int, default=100)
+    args = parser.parse_args()
+    run(args.full_days, args.repeat)
@@ -0,0 +1,14 @@
+"""
+WSGI entry point for load tests: the app with fake external services, configured
+from the environment (DATABASE_URL, SQLITE_PERFORMANCE_MODE, ...) like production.
+bench_endpoints.py starts it; to run it by hand:
+
+    BENCH_FAKE_LATENCY=0.05 DATABASE_URL=sqlite:////tmp/bench.db \
+        gunicorn -c gunicorn.conf.py --pythonpath .,benchmarks bench_server:app
+"""
+import os
+
+from common import create_app, register_fake_services
+
+register_fake_services(latency=float(os.getenv("BENCH_FAKE_LATENCY", 0)))
+app = create_app()
@@ -0,0 +1,76 @@
+"""
+SMS reminder run against a fake Twilio that rejects requests above its throughput
+with HTTP 429. Compares unpaced concurrent sends with the token-bucket paced
+SmsService at the sender's rate.
+
+    python benchmarks/bench_sms_reminders.py --patients 5000 --rate 100 --latency 0.05
+"""
+import os
+import json
+import argparse
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import insert
+
+from common import make_app, appointment_rows
+
+from database import db, Appointment
+from services.fakes import FakeTwilioClient
+from services.registry import service_registry
+from services.sms_service import SmsService
+from services.reminder_service import send_due_reminders, REMINDER_TIMEZONE
+
+
+def seed_due_appointments(count):
+    """`count` confirmed, unreminded appointments over the next 20 hours, one doctor each."""
+    start = datetime.now(ZoneInfo(REMINDER_TIMEZONE)).replace(tzinfo=None) + timedelta(hours=1)
+    rows = []
+    for i, row in enumerate(appointment_rows(count, days=count // 30 + 1)):
+        rows.append(dict(
+            row,
+            preferred_doctor=f"Dr. Bench {i}",
+            appointment_time=start + timedelta(seconds=i * 72_000 // count),
+        ))
+    db.session.execute(insert(Appointment), rows)
+    db.session.commit()
+
+
+def run(patients, rate, latency, concurrency, paced):
+    # Unpaced: a limiter too fast to matter and no 429 retries, i.e. the previous behaviour
+    app, db_path = make_app(
+        REMINDER_CHANNELS=("sms",), SMS_CONCURRENCY=concurrency,
+        SMS_RATE_PER_SECOND=rate if paced else 1e9, SMS_BURST=1 if paced else 1e9, SMS_MAX_RETRIES=2 if paced else 0,
+    )
+    client = FakeTwilioClient(latency=latency, max_per_second=rate)
+    service_registry.register("sms", lambda: SmsService(client=client, from_phone="+15550000000"))
+    try:
+        with app.app_context():
+            seed_due_appointments(patients)
+            metrics = send_due_reminders()
+            reminded = db.session.query(Appointment).filter(Appointment.reminder_sent == True).count()  # noqa: E712
+            db.engine.dispose()
+    finally:
+        os.remove(db_path)
+        service_registry.reset()
+    return {
+        "paced": paced,
+        "found": metrics["found"],
+        "sent": metrics["sent"],
+        "failed": metrics["failed"],
+        "flagged_reminded": reminded,
+        "rejected_429": client.rejected,
+        "duration_seconds": metrics["duration_seconds"],
+        "sent_per_second": metrics["sent_per_second"],
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--patients", type=int, default=1000, help="Appointments due for a reminder")
+    parser.add_argument("--rate", type=float, default=100, help="Messages per second the fake sender accepts")
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds per fake Twilio request")
+    parser.add_argument("--concurrency", type=int, default=16, help="SMS_CONCURRENCY")
+    args = parser.parse_args()
+    for paced in (False, True):
+        print(json.dumps(run(args.patients, args.rate, args.latency, args.concurrency, paced)))
@@ -0,0 +1,63 @@
+"""
+Compare compiled SMS template rendering against the legacy per-call lookup,
+parameter loop and str.format, and time render_batch with segment counting.
+
+    python benchmarks/bench_sms_templates.py --messages 5000
+"""
+import json
+import time
+import argparse
+
+import common  # noqa: F401  (makes app modules importable)
+
+from services.email_service import Templates
+from services.sms_service import SmsTemplateManager, sms_templates, batch_summary
+
+NAMES = ["Abebe Kebede", "Sara Tesfaye", "አበበ ከበደ", "Liya Mekonnen"]  # one Amharic name forces UCS-2
+
+
+def legacy_load_template(template_name, data):
+    """The pre-compilation implementation, kept here as the baseline."""
+    template_data = SmsTemplateManager.TEMPLATES.get(template_name)
+    if not template_data:
+        raise ValueError(f"Template '{template_name}' is not defined.")
+    template = template_data["template"]
+    for param in template_data["required_params"]:
+        if param not in data:
+            raise ValueError(f"Missing required parameter '{param}' for template '{template_name}'")
+    return template.format(**data)
+
+
+def rows(count):
+    return [
+        {"patient_name": NAMES[i % len(NAMES)], "doctor": "Dr. Lee", "appointment_time": f"2026-10-19 {8 + i % 10}:00"}
+        for i in range(count)
+    ]
+
+
+def timed(func):
+    started = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - started
+
+
+def run(count):
+    template = Templates.APPOINTMENT_REMINDER_SMS.value
+    data = rows(count)
+    legacy, legacy_seconds = timed(lambda: [legacy_load_template(template, row) for row in data])
+    compiled, compiled_seconds = timed(lambda: [sms_templates.load_template(template, row) for row in data])
+    rendered, batch_seconds = timed(lambda: sms_templates.render_batch(template, data))
+    assert legacy == compiled == [message.body for message in rendered]
+    return {
+        "messages": count,
+        "legacy_per_sec": round(count / legacy_seconds),
+        "compiled_per_sec": round(count / compiled_seconds),
+        "render_batch_with_segments_per_sec": round(count / batch_seconds),
+        "batch": batch_summary(rendered),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=5000)
+    print(json.dumps(run(parser.parse_args().messages)))
@@ -0,0 +1,144 @@
+"""
+Concurrent booking throughput on SQLite with and without SQLITE_PERFORMANCE_MODE.
+Several writer processes run booking-style transactions (conflict check, insert,
+commit) while reader processes query availability, the way gunicorn workers and
+reminder runs share patients.db. Failures are counted rather than retried.
+
+    python benchmarks/bench_sqlite_concurrency.py --writers 4 --readers 2 --bookings 500
+"""
+import os
+import json
+import time
+import random
+import argparse
+import multiprocessing
+from datetime import date, datetime, timedelta
+
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from common import make_app, appointment_rows, seed_appointments, DOCTORS
+
+from app import create_app
+from database import db, Appointment
+from services.availability_service import load_booked_masks
+
+START_DELAY_SECONDS = 2.0
+
+
+def create_worker_app(db_path, performance_mode):
+    return create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{db_path}",
+        "SQLITE_PERFORMANCE_MODE": performance_mode,
+    })
+
+
+def writer(worker_id, db_path, performance_mode, bookings, start_at, results):
+    app = create_worker_app(db_path, performance_mode)
+    rng = random.Random(worker_id)
+    booked = conflicts = locked = 0
+    template = next(appointment_rows(1))
+    with app.app_context():
+        time.sleep(max(0.0, start_at - time.time()))
+        for _ in range(bookings):
+            appointment_time = datetime.combine(date.today(), datetime.min.time()) + timedelta(
+                days=rng.randrange(1, 60), hours=rng.randrange(8, 18), minutes=rng.randrange(60))
+            doctor = rng.choice(DOCTORS)
+            try:
+                taken = db.session.query(Appointment.id).filter(
+                    Appointment.preferred_doctor == doctor,
+                    Appointment.appointment_time == appointment_time,
+                ).first()
+                if taken:
+                    conflicts += 1
+                    db.session.rollback()
+                    continue
+                db.session.add(Appointment(**dict(template, preferred_doctor=doctor, appointment_time=appointment_time)))
+                db.session.commit()
+                booked += 1
+            except IntegrityError:
+                # Another writer claimed the slot between the check and the insert
+                db.session.rollback()
+                conflicts += 1
+            except OperationalError as e:
+                db.session.rollback()
+                if "locked" not in str(e):
+                    raise
+                locked += 1
+    results.put({"booked": booked, "conflicts": conflicts, "locked": locked, "finished_at": time.time()})
+
+
+def reader(worker_id, db_path, performance_mode, start_at, stop, results):
+    app = create_worker_app(db_path, performance_mode)
+    reads = locked = 0
+    with app.app_context():
+        time.sleep(max(0.0, start_at - time.time()))
+        while not stop.is_set():
+            start = date.today() + timedelta(days=reads % 60)
+            try:
+                load_booked_masks(start, start + timedelta(days=7), DOCTORS)
+                db.session.rollback()
+                reads += 1
+            except OperationalError as e:
+                db.session.rollback()
+                if "locked" not in str(e):
+                    raise
+                locked += 1
+    results.put({"reads": reads, "locked": locked})
+
+
+def run_mode(performance_mode, writers, readers, bookings, seed_rows):
+    app, db_path = make_app()
+    with app.app_context():
+        seed_appointments(seed_rows)
+        db.engine.dispose()
+
+    context = multiprocessing.get_context("spawn")
+    results, stop = context.Queue(), context.Event()
+    start_at = time.time() + START_DELAY_SECONDS
+    writer_processes = [
+        context.Process(target=writer, args=(i, db_path, performance_mode, bookings, start_at, results))
+        for i in range(writers)
+    ]
+    reader_processes = [
+        context.Process(target=reader, args=(i, db_path, performance_mode, start_at, stop, results))
+        for i in range(readers)
+    ]
+    for process in writer_processes + reader_processes:
+        process.start()
+    try:
+        # Readers only report after stop is set, so the first results are the writers'
+        writer_results = [results.get() for _ in writer_processes]
+        stop.set()
+        reader_results = [results.get() for _ in reader_processes]
+        for process in writer_processes + reader_processes:
+            process.join()
+    finally:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+
+    elapsed = max(r["finished_at"] for r in writer_results) - start_at
+    booked = sum(r["booked"] for r in writer_results)
+    return {
+        "performance_mode": performance_mode,
+        "writers": writers,
+        "readers": readers,
+        "attempted": writers * bookings,
+        "booked": booked,
+        "write_locked_errors": sum(r["locked"] for r in writer_results),
+        "read_locked_errors": sum(r["locked"] for r in reader_results),
+        "reads": sum(r["reads"] for r in reader_results),
+        "elapsed_seconds": round(elapsed, 3),
+        "bookings_per_second": round(booked / elapsed, 1),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--writers", type=int, default=4, help="Writer processes")
+    parser.add_argument("--readers", type=int, default=2, help="Availability reader processes")
+    parser.add_argument("--bookings", type=int, default=500, help="Bookings attempted per writer")
+    parser.add_argument("--seed-rows", type=int, default=10_000, help="Appointments in the table before the run")
+    args = parser.parse_args()
+    for mode in (False, True):
+        print(json.dumps(run_mode(mode, args.writers, args.readers, args.bookings, args.seed_rows)))
@@ -0,0 +1,125 @@
+import os
+import sys
+import time
+import random
+import tempfile
+from datetime import datetime, date, timedelta
+
+# Make app modules available
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+
+from sqlalchemy import insert
+
+from app import create_app
+from config import engine_options
+from database import db, Appointment
+from services.registry import service_registry
+from services.sms_service import SmsService
+from services.email_service import EmailService
+from services.gemini_service import GeminiService
+from services.gcal_service import GoogleCalendarService
+from services.fakes import FakeGenerativeModel, FakeCalendarApi, FakeSendGridClient, FakeTwilioClient
+
+DOCTORS = ["Dr. Smith", "Dr. Lee", "Dr. Patel"]
+SEED_CHUNK_SIZE = 10_000
+
+
+def make_app(db_path=None, database_url=None, **config):
+    """
+    Create an app bound to a throwaway SQLite database, or to `database_url`, with the
+    schema created. `db_path` is None for non-SQLite databases.
+    """
+    if database_url is None:
+        if db_path is None:
+            fd, db_path = tempfile.mkstemp(prefix="caresync-bench-", suffix=".db")
+            os.close(fd)
+        database_url = f"sqlite:///{db_path}"
+    overrides = {"SQLALCHEMY_DATABASE_URI": database_url, "SQLALCHEMY_ENGINE_OPTIONS": engine_options(database_url)}
+    overrides.update(config)
+    app = create_app(overrides)
+    with app.app_context():
+        db.create_all()
+    return app, db_path
+
+
+def register_fake_services(latency=0.0):
+    """Replace Gemini, Calendar, SendGrid and Twilio with local fakes taking `latency` seconds per call."""
+    service_registry.register("gemini", lambda: GeminiService(model=FakeGenerativeModel(latency=latency)))
+    service_registry.register("calendar", lambda: GoogleCalendarService(service=FakeCalendarApi(latency=latency)))
+    service_registry.register("email", lambda: EmailService(
+        client=FakeSendGridClient(latency=latency),
+        templates_folder=os.path.join(ROOT, "email-templates"),
+        from_email="bench@example.com",
+    ))
+    service_registry.register("sms", lambda: SmsService(
+        client=FakeTwilioClient(latency=latency), from_phone="+15550000000", rate_per_second=1e9, burst=1e9,
+    ))
+
+
+def appointment_rows(count, start_date=None, days=365, seed=42):
+    """
+    Yield synthetic appointment rows spread over `days` days for all doctors. Every
+    (doctor, time) is unique, as the active-slot index requires.
+    """
+    slots_per_doctor = days * 10
+    if -(-count // len(DOCTORS)) > slots_per_doctor:
+        raise ValueError(f"{count} appointments do not fit in {days} days of hourly slots")
+    rng = random.Random(seed)
+    start_date = start_date or date.today() - timedelta(days=days // 2)
+    start = datetime.combine(start_date, datetime.min.time())
+    created_at = datetime.utcnow()
+    taken = set()
+    for i in range(count):
+        doctor = DOCTORS[i % len(DOCTORS)]
+        while True:
+            slot = rng.randrange(slots_per_doctor)
+            if (doctor, slot) not in taken:
+                taken.add((doctor, slot))
+                break
+        appointment_time = start + timedelta(days=slot // 10, hours=8 + slot % 10)
+        yield {
+            "patient_name": f"Patient {i}",
+            "patient_email": f"patient{i}@example.com",
+            "patient_phone": f"+2519{i:08d}",
+            "date_of_birth": datetime(1970 + i % 40, 1 + i % 12, 1 + i % 28),
+            "preferred_doctor": doctor,
+            "symptoms": "Persistent headache and mild fever for three days.",
+            "summary": "Three days of headache with mild fever; no known allergies.",
+            "medical_history": "None",
+            "appointment_time": appointment_time,
+            "reminder_sent": False,
+            "created_at": created_at,
+        }
+
+
+def seed_appointments(count, **kwargs):
+    """Bulk insert `count` synthetic appointments in chunks (requires an app context)."""
+    chunk = []
+    for row in appointment_rows(count, **kwargs):
+        chunk.append(row)
+        if len(chunk) >= SEED_CHUNK_SIZE:
+            db.session.execute(insert(Appointment), chunk)
+            chunk = []
+    if chunk:
+        db.session.execute(insert(Appointment), chunk)
+    db.session.commit()
+
+
+def time_call(func, *args, repeat=200, **kwargs):
+    """Return per-call latencies in milliseconds for `repeat` calls of `func`."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(*args, **kwargs)
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def summarize(samples):
+    ordered = sorted(samples)
+    return {
+        "p50_ms": round(ordered[len(ordered) // 2], 4),
+        "p99_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))], 4),
+        "mean_ms": round(sum(ordered) / len(ordered), 4),
+    }
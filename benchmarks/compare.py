@@ -0,0 +1,69 @@
+"""
+Compare two bench_endpoints.py result files, e.g. the base and head of a change.
+Exits with status 1 when any endpoint's p50 or p99 latency rises, or its throughput
+drops, by more than --threshold percent, or when it runs more SQL queries per request.
+Timings vary between runs of the same commit; compare two runs of the base first to
+pick a threshold above that noise.
+
+    python benchmarks/compare.py benchmarks/results/base.json benchmarks/results/head.json --threshold 10
+"""
+import sys
+import json
+import argparse
+
+# Run settings that make two result files incomparable when they differ
+COMPARABLE_SETTINGS = ("database", "requests", "fake_latency", "workers", "threads", "concurrency", "cpus")
+# Metric, whether higher is better
+METRICS = (("p50_ms", False), ("p99_ms", False), ("throughput_rps", True))
+
+
+def load(path):
+    with open(path) as f:
+        report = json.load(f)
+    return report["meta"], {(row["scale"], row["mode"], row["endpoint"]): row for row in report["results"]}
+
+
+def change(base, head):
+    return (head - base) / base * 100 if base else 0.0
+
+
+def compare(base_rows, head_rows, threshold):
+    """Yield (key, {metric: (base, head, percent)}, regressed) for the runs present in both files."""
+    for key in sorted(base_rows.keys() & head_rows.keys()):
+        base, head = base_rows[key], head_rows[key]
+        deltas = {metric: (base[metric], head[metric], change(base[metric], head[metric])) for metric, _ in METRICS}
+        regressed = any(
+            (-deltas[metric][2] if higher_is_better else deltas[metric][2]) > threshold
+            for metric, higher_is_better in METRICS
+        ) or head["errors"] > base["errors"] or head.get("queries_per_request", 0) > base.get("queries_per_request", 0)
+        yield key, deltas, regressed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--threshold", type=float, default=10, help="Allowed slowdown in percent")
+    args = parser.parse_args()
+
+    base_meta, base_rows = load(args.base)
+    head_meta, head_rows = load(args.head)
+    for setting in COMPARABLE_SETTINGS:
+        if base_meta.get(setting) != head_meta.get(setting):
+            print(f"warning: {setting} differs ({base_meta.get(setting)} vs {head_meta.get(setting)})", file=sys.stderr)
+    for key in sorted(base_rows.keys() ^ head_rows.keys()):
+        print(f"warning: {'/'.join(map(str, key))} is only in one of the files", file=sys.stderr)
+
+    print(f"{base_meta.get('commit')} -> {head_meta.get('commit')}, threshold {args.threshold}%")
+    print(f"{'scale':>8} {'mode':<9} {'endpoint':<22}" + "".join(f" {metric:>26}" for metric, _ in METRICS) + "  queries")
+    regressions = 0
+    for (scale, mode, endpoint), deltas, regressed in compare(base_rows, head_rows, args.threshold):
+        cells = "".join(f" {base:>9.2f} -> {head:>9.2f} {percent:+4.0f}%" for base, head, percent in deltas.values())
+        queries = head_rows[scale, mode, endpoint].get("queries_per_request")
+        if queries is not None:
+            cells += f"  {base_rows[scale, mode, endpoint]['queries_per_request']} -> {queries}"
+        print(f"{scale:>8} {mode:<9} {endpoint:<22}{cells}{'  REGRESSION' if regressed else ''}")
+        regressions += regressed
+    if regressions:
+        print(f"{regressions} regression(s) above {args.threshold}%")
+    sys.exit(1 if regressions else 0)
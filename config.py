@@ -2,6 +2,30 @@ import os
 
 basedir = os.path.abspath(os.path.dirname(__file__))
 
+
+def engine_options(database_url: str) -> dict:
+    """
+    SQLAlchemy engine options for `database_url` from the DB_* environment variables.
+    Pool sizing, recycling and pre-ping only apply to server databases; SQLite keeps the defaults.
+    """
+    if database_url.startswith("sqlite"):
+        return {}
+
+    options = {
+        # Per process: keep pool_size >= gunicorn threads so requests don't queue for a connection
+        "pool_size": int(os.getenv('DB_POOL_SIZE', 5)),
+        "max_overflow": int(os.getenv('DB_MAX_OVERFLOW', 10)),
+        "pool_timeout": float(os.getenv('DB_POOL_TIMEOUT', 30)),
+        # Recycle before server/proxy idle timeouts close connections under us
+        "pool_recycle": int(os.getenv('DB_POOL_RECYCLE', 1800)),
+        "pool_pre_ping": os.getenv('DB_POOL_PRE_PING', 'true').lower() == 'true',
+    }
+    statement_timeout_ms = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', 0))
+    if statement_timeout_ms and database_url.startswith("postgres"):
+        options["connect_args"] = {"options": f"-c statement_timeout={statement_timeout_ms}"}
+    return options
+
+
 class Config:
     SQLALCHEMY_DATABASE_URI = os.getenv(
             "DATABASE_URL",
@@ -9,12 +33,79 @@ class Config:
         )
 
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
+
+    # Optional read replica for read-only endpoints (see database.read_only)
+    DATABASE_REPLICA_URL = os.getenv('DATABASE_REPLICA_URL')
+    SQLALCHEMY_BINDS = (
+        {"replica": {"url": DATABASE_REPLICA_URL, **engine_options(DATABASE_REPLICA_URL)}}
+        if DATABASE_REPLICA_URL else {}
+    )
+
+    # Opt-in WAL journal and pragmas for SQLite deployments (see database.configure_sqlite)
+    SQLITE_PERFORMANCE_MODE = os.getenv('SQLITE_PERFORMANCE_MODE', 'false').lower() == 'true'
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 5000))
+    SQLITE_CACHE_SIZE_KB = int(os.getenv('SQLITE_CACHE_SIZE_KB', 65536))
+    SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', 268435456))
+
+    # Seconds between checks for doctor schedule changes made by other processes
+    SCHEDULE_REFRESH_SECONDS = float(os.getenv('SCHEDULE_REFRESH_SECONDS', 60))
+
+    # Process-local (doctor, date) occupancy cache. A 30-day auto-assign search reads
+    # doctors x 30 entries, so keep the size well above that (16384 fits 200 doctors)
+    OCCUPANCY_CACHE_SIZE = int(os.getenv('OCCUPANCY_CACHE_SIZE', 16384))
+    OCCUPANCY_CACHE_TTL = float(os.getenv('OCCUPANCY_CACHE_TTL', 30))
+
+    # Background threads per process for async bookings (POST /api/appointments?async=true)
+    BOOKING_PIPELINE_WORKERS = int(os.getenv('BOOKING_PIPELINE_WORKERS', 4))
+    # "thread" runs side effects in-process, "queue" hands them to scripts/worker.py
+    BOOKING_PIPELINE_BACKEND = os.getenv('BOOKING_PIPELINE_BACKEND', 'thread')
+    # Bookings still pending after this many minutes with no job running them are marked failed
+    BOOKING_PENDING_TIMEOUT_MINUTES = float(os.getenv('BOOKING_PENDING_TIMEOUT_MINUTES', 15))
+
+    # Reminder dispatch: concurrent sends and appointments flagged per UPDATE
+    REMINDER_CONCURRENCY = int(os.getenv('REMINDER_CONCURRENCY', 8))
+    REMINDER_BATCH_SIZE = int(os.getenv('REMINDER_BATCH_SIZE', 200))
+    # Comma separated reminder channels: email, sms (needs the Twilio settings)
+    REMINDER_CHANNELS = tuple(channel.strip() for channel in os.getenv('REMINDER_CHANNELS', 'email').split(',') if channel.strip())
+    # Text a confirmation after each booking, next to the confirmation email. Texts that fail
+    # or wait too long for the rate limiter are retried by scripts/worker.py with the queue backend only
+    SMS_CONFIRMATIONS = os.getenv('SMS_CONFIRMATIONS', 'false').lower() == 'true'
+    # Concurrent Twilio requests; the sending rate itself is capped by SMS_RATE_PER_SECOND
+    SMS_CONCURRENCY = int(os.getenv('SMS_CONCURRENCY', 4))
     
     GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
+    # Symptom summary cache: memory, database, tiered (memory + database) or none
+    SUMMARY_CACHE_BACKEND = os.getenv('SUMMARY_CACHE_BACKEND', 'memory').lower()
+    SUMMARY_CACHE_TTL = float(os.getenv('SUMMARY_CACHE_TTL', 86400))
+    SUMMARY_CACHE_SIZE = int(os.getenv('SUMMARY_CACHE_SIZE', 10000))
     
     TWILIO_ACCOUNT_SID = os.getenv('TWILIO_ACCOUNT_SID')
     TWILIO_AUTH_TOKEN = os.getenv('TWILIO_AUTH_TOKEN')
-    TWILIO_PHONE_NUMBER = os.getenv('TWILIO_PHONE_NUMBER')
+    TWILIO_PHONE_NUMBER = os.getenv('TWILIO_PHONE_NUMBER') or os.getenv('TWILIO_FROM_PHONE')
+    # Messages per second the sender accepts (1 for a long code) and the burst allowed on top
+    SMS_RATE_PER_SECOND = float(os.getenv('SMS_RATE_PER_SECOND', 1))
+    SMS_BURST = float(os.getenv('SMS_BURST', 1))
+    # Where that budget is tracked: database (shared by every gunicorn worker, the job worker and
+    # scripts) or memory (per process, so N processes together send up to N x SMS_RATE_PER_SECOND)
+    SMS_RATE_LIMITER = os.getenv('SMS_RATE_LIMITER', 'database').lower()
+    # A send waiting longer than this for the rate limiter is skipped and retried on the next run
+    SMS_MAX_WAIT_SECONDS = float(os.getenv('SMS_MAX_WAIT_SECONDS', 60))
+    SMS_MAX_RETRIES = int(os.getenv('SMS_MAX_RETRIES', 2))
+
+    # Request, SQL and external API timings exposed in Prometheus text format on METRICS_PATH
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+    METRICS_PATH = os.getenv('METRICS_PATH', '/metrics')
+
+    # SQL profiler: "off", "header" (requests sending SQL_PROFILER_HEADER: 1) or "always".
+    # Profiled requests log repeated statements and EXPLAIN slow SELECTs.
+    SQL_PROFILER_MODE = os.getenv('SQL_PROFILER_MODE', 'off')
+    SQL_PROFILER_HEADER = os.getenv('SQL_PROFILER_HEADER', 'X-SQL-Profile')
+    SQL_PROFILER_SLOW_MS = float(os.getenv('SQL_PROFILER_SLOW_MS', 100))
+    SQL_PROFILER_REPEAT_THRESHOLD = int(os.getenv('SQL_PROFILER_REPEAT_THRESHOLD', 5))
+
+    # Build Gemini/Calendar/SendGrid/Twilio clients in create_app instead of on first use
+    SERVICES_WARM_UP = os.getenv('SERVICES_WARM_UP', 'false').lower() == 'true'
 
     GOOGLE_CREDENTIALS_PATH = os.getenv('GOOGLE_CREDENTIALS_PATH')
     GOOGLE_CALENDAR_ID = os.getenv('GOOGLE_CALENDAR_ID')
\ No newline at end of file
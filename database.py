@@ -1,18 +1,130 @@
 import pytz
+import threading
+from enum import Enum
+from functools import wraps
 from datetime import datetime
+from contextvars import ContextVar
 from marshmallow import fields
 
 from flask_marshmallow import Marshmallow
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
 
-from sqlalchemy import Index, PrimaryKeyConstraint
+from sqlalchemy import Index, PrimaryKeyConstraint, UniqueConstraint, ForeignKey, event, text
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy.sql.sqltypes import Integer, String, Text, DateTime, Boolean
+from sqlalchemy.sql.sqltypes import Integer, String, Text, Date, DateTime, Boolean, Float
 
 
-db = SQLAlchemy()
+REPLICA_BIND = "replica"
+_replica_reads = ContextVar("replica_reads", default=False)
+
+
+class RoutingSession(Session):
+    """Session that sends queries to the read replica inside read_only() views; writes always use the primary."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and _replica_reads.get() and not self._flushing:
+            replica = self._db.engines.get(REPLICA_BIND)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def read_only(func):
+    """Route the wrapped view's queries to the read replica when DATABASE_REPLICA_URL is set."""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        token = _replica_reads.set(True)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _replica_reads.reset(token)
+    return wrapper
+
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 ma= Marshmallow()
 
+_pool_counters = {}
+_pool_counters_lock = threading.Lock()
+
+
+def track_pool(name: str, engine):
+    """Count new connections, checkouts and invalidations on `engine`'s pool for pool_metrics()."""
+    counters = _pool_counters.setdefault(name, {"connects": 0, "checkouts": 0, "invalidations": 0})
+
+    def count(key):
+        def listener(*args):
+            with _pool_counters_lock:
+                counters[key] += 1
+        return listener
+
+    event.listen(engine, "connect", count("connects"))
+    event.listen(engine, "checkout", count("checkouts"))
+    event.listen(engine, "invalidate", count("invalidations"))
+
+
+def configure_sqlite(engine, busy_timeout_ms: int = 5000, cache_size_kb: int = 65536, mmap_size: int = 268435456):
+    """
+    Apply the SQLite performance pragmas to every new connection of `engine`. WAL lets
+    readers run alongside a writer, busy_timeout makes writers wait for the lock instead
+    of failing with "database is locked", and synchronous=NORMAL is durable under WAL
+    except for the last transactions on power loss.
+    """
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+        # A negative cache_size is in KiB rather than pages
+        cursor.execute(f"PRAGMA cache_size=-{int(cache_size_kb)}")
+        cursor.execute(f"PRAGMA mmap_size={int(mmap_size)}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.close()
+
+
+def pool_metrics() -> dict:
+    """Current pool usage and lifetime counters for the primary and replica engines."""
+    metrics = {}
+    for bind_key, engine in db.engines.items():
+        name = bind_key or "primary"
+        pool = engine.pool
+        status = {"pool": type(pool).__name__}
+        for attribute in ("size", "checkedin", "checkedout", "overflow"):
+            if hasattr(pool, attribute):
+                status[attribute] = getattr(pool, attribute)()
+        with _pool_counters_lock:
+            status.update(_pool_counters.get(name, {}))
+        metrics[name] = status
+    return metrics
+
+class BookingStatus(Enum):
+    PENDING = 'pending'
+    CONFIRMED = 'confirmed'
+    FAILED = 'failed'
+    CANCELLED = 'cancelled'
+
+# Appointments in these states no longer occupy their slot
+INACTIVE_BOOKING_STATUSES = (BookingStatus.FAILED.value, BookingStatus.CANCELLED.value)
+ACTIVE_SLOT_CONDITION = text("booking_status NOT IN ('failed', 'cancelled')")
+SLOT_CONSTRAINT = "uq_appointment_active_slot"
+PENDING_CONDITION = text("booking_status = 'pending'")
+
+def is_slot_conflict(error) -> bool:
+    """True if an IntegrityError was raised by the active-slot unique index."""
+    message = str(getattr(error, "orig", error))
+    # PostgreSQL names the index; SQLite names the columns
+    return SLOT_CONSTRAINT in message or "appointments.preferred_doctor, appointments.appointment_time" in message
+
+
+class JobStatus(Enum):
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+
+
 class Appointment(db.Model):
     """
     Appointment table to store patient appointments and reminders.
@@ -21,6 +133,19 @@ class Appointment(db.Model):
     __table_args__ = (
         PrimaryKeyConstraint("id", name="pk_appointment"),
         Index("idx_appointment_id", "id"),
+        Index("idx_appointment_doctor_time", "preferred_doctor", "appointment_time"),
+        Index("idx_appointment_time_id", "appointment_time", "id"),
+        Index("idx_appointment_gcal_event_id", "google_calendar_event_id"),
+        # Small: only in-flight bookings, scanned by the stale pending booking sweep
+        Index(
+            "idx_appointment_pending_created", "created_at",
+            sqlite_where=PENDING_CONDITION, postgresql_where=PENDING_CONDITION,
+        ),
+        # At most one active booking per doctor and time; failed and cancelled ones free the slot
+        Index(
+            SLOT_CONSTRAINT, "preferred_doctor", "appointment_time", unique=True,
+            sqlite_where=ACTIVE_SLOT_CONDITION, postgresql_where=ACTIVE_SLOT_CONDITION,
+        ),
     )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
@@ -39,10 +164,136 @@ class Appointment(db.Model):
     summary: Mapped[str] = mapped_column(Text, nullable=True)
     appointment_time: Mapped[datetime] = mapped_column(DateTime, nullable=False)
     google_calendar_event_id: Mapped[str] = mapped_column(String(100), nullable=True)
-    reminder_sent: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+    reminder_sent: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)  # Every reminder channel done
+    email_reminder_sent_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+    sms_reminder_sent_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+    sms_confirmation_sent_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+    booking_status: Mapped[str] = mapped_column(String(20), default=BookingStatus.CONFIRMED.value, server_default=BookingStatus.CONFIRMED.value, nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(pytz.utc), nullable=False)
 
 
+class Doctor(db.Model):
+    """
+    A bookable doctor. Weekly hours live in doctor_schedules and days off in schedule_exceptions.
+    """
+    __tablename__ = "doctors"
+    __table_args__ = (
+        PrimaryKeyConstraint("id", name="pk_doctor"),
+        UniqueConstraint("name", name="uq_doctor_name"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    name: Mapped[str] = mapped_column(String(100), nullable=False)  # Matches Appointment.preferred_doctor
+    slot_minutes: Mapped[int] = mapped_column(Integer, default=60, nullable=False)
+    active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+
+class DoctorSchedule(db.Model):
+    """
+    One block of weekly working hours, in minutes since midnight: [start_minute, end_minute).
+    """
+    __tablename__ = "doctor_schedules"
+    __table_args__ = (
+        PrimaryKeyConstraint("id", name="pk_doctor_schedule"),
+        Index("idx_doctor_schedule_doctor", "doctor_id"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    doctor_id: Mapped[int] = mapped_column(Integer, ForeignKey("doctors.id", ondelete="CASCADE"), nullable=False)
+    weekday: Mapped[int] = mapped_column(Integer, nullable=False)  # 0 = Monday
+    start_minute: Mapped[int] = mapped_column(Integer, nullable=False)
+    end_minute: Mapped[int] = mapped_column(Integer, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+
+class ScheduleException(db.Model):
+    """
+    Time off for one doctor, or a clinic-wide holiday when doctor_id is NULL.
+    NULL start/end minutes close the whole day.
+    """
+    __tablename__ = "schedule_exceptions"
+    __table_args__ = (
+        PrimaryKeyConstraint("id", name="pk_schedule_exception"),
+        Index("idx_schedule_exception_day", "day"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    doctor_id: Mapped[int] = mapped_column(Integer, ForeignKey("doctors.id", ondelete="CASCADE"), nullable=True)
+    day: Mapped[datetime] = mapped_column(Date, nullable=False)
+    start_minute: Mapped[int] = mapped_column(Integer, nullable=True)
+    end_minute: Mapped[int] = mapped_column(Integer, nullable=True)
+    reason: Mapped[str] = mapped_column(String(200), nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+
+class Job(db.Model):
+    """
+    Durable background job (bookings, reminders, SMS confirmations, calendar deletes and syncs) consumed by scripts/worker.py.
+    """
+    __tablename__ = "jobs"
+    __table_args__ = (
+        PrimaryKeyConstraint("id", name="pk_job"),
+        Index("idx_job_status_run_at", "status", "run_at"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    kind: Mapped[str] = mapped_column(String(50), nullable=False)
+    payload: Mapped[str] = mapped_column(Text, nullable=False)  # JSON encoded
+    status: Mapped[str] = mapped_column(String(20), default=JobStatus.QUEUED.value, nullable=False)
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    max_attempts: Mapped[int] = mapped_column(Integer, default=5, nullable=False)
+    run_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    locked_by: Mapped[str] = mapped_column(String(100), nullable=True)
+    locked_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+    last_error: Mapped[str] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+
+class SummaryCacheEntry(db.Model):
+    """
+    Persistent cache of Gemini symptom summaries keyed by a hash of the normalized prompt inputs.
+    """
+    __tablename__ = "summary_cache"
+    __table_args__ = (
+        PrimaryKeyConstraint("key_hash", name="pk_summary_cache"),
+    )
+
+    key_hash: Mapped[str] = mapped_column(String(64), primary_key=True)
+    summary: Mapped[str] = mapped_column(Text, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+
+class RateLimitBucket(db.Model):
+    """
+    Token bucket state shared by every process, e.g. the SMS sending budget of one sender number.
+    """
+    __tablename__ = "rate_limit_buckets"
+    __table_args__ = (
+        PrimaryKeyConstraint("name", name="pk_rate_limit_bucket"),
+    )
+
+    name: Mapped[str] = mapped_column(String(100), primary_key=True)
+    tokens: Mapped[float] = mapped_column(Float, nullable=False)
+    updated_at: Mapped[float] = mapped_column(Float, nullable=False)  # Unix time of the last refill
+
+
+class CalendarSyncState(db.Model):
+    """
+    Last Google Calendar sync token per calendar, so each sync only pulls changes since the previous one.
+    """
+    __tablename__ = "calendar_sync_state"
+    __table_args__ = (
+        PrimaryKeyConstraint("calendar_id", name="pk_calendar_sync_state"),
+    )
+
+    calendar_id: Mapped[str] = mapped_column(String(255), primary_key=True)
+    sync_token: Mapped[str] = mapped_column(Text, nullable=True)
+    last_synced_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+    last_full_sync_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+
+
 class AppointmentSchema(ma.Schema):
     id = fields.Int(dump_only=True)
     patient_name = fields.Str(required=True)
@@ -61,6 +312,7 @@ class AppointmentSchema(ma.Schema):
     appointment_time = fields.DateTime(required=False)
     google_calendar_event_id = fields.Str(dump_only=True, allow_none=True)
     reminder_sent = fields.Bool(dump_only=True)
+    booking_status = fields.Str(dump_only=True)
     created_at = fields.DateTime(dump_only=True)
 
     # <-- Add these optional fields for frontend requests
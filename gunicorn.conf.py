@@ -0,0 +1,21 @@
+import os
+from pathlib import Path
+from dotenv import load_dotenv
+
+load_dotenv(dotenv_path=Path.cwd().joinpath(".env"))
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:4100")
+workers = int(os.getenv("GUNICORN_WORKERS", 2))
+threads = int(os.getenv("GUNICORN_THREADS", 4))
+worker_class = "gthread"
+keepalive = 5
+
+
+def post_worker_init(worker):
+    """
+    Build each worker's own external service clients before it serves traffic. Runs
+    once the worker has loaded the app, which the clients take their config from.
+    """
+    from services.registry import service_registry
+    service_registry.reset()
+    service_registry.warm_up()
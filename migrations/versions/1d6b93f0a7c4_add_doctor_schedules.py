@@ -0,0 +1,86 @@
+"""Add doctors, doctor_schedules and schedule_exceptions tables
+
+Revision ID: 1d6b93f0a7c4
+Revises: c81f5e2b7d90
+Create Date: 2026-10-18 20:11:48.260377
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1d6b93f0a7c4'
+down_revision = 'c81f5e2b7d90'
+branch_labels = None
+depends_on = None
+
+# The schedule previously hard-coded as DOCTOR_SLOTS: hourly 8:00-18:00 every day
+DEFAULT_DOCTORS = ("Dr. Smith", "Dr. Lee", "Dr. Patel")
+
+
+def upgrade():
+    doctors = op.create_table('doctors',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('slot_minutes', sa.Integer(), nullable=False),
+    sa.Column('active', sa.Boolean(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id', name='pk_doctor'),
+    sa.UniqueConstraint('name', name='uq_doctor_name')
+    )
+    schedules = op.create_table('doctor_schedules',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('doctor_id', sa.Integer(), nullable=False),
+    sa.Column('weekday', sa.Integer(), nullable=False),
+    sa.Column('start_minute', sa.Integer(), nullable=False),
+    sa.Column('end_minute', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['doctor_id'], ['doctors.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id', name='pk_doctor_schedule')
+    )
+    with op.batch_alter_table('doctor_schedules', schema=None) as batch_op:
+        batch_op.create_index('idx_doctor_schedule_doctor', ['doctor_id'], unique=False)
+
+    op.create_table('schedule_exceptions',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('doctor_id', sa.Integer(), nullable=True),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('start_minute', sa.Integer(), nullable=True),
+    sa.Column('end_minute', sa.Integer(), nullable=True),
+    sa.Column('reason', sa.String(length=200), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['doctor_id'], ['doctors.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id', name='pk_schedule_exception')
+    )
+    with op.batch_alter_table('schedule_exceptions', schema=None) as batch_op:
+        batch_op.create_index('idx_schedule_exception_day', ['day'], unique=False)
+
+    now = datetime.utcnow()
+    # Ids come from the table's sequence, so later inserts on PostgreSQL don't collide with them
+    op.bulk_insert(doctors, [
+        {"name": name, "slot_minutes": 60, "active": True, "updated_at": now}
+        for name in DEFAULT_DOCTORS
+    ])
+    doctor_ids = op.get_bind().execute(
+        sa.select(doctors.c.id).where(doctors.c.name.in_(DEFAULT_DOCTORS))
+    ).scalars().all()
+    op.bulk_insert(schedules, [
+        {"doctor_id": doctor_id, "weekday": weekday, "start_minute": 8 * 60, "end_minute": 18 * 60, "updated_at": now}
+        for doctor_id in doctor_ids
+        for weekday in range(7)
+    ])
+
+
+def downgrade():
+    with op.batch_alter_table('schedule_exceptions', schema=None) as batch_op:
+        batch_op.drop_index('idx_schedule_exception_day')
+
+    op.drop_table('schedule_exceptions')
+    with op.batch_alter_table('doctor_schedules', schema=None) as batch_op:
+        batch_op.drop_index('idx_doctor_schedule_doctor')
+
+    op.drop_table('doctor_schedules')
+    op.drop_table('doctors')
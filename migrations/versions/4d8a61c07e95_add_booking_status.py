@@ -0,0 +1,26 @@
+"""Add booking_status to appointments
+
+Revision ID: 4d8a61c07e95
+Revises: b3f0d52e8a47
+Create Date: 2026-10-18 13:41:05.262871
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4d8a61c07e95'
+down_revision = 'b3f0d52e8a47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('appointments', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('booking_status', sa.String(length=20), server_default='confirmed', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('appointments', schema=None) as batch_op:
+        batch_op.drop_column('booking_status')
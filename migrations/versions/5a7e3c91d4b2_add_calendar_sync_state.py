@@ -0,0 +1,35 @@
+"""Add calendar_sync_state table and event id index
+
+Revision ID: 5a7e3c91d4b2
+Revises: 9f3b7d2c6a15
+Create Date: 2026-10-18 18:02:37.418220
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5a7e3c91d4b2'
+down_revision = '9f3b7d2c6a15'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('calendar_sync_state',
+    sa.Column('calendar_id', sa.String(length=255), nullable=False),
+    sa.Column('sync_token', sa.Text(), nullable=True),
+    sa.Column('last_synced_at', sa.DateTime(), nullable=True),
+    sa.Column('last_full_sync_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('calendar_id', name='pk_calendar_sync_state')
+    )
+    with op.batch_alter_table('appointments', schema=None) as batch_op:
+        batch_op.create_index('idx_appointment_gcal_event_id', ['google_calendar_event_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('appointments', schema=None) as batch_op:
+        batch_op.drop_index('idx_appointment_gcal_event_id')
+
+    op.drop_table('calendar_sync_state')
@@ -0,0 +1,30 @@
+"""Add per-channel notification timestamps to appointments
+
+Revision ID: 6e4f2a8c1b57
+Revises: 1d6b93f0a7c4
+Create Date: 2026-10-18 21:02:37.418260
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6e4f2a8c1b57'
+down_revision = '1d6b93f0a7c4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('appointments', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('email_reminder_sent_at', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('sms_reminder_sent_at', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('sms_confirmation_sent_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('appointments', schema=None) as batch_op:
+        batch_op.drop_column('sms_confirmation_sent_at')
+        batch_op.drop_column('sms_reminder_sent_at')
+        batch_op.drop_column('email_reminder_sent_at')
@@ -0,0 +1,26 @@
+"""Add composite (preferred_doctor, appointment_time) index
+
+Revision ID: 7c1e4b9a2f31
+Revises: 25ead5c5320c
+Create Date: 2026-10-18 09:12:40.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c1e4b9a2f31'
+down_revision = '25ead5c5320c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('appointments', schema=None) as batch_op:
+        batch_op.create_index('idx_appointment_doctor_time', ['preferred_doctor', 'appointment_time'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('appointments', schema=None) as batch_op:
+        batch_op.drop_index('idx_appointment_doctor_time')
@@ -0,0 +1,29 @@
+"""Add summary_cache table
+
+Revision ID: 9f3b7d2c6a15
+Revises: e2a9c4f61b08
+Create Date: 2026-10-18 17:08:12.661047
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9f3b7d2c6a15'
+down_revision = 'e2a9c4f61b08'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('summary_cache',
+    sa.Column('key_hash', sa.String(length=64), nullable=False),
+    sa.Column('summary', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('key_hash', name='pk_summary_cache')
+    )
+
+
+def downgrade():
+    op.drop_table('summary_cache')
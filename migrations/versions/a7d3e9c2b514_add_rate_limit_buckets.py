@@ -0,0 +1,29 @@
+"""Add rate_limit_buckets table
+
+Revision ID: a7d3e9c2b514
+Revises: f4c2d8a9e613
+Create Date: 2026-10-18 21:40:12.583104
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7d3e9c2b514'
+down_revision = 'f4c2d8a9e613'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('rate_limit_buckets',
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('tokens', sa.Float(), nullable=False),
+    sa.Column('updated_at', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('name', name='pk_rate_limit_bucket')
+    )
+
+
+def downgrade():
+    op.drop_table('rate_limit_buckets')
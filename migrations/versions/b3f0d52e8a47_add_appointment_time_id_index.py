@@ -0,0 +1,26 @@
+"""Add (appointment_time, id) index for keyset pagination
+
+Revision ID: b3f0d52e8a47
+Revises: 7c1e4b9a2f31
+Create Date: 2026-10-18 11:03:27.540913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3f0d52e8a47'
+down_revision = '7c1e4b9a2f31'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('appointments', schema=None) as batch_op:
+        batch_op.create_index('idx_appointment_time_id', ['appointment_time', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('appointments', schema=None) as batch_op:
+        batch_op.drop_index('idx_appointment_time_id')
@@ -0,0 +1,42 @@
+"""Add partial unique index on active (preferred_doctor, appointment_time)
+
+Revision ID: c81f5e2b7d90
+Revises: 5a7e3c91d4b2
+Create Date: 2026-10-18 19:24:05.903512
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c81f5e2b7d90'
+down_revision = '5a7e3c91d4b2'
+branch_labels = None
+depends_on = None
+
+ACTIVE_SLOT_CONDITION = sa.text("booking_status NOT IN ('failed', 'cancelled')")
+
+
+def upgrade():
+    duplicates = op.get_bind().execute(sa.text(
+        "SELECT preferred_doctor, appointment_time, COUNT(*) FROM appointments "
+        "WHERE booking_status NOT IN ('failed', 'cancelled') "
+        "GROUP BY preferred_doctor, appointment_time HAVING COUNT(*) > 1"
+    )).fetchall()
+    if duplicates:
+        raise RuntimeError(
+            f"{len(duplicates)} slots are double-booked, e.g. {tuple(duplicates[0][:2])}. "
+            "Cancel the extra appointments before applying this migration."
+        )
+
+    with op.batch_alter_table('appointments', schema=None) as batch_op:
+        batch_op.create_index(
+            'uq_appointment_active_slot', ['preferred_doctor', 'appointment_time'], unique=True,
+            sqlite_where=ACTIVE_SLOT_CONDITION, postgresql_where=ACTIVE_SLOT_CONDITION
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('appointments', schema=None) as batch_op:
+        batch_op.drop_index('uq_appointment_active_slot')
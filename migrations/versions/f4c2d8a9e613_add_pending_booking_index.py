@@ -0,0 +1,31 @@
+"""Add partial index on pending appointments' created_at
+
+Revision ID: f4c2d8a9e613
+Revises: 6e4f2a8c1b57
+Create Date: 2026-10-18 21:05:41.318206
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4c2d8a9e613'
+down_revision = '6e4f2a8c1b57'
+branch_labels = None
+depends_on = None
+
+PENDING_CONDITION = sa.text("booking_status = 'pending'")
+
+
+def upgrade():
+    with op.batch_alter_table('appointments', schema=None) as batch_op:
+        batch_op.create_index(
+            'idx_appointment_pending_created', ['created_at'],
+            sqlite_where=PENDING_CONDITION, postgresql_where=PENDING_CONDITION
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('appointments', schema=None) as batch_op:
+        batch_op.drop_index('idx_appointment_pending_created')
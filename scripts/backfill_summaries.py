@@ -0,0 +1,84 @@
+import sys
+import os
+import time
+import logging
+import argparse
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Make app modules available
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import select, update, or_
+
+from app import create_app
+from database import db, Appointment
+from services.fakes import FakeGenerativeModel
+from services.gemini_service import GeminiService, FALLBACK_SUMMARY, PATIENT_FIELDS
+
+
+def stale_appointments(after_id, chunk_size, regenerate_all):
+    """Next chunk of appointments needing a summary, in id order (keyset, so updates don't disturb it)."""
+    statement = select(Appointment.id, *(getattr(Appointment, field) for field in PATIENT_FIELDS)).where(
+        Appointment.id > after_id
+    )
+    if not regenerate_all:
+        statement = statement.where(or_(Appointment.summary.is_(None), Appointment.summary == FALLBACK_SUMMARY))
+    return db.session.execute(statement.order_by(Appointment.id).limit(chunk_size)).all()
+
+
+def backfill_summaries(gemini_service, chunk_size=200, batch_size=10, concurrency=4, regenerate_all=False, limit=None):
+    """Summarize appointments with a NULL or fallback summary (or all with regenerate_all) and bulk update them."""
+    started = time.perf_counter()
+    processed = updated = 0
+    last_id = 0
+    while limit is None or processed < limit:
+        rows = stale_appointments(last_id, chunk_size if limit is None else min(chunk_size, limit - processed), regenerate_all)
+        if not rows:
+            break
+        last_id = rows[-1].id
+        patients = [{field: getattr(row, field) for field in PATIENT_FIELDS} for row in rows]
+        summaries = gemini_service.summarize_batch(patients, batch_size=batch_size, max_concurrency=concurrency)
+
+        changes = [
+            {"id": row.id, "summary": summary}
+            for row, summary in zip(rows, summaries)
+            if summary and summary != FALLBACK_SUMMARY
+        ]
+        if changes:
+            # ORM bulk UPDATE by primary key: one executemany per chunk
+            db.session.execute(update(Appointment), changes)
+        db.session.commit()
+        processed += len(rows)
+        updated += len(changes)
+        logger.info(f"Processed {processed} appointments, updated {updated}.")
+
+    duration = time.perf_counter() - started
+    logger.info(f"Backfill finished: {updated}/{processed} summaries written in {duration:.1f}s.")
+    return {"processed": processed, "updated": updated, "duration_seconds": round(duration, 3)}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Generate missing or stale appointment summaries in bulk.")
+    parser.add_argument("--all", action="store_true", help="Regenerate every summary, e.g. after a prompt change")
+    parser.add_argument("--chunk-size", type=int, default=200, help="Appointments fetched and updated per transaction")
+    parser.add_argument("--batch-size", type=int, default=10, help="Patients packed into each model request")
+    parser.add_argument("--concurrency", type=int, default=4, help="Model requests in flight at once")
+    parser.add_argument("--limit", type=int, help="Stop after this many appointments")
+    parser.add_argument("--fake-model", action="store_true", help="Use a local fake model instead of Gemini")
+    parser.add_argument("--fake-latency", type=float, default=0.0, help="Seconds of latency per fake model call")
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        model = FakeGenerativeModel(latency=args.fake_latency) if args.fake_model else None
+        backfill_summaries(
+            GeminiService(model=model),
+            chunk_size=args.chunk_size,
+            batch_size=args.batch_size,
+            concurrency=args.concurrency,
+            regenerate_all=args.all,
+            limit=args.limit,
+        )
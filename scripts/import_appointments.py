@@ -0,0 +1,89 @@
+import sys
+import os
+import csv
+import json
+import logging
+import argparse
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Make app modules available
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app
+from services.appointment_import import import_appointments, IMPORT_CHUNK_SIZE, SIDE_EFFECTS
+
+
+def read_records(path):
+    """Yield appointment dicts from a CSV, NDJSON or JSON array file (the export formats)."""
+    with open(path, newline="", encoding="utf-8") as file:
+        if path.endswith(".csv"):
+            for row in csv.DictReader(file):
+                # Empty CSV cells are missing values, as written by the export
+                yield {key: value for key, value in row.items() if value != ""}
+        elif path.endswith(".json"):
+            yield from json.load(file)
+        else:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def batches(records, size):
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Bulk import appointments from a CSV, NDJSON or JSON file.")
+    parser.add_argument("path", help="File to import; the format follows the extension (.csv, .json, otherwise NDJSON)")
+    parser.add_argument("--side-effects", choices=SIDE_EFFECTS, default="none",
+                        help="none: store only; calendar: also create calendar events; pipeline: queue the full booking pipeline")
+    parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE, help="Rows inserted per transaction")
+    parser.add_argument("--batch-size", type=int, default=20_000, help="Rows read and validated at once")
+    parser.add_argument("--skip-schedule-check", action="store_true", help="Accept times outside the doctors' current schedules")
+    parser.add_argument("--dry-run", action="store_true", help="Validate and check conflicts without writing anything")
+    parser.add_argument("--errors", help="Write per-row errors to this NDJSON file")
+    args = parser.parse_args()
+
+    app = create_app()
+    totals = {"received": 0, "imported": 0, "failed": 0, "duration_seconds": 0.0}
+    error_file = open(args.errors, "w", encoding="utf-8") if args.errors else None
+    try:
+        with app.app_context():
+            offset = 0
+            for batch in batches(read_records(args.path), args.batch_size):
+                result = import_appointments(
+                    batch,
+                    side_effects=args.side_effects,
+                    chunk_size=args.chunk_size,
+                    check_schedule=not args.skip_schedule_check,
+                    dry_run=args.dry_run,
+                )
+                for key in totals:
+                    totals[key] += result[key]
+                for error in result["errors"]:
+                    # Report rows by their position in the file (0-based)
+                    error = dict(error, row=offset + error["row"])
+                    if error_file:
+                        error_file.write(json.dumps(error) + "\n")
+                    else:
+                        logger.warning(f"Row {error['row']}: {error['errors']}")
+                offset += len(batch)
+    finally:
+        if error_file:
+            error_file.close()
+
+    rate = totals["received"] / totals["duration_seconds"] if totals["duration_seconds"] else 0
+    logger.info(
+        f"{'Validated' if args.dry_run else 'Imported'} {totals['received'] - totals['failed']} of {totals['received']} "
+        f"rows in {totals['duration_seconds']:.1f}s ({rate:.0f} rows/s), {totals['failed']} failed."
+    )
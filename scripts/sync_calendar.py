@@ -0,0 +1,31 @@
+import sys
+import os
+import logging
+import argparse
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Make app modules available
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app
+from services.job_queue import enqueue
+from services.calendar_sync import sync_calendar
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Apply Google Calendar changes since the last sync to appointments.")
+    parser.add_argument("--full", action="store_true", help="Ignore the stored sync token and re-read the whole calendar")
+    parser.add_argument("--page-size", type=int, default=250, help="Events fetched per Calendar API request")
+    parser.add_argument("--queue", action="store_true", help="Enqueue a calendar.sync job instead of syncing inline")
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        if args.queue:
+            job = enqueue("calendar.sync", {"full": args.full})
+            logger.info(f"Queued calendar sync as job {job.id}")
+        else:
+            sync_calendar(full=args.full, page_size=args.page_size)
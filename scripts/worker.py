@@ -0,0 +1,41 @@
+import sys
+import os
+import signal
+import logging
+import argparse
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Make app modules available
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app
+from services.job_queue import Worker
+from services.booking_pipeline import expire_stale_bookings
+import services.job_handlers  # noqa: F401  (registers job handlers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Consume background jobs from the jobs table.")
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("WORKER_CONCURRENCY", 4)),
+                        help="Number of concurrent consumer threads")
+    parser.add_argument("--poll-interval", type=float, default=1.0,
+                        help="Seconds to wait when the queue is empty")
+    parser.add_argument("--kinds", nargs="*", help="Only consume these job kinds")
+    args = parser.parse_args()
+
+    app = create_app()
+
+    def expire_bookings():
+        expire_stale_bookings(app.config["BOOKING_PENDING_TIMEOUT_MINUTES"])
+
+    worker = Worker(app, concurrency=args.concurrency, poll_interval=args.poll_interval, kinds=args.kinds,
+                    maintenance=[expire_bookings])
+    signal.signal(signal.SIGTERM, lambda *_: worker.stop())
+    worker.run()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,235 @@
+"""
+Bulk import of appointments, e.g. a new clinic's history. Rows are validated with
+AppointmentSchema, checked against existing bookings by slot and
+inserted with executemany in chunks, skipping the per-booking Gemini call,
+calendar event and email unless side effects are asked for.
+"""
+import time
+import logging
+from zoneinfo import ZoneInfo
+from datetime import datetime
+from marshmallow import EXCLUDE, ValidationError
+from sqlalchemy import insert, update, select, tuple_
+from sqlalchemy.exc import IntegrityError
+
+from database import db, is_slot_conflict, Appointment, AppointmentSchema, BookingStatus, Doctor, INACTIVE_BOOKING_STATUSES
+from services.job_queue import enqueue_many
+from services.registry import service_registry
+from services.occupancy_cache import occupancy_cache
+from services.availability_service import AvailabilityService
+from services.booking_pipeline import CLINIC_TIMEZONE, calendar_event
+from services.doctor_schedule import slot_to_minutes
+
+logger = logging.getLogger(__name__)
+
+IMPORT_CHUNK_SIZE = 1000
+# Slots looked up per query when checking for existing bookings (two bound parameters each)
+TAKEN_SLOTS_QUERY_SIZE = 400
+# Re-check and retry a chunk this often when concurrent bookings take its slots
+CONFLICT_RETRIES = 3
+
+# "none": rows are stored confirmed, nothing else happens
+# "calendar": rows are stored confirmed and get calendar events created in batches
+# "pipeline": rows are stored pending and a booking.process job is queued for each one
+SIDE_EFFECTS = ("none", "calendar", "pipeline")
+
+# Unknown and dump-only keys (id, booking_status, ...) are dropped, so export output can be re-imported
+import_schema = AppointmentSchema(many=True, unknown=EXCLUDE)
+
+_availability = AvailabilityService()
+_table = Appointment.__table__
+_columns = set(_table.columns.keys())
+
+
+def resolve_appointment_time(row: dict):
+    """appointment_time, or appointment_date + time_slot; naive clinic-local time. Raises ValueError."""
+    appointment_time = row.pop("appointment_time", None)
+    appointment_date, time_slot = row.pop("appointment_date", None), row.pop("time_slot", None)
+    if appointment_time is None:
+        if not (appointment_date and time_slot):
+            raise ValueError("Give appointment_time or both appointment_date and time_slot.")
+        minutes = slot_to_minutes(time_slot)
+        appointment_time = datetime(appointment_date.year, appointment_date.month, appointment_date.day, minutes // 60, minutes % 60)
+    if appointment_time.tzinfo is not None:
+        appointment_time = appointment_time.astimezone(ZoneInfo(CLINIC_TIMEZONE)).replace(tzinfo=None)
+    return appointment_time
+
+
+def find_taken_slots(rows) -> set:
+    """
+    (doctor, appointment_time) pairs of `rows` already held by active appointments.
+    Only the rows' own slots are looked up, TAKEN_SLOTS_QUERY_SIZE per query, so a
+    batch spanning years does not load every booking in between.
+    """
+    slots = list(dict.fromkeys((row["preferred_doctor"], row["appointment_time"]) for row in rows))
+    taken = set()
+    for offset in range(0, len(slots), TAKEN_SLOTS_QUERY_SIZE):
+        existing = db.session.execute(
+            select(Appointment.preferred_doctor, Appointment.appointment_time).where(
+                tuple_(Appointment.preferred_doctor, Appointment.appointment_time).in_(
+                    slots[offset:offset + TAKEN_SLOTS_QUERY_SIZE]
+                ),
+                Appointment.booking_status.notin_(INACTIVE_BOOKING_STATUSES),
+            )
+        )
+        taken.update((doctor, appointment_time) for doctor, appointment_time in existing)
+    return taken
+
+
+def validate_rows(records: list, check_schedule: bool = True):
+    """
+    Validate `records` and resolve their slots. Returns (rows, errors): rows are
+    (index, values) ready for insert, errors are {"row", "errors"} dicts. Without
+    `check_schedule` any doctor in the doctors table is accepted, inactive or not,
+    so history of former doctors can be imported.
+    """
+    if not isinstance(records, list):
+        raise ValueError("Expected a list of appointments")
+    try:
+        loaded, messages = import_schema.load(records), {}
+    except ValidationError as e:
+        loaded, messages = e.valid_data, e.messages
+
+    known_doctors = set(_availability.doctors())
+    if not check_schedule:
+        known_doctors.update(db.session.scalars(select(Doctor.name)))
+
+    errors = {}
+    rows = []
+    seen = set()
+    for index, row in enumerate(loaded):
+        if index in messages:
+            errors[index] = messages[index]
+            continue
+        doctor = row.get("preferred_doctor")
+        try:
+            row["appointment_time"] = resolve_appointment_time(row)
+        except ValueError as e:
+            errors[index] = {"appointment_time": [str(e)]}
+            continue
+        if not doctor or doctor not in known_doctors:
+            errors[index] = {"preferred_doctor": [f"Unknown doctor. Available doctors: {_availability.doctors()}"]}
+            continue
+        if check_schedule and not _availability.is_bookable(doctor, row["appointment_time"]):
+            errors[index] = {"appointment_time": [f"Not one of {doctor}'s slots."]}
+            continue
+        key = (doctor, row["appointment_time"])
+        if key in seen:
+            errors[index] = {"appointment_time": ["Duplicate of an earlier row in this import."]}
+            continue
+        seen.add(key)
+        rows.append((index, {field: value for field, value in row.items() if field in _columns}))
+
+    return rows, [{"row": index, "errors": errors[index]} for index in sorted(errors)]
+
+
+def insert_chunk(chunk: list, booking_status: str):
+    """
+    Insert one chunk in the current transaction. Rows whose slot was claimed
+    concurrently are dropped and the chunk retried. Returns (inserted [(index, id, values)], conflicting indexes).
+    """
+    created_at = datetime.utcnow()
+    conflicts = []
+    for _ in range(CONFLICT_RETRIES):
+        try:
+            # Core insert skips the ORM bulk machinery. Ids are matched back by slot, which is
+            # unique; asking for them in parameter order would make SQLite insert row by row
+            returned = db.session.execute(
+                insert(_table).returning(_table.c.id, _table.c.preferred_doctor, _table.c.appointment_time),
+                [dict(values, booking_status=booking_status, reminder_sent=False, created_at=created_at)
+                 for _, values in chunk],
+            )
+            ids = {(doctor, appointment_time): appointment_id for appointment_id, doctor, appointment_time in returned}
+            return [
+                (index, ids[values["preferred_doctor"], values["appointment_time"]], values) for index, values in chunk
+            ], conflicts
+        except IntegrityError as e:
+            db.session.rollback()
+            if not is_slot_conflict(e):
+                raise
+            taken = find_taken_slots([values for _, values in chunk])
+            conflicts += [index for index, values in chunk if (values["preferred_doctor"], values["appointment_time"]) in taken]
+            chunk = [(index, values) for index, values in chunk if (values["preferred_doctor"], values["appointment_time"]) not in taken]
+            if not chunk:
+                return [], conflicts
+    raise RuntimeError("Slots kept being claimed concurrently during import")
+
+
+def create_calendar_events(inserted: list) -> dict:
+    """Create the chunk's calendar events in batches and store their ids. Returns {row index: error}."""
+    results = service_registry.calendar.create_events_batch([
+        calendar_event(
+            patient_name=values["patient_name"],
+            patient_phone=values["patient_phone"],
+            patient_email=values["patient_email"],
+            doctor=values["preferred_doctor"],
+            appointment_time=values["appointment_time"],
+            summary=values.get("summary") or values["symptoms"],
+        )
+        for _, _, values in inserted
+    ])
+    changes = [
+        {"id": appointment_id, "google_calendar_event_id": result["event_id"]}
+        for (_, appointment_id, _), result in zip(inserted, results)
+        if result["event_id"]
+    ]
+    if changes:
+        db.session.execute(update(Appointment), changes)
+    return {index: result["error"] for (index, _, _), result in zip(inserted, results) if not result["event_id"]}
+
+
+def import_appointments(records: list, side_effects: str = "none", chunk_size: int = IMPORT_CHUNK_SIZE,
+                        check_schedule: bool = True, dry_run: bool = False) -> dict:
+    """
+    Import `records` (dicts in the AppointmentSchema format). Valid rows are stored,
+    invalid or conflicting ones are reported per row by their index in `records`.
+    Each chunk is committed on its own. Must run inside an app context.
+    """
+    if side_effects not in SIDE_EFFECTS:
+        raise ValueError(f"side_effects must be one of {SIDE_EFFECTS}")
+    started = time.perf_counter()
+    rows, errors = validate_rows(records, check_schedule=check_schedule)
+
+    taken = find_taken_slots([values for _, values in rows])
+    if taken:
+        errors += [
+            {"row": index, "errors": {"appointment_time": ["Time slot already booked."]}}
+            for index, values in rows if (values["preferred_doctor"], values["appointment_time"]) in taken
+        ]
+        rows = [(index, values) for index, values in rows if (values["preferred_doctor"], values["appointment_time"]) not in taken]
+
+    imported = 0
+    if not dry_run:
+        booking_status = BookingStatus.PENDING.value if side_effects == "pipeline" else BookingStatus.CONFIRMED.value
+        for offset in range(0, len(rows), chunk_size):
+            inserted, conflicts = insert_chunk(rows[offset:offset + chunk_size], booking_status)
+            errors += [
+                {"row": index, "errors": {"appointment_time": ["Time slot already booked."]}} for index in conflicts
+            ]
+            if side_effects == "pipeline" and inserted:
+                # Queued in the chunk's transaction, so every pending row gets processed
+                enqueue_many("booking.process", [{"appointment_id": appointment_id} for _, appointment_id, _ in inserted])
+            db.session.commit()
+
+            imported += len(inserted)
+            for _, _, values in inserted:
+                occupancy_cache.mark_booked(values["preferred_doctor"], values["appointment_time"])
+            if side_effects == "calendar" and inserted:
+                # After the commit, so the write lock is not held during the HTTP batches
+                for index, error in create_calendar_events(inserted).items():
+                    errors.append({"row": index, "errors": {"google_calendar_event_id": [f"Imported, but the calendar event failed: {error}"]}})
+                db.session.commit()
+            logger.info(f"Imported {imported}/{len(rows)} appointments.")
+
+    duration = time.perf_counter() - started
+    errors.sort(key=lambda error: error["row"])
+    logger.info(f"Import finished: {imported} of {len(records)} rows stored, {len(errors)} errors in {duration:.2f}s.")
+    return {
+        "received": len(records),
+        "valid": len(rows),
+        "imported": imported,
+        "failed": len(records) - (len(rows) if dry_run else imported),
+        "dry_run": dry_run,
+        "duration_seconds": round(duration, 3),
+        "errors": errors,
+    }
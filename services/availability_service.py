@@ -0,0 +1,122 @@
+import logging
+from datetime import datetime, time, date, timedelta
+
+from database import db, Appointment, INACTIVE_BOOKING_STATUSES
+from services.doctor_schedule import (
+    ScheduleStore, schedule_store, schedules_from_slots, minutes_to_slot, mask_to_minutes,
+)
+
+logger = logging.getLogger(__name__)
+
+SEARCH_WINDOW_DAYS = 30
+MAX_CALENDAR_DAYS = 62
+
+
+def minute_of_day(value) -> int:
+    """Minute-of-day offset of a datetime or time, i.e. its bit in an occupancy mask."""
+    return value.hour * 60 + value.minute
+
+
+def load_booked_masks(start_date: date, end_date: date, doctors=None) -> dict:
+    """
+    Load every booked slot in [start_date, end_date) with a single range query.
+    Returns {(doctor, date): bitmask} where bit N is set when minute-of-day N is booked.
+    """
+    query = db.session.query(Appointment.preferred_doctor, Appointment.appointment_time).filter(
+        Appointment.appointment_time >= datetime.combine(start_date, time.min),
+        Appointment.appointment_time < datetime.combine(end_date, time.min),
+        Appointment.booking_status.notin_(INACTIVE_BOOKING_STATUSES),
+    )
+    if doctors:
+        query = query.filter(Appointment.preferred_doctor.in_(list(doctors)))
+
+    masks = {}
+    for doctor, appointment_time in query.all():
+        key = (doctor, appointment_time.date())
+        masks[key] = masks.get(key, 0) | (1 << minute_of_day(appointment_time))
+    return masks
+
+
+class AvailabilityService:
+    def __init__(self, doctor_slots: dict = None, cache=None, schedules: ScheduleStore = None):
+        """
+        `schedules` defaults to the shared schedule_store; `doctor_slots` pins a fixed
+        DOCTOR_SLOTS-style schedule instead. `cache` is an optional OccupancyCache.
+        """
+        if schedules is None:
+            schedules = ScheduleStore(schedules=schedules_from_slots(doctor_slots)) if doctor_slots else schedule_store
+        self.schedules = schedules
+        self.cache = cache
+
+    def doctors(self) -> list:
+        return self.schedules.doctors()
+
+    def get_schedule(self, doctor: str):
+        """The doctor's CompiledSchedule; raises KeyError for unknown doctors."""
+        schedule = self.schedules.get(doctor)
+        if schedule is None:
+            raise KeyError(doctor)
+        return schedule
+
+    def get_booked_masks(self, doctors, start_date: date, end_date: date) -> dict:
+        if self.cache is not None:
+            return self.cache.get_masks(doctors, start_date, end_date)
+        return load_booked_masks(start_date, end_date, doctors)
+
+    def free_mask(self, doctor: str, day: date, booked_mask: int) -> int:
+        """Minute-of-day mask of the doctor's slots on `day` that are not booked."""
+        return self.get_schedule(doctor).slot_mask(day) & ~booked_mask
+
+    def get_available_slots(self, doctor: str, day: date) -> list:
+        """Free "H:MM" slots for `doctor` on `day`, in time order."""
+        booked_mask = self.get_booked_masks([doctor], day, day + timedelta(days=1)).get((doctor, day), 0)
+        return [minutes_to_slot(minutes) for minutes in mask_to_minutes(self.free_mask(doctor, day, booked_mask))]
+
+    def is_bookable(self, doctor: str, appointment_time: datetime) -> bool:
+        """True if `appointment_time` is one of the doctor's scheduled slots (booked or not)."""
+        return self.get_schedule(doctor).has_slot(appointment_time.date(), minute_of_day(appointment_time))
+
+    def is_slot_booked(self, doctor: str, appointment_time: datetime) -> bool:
+        day = appointment_time.date()
+        booked_mask = self.get_booked_masks([doctor], day, day + timedelta(days=1)).get((doctor, day), 0)
+        return bool(booked_mask >> minute_of_day(appointment_time) & 1)
+
+    def get_availability_calendar(self, doctors, start_date: date, end_date: date) -> dict:
+        """
+        Free slots for every doctor and day in [start_date, end_date), loaded with one query.
+        Returns {doctor: {date: free minute-of-day mask}}.
+        """
+        doctors = list(doctors)
+        booked = self.get_booked_masks(doctors, start_date, end_date)
+        days = [start_date + timedelta(days=i) for i in range((end_date - start_date).days)]
+        return {
+            doctor: {day: self.free_mask(doctor, day, booked.get((doctor, day), 0)) for day in days}
+            for doctor in doctors
+        }
+
+    def calendar_slots(self, doctor: str, days) -> list:
+        """Every slot minute offset the doctor offers on any of `days`, in time order."""
+        schedule = self.get_schedule(doctor)
+        return sorted(set().union(*(schedule.slots(day) for day in days)))
+
+    def find_next_available_slot(self, start_date: date = None, doctor: str = None, max_days: int = SEARCH_WINDOW_DAYS):
+        """
+        Find the first free slot searching date first, then doctor order, then slot order.
+        All bookings in the search window are loaded in one query.
+        """
+        if not start_date:
+            start_date = date.today()
+
+        doctors_to_check = [doctor] if doctor else self.doctors()
+        schedules = [(doc, self.get_schedule(doc)) for doc in doctors_to_check]
+        booked = self.get_booked_masks(doctors_to_check, start_date, start_date + timedelta(days=max_days))
+
+        for i in range(max_days):
+            current_date = start_date + timedelta(days=i)
+            for doc, schedule in schedules:
+                free = schedule.slot_mask(current_date) & ~booked.get((doc, current_date), 0)
+                if free:
+                    # Lowest set bit is the earliest free slot
+                    minutes = (free & -free).bit_length() - 1
+                    return doc, datetime.combine(current_date, time(minutes // 60, minutes % 60))
+        return None, None  # no slots available in the search window
@@ -0,0 +1,300 @@
+import time
+import logging
+import threading
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+from flask import current_app
+from sqlalchemy import select, update
+from concurrent.futures import ThreadPoolExecutor
+
+from database import db, Appointment, BookingStatus
+from services.job_queue import enqueue, active_job_payloads, utcnow
+from services.metrics import metrics
+from services.occupancy_cache import occupancy_cache
+from services.email_service import Templates
+from services.registry import service_registry
+
+logger = logging.getLogger(__name__)
+
+CLINIC_TIMEZONE = 'Africa/Addis_Ababa'
+# Seconds a booking waits for the SMS rate limiter before leaving the text to the job queue
+CONFIRMATION_SMS_MAX_WAIT = 5
+# Bad appointment data, not outages: retrying the booking would fail the same way
+PERMANENT_BOOKING_ERRORS = (ValueError, TypeError, KeyError)
+# Seconds between stale pending booking sweeps run from BookingPipeline.submit
+PENDING_SWEEP_SECONDS = 60
+
+
+def calendar_event(patient_name, patient_phone, patient_email, doctor, appointment_time, summary) -> dict:
+    """Keyword arguments for GoogleCalendarService.create_event describing one appointment."""
+    return {
+        "summary": patient_name,
+        "description": (
+            f"Symptoms Summary: {summary}\n"
+            f"Patient Phone: {patient_phone}\n"
+            f"Patient Email: {patient_email}\n"
+            f"Doctor: {doctor}"
+        ),
+        "start_time": appointment_time.replace(tzinfo=ZoneInfo(CLINIC_TIMEZONE)),
+        "duration_minutes": 60,
+        "timezone": CLINIC_TIMEZONE,
+    }
+
+
+def send_confirmation_sms(appointment_id: int, max_wait: float = None) -> bool:
+    """Text the patient their booking confirmation once; True when it has been sent."""
+    appointment = db.session.get(Appointment, appointment_id)
+    if appointment is None or appointment.booking_status != BookingStatus.CONFIRMED.value:
+        return True
+    if appointment.sms_confirmation_sent_at is not None:
+        return True
+    try:
+        sid = service_registry.sms.send_sms({
+            'template': Templates.APPOINTMENT_CONFIRMATION_SMS.value,
+            'phone_number': appointment.patient_phone,
+            'patient_name': appointment.patient_name,
+            'doctor': appointment.preferred_doctor,
+            'appointment_time': appointment.appointment_time.strftime('%Y-%m-%d %H:%M'),
+        }, max_wait=max_wait)
+    except Exception as e:
+        logger.warning(f"Confirmation SMS for appointment {appointment_id} failed: {e}")
+        return False
+    if not sid:
+        return False
+    appointment.sms_confirmation_sent_at = datetime.utcnow()
+    db.session.commit()
+    return True
+
+
+def update_pending_booking(appointment_id: int, **values) -> bool:
+    """
+    Set `values` on the appointment and commit, only if it is still pending. False
+    means it was cancelled (or expired) meanwhile, e.g. by a doctor's day cancellation.
+    """
+    result = db.session.execute(
+        update(Appointment)
+        .where(Appointment.id == appointment_id, Appointment.booking_status == BookingStatus.PENDING.value)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return bool(result.rowcount)
+
+
+def mark_booking_failed(appointment_id: int) -> bool:
+    """Mark a pending booking failed and free its slot. False if it is no longer pending."""
+    appointment = db.session.get(Appointment, appointment_id)
+    if appointment is None:
+        return False
+    doctor, appointment_time = appointment.preferred_doctor, appointment.appointment_time
+    if not update_pending_booking(appointment_id, booking_status=BookingStatus.FAILED.value):
+        return False
+    occupancy_cache.release(doctor, appointment_time)
+    return True
+
+
+def expire_stale_bookings(timeout_minutes: float) -> int:
+    """
+    Mark bookings failed that have been pending for over `timeout_minutes` with no
+    booking.process job queued or running, e.g. because the process running them died,
+    and free their slots. Returns the number of bookings expired.
+    """
+    cutoff = utcnow() - timedelta(minutes=timeout_minutes)
+    stale_ids = db.session.scalars(
+        select(Appointment.id).where(
+            Appointment.booking_status == BookingStatus.PENDING.value,
+            Appointment.created_at < cutoff,
+        )
+    ).all()
+    if not stale_ids:
+        return 0
+    queued_ids = {payload.get("appointment_id") for payload in active_job_payloads("booking.process")}
+    expired = sum(mark_booking_failed(appointment_id) for appointment_id in stale_ids if appointment_id not in queued_ids)
+    if expired:
+        logger.warning(f"Marked {expired} booking(s) pending for over {timeout_minutes} minutes as failed")
+    return expired
+
+
+def delete_calendar_event(gcal_service, event_id: str, appointment_id: int):
+    """Delete the event of a booking that did not go through, leaving it to the job queue if that fails."""
+    logger.warning(f"Deleting event {event_id} for failed appointment {appointment_id}")
+    if not gcal_service.delete_event(event_id):
+        enqueue("calendar.delete_event", {"event_id": event_id})
+
+
+def cancelled_during_booking(gcal_service, event_id: str, appointment_id: int) -> str:
+    """Undo the calendar event of a booking cancelled while its side effects ran; returns its status."""
+    logger.warning(f"Appointment {appointment_id} was cancelled while being booked")
+    delete_calendar_event(gcal_service, event_id, appointment_id)
+    return db.session.get(Appointment, appointment_id).booking_status
+
+
+@metrics.timed("booking.process")
+def process_booking(appointment_id: int, raise_errors: bool = False) -> str:
+    """
+    Run the external side effects for a pending appointment: summarize symptoms,
+    create the calendar event and send the confirmation email. The calendar event
+    is deleted again if a later step fails or the booking is cancelled meanwhile;
+    every status change is conditional on the booking still being pending.
+    Must run inside an app context.
+    With `raise_errors` (job queue), failures other than PERMANENT_BOOKING_ERRORS are
+    re-raised and the booking stays pending for the retry; otherwise it is marked failed.
+    Returns the final booking status.
+    """
+    appointment = db.session.get(Appointment, appointment_id)
+    if appointment is None:
+        logger.warning(f"Appointment {appointment_id} no longer exists, skipping booking pipeline.")
+        return None
+    if appointment.booking_status != BookingStatus.PENDING.value:
+        return appointment.booking_status
+
+    gcal_service = None
+    event_id = None
+    try:
+        gemini_service = service_registry.gemini
+        gcal_service = service_registry.calendar
+        email_service = service_registry.email
+
+        summary = appointment.summary or gemini_service.summarize_symptoms(
+            symptoms=appointment.symptoms,
+            known_allergies=appointment.known_allergies,
+            current_medication=appointment.current_medication,
+            medical_history=appointment.medical_history,
+            additional_note=appointment.additional_note
+        )
+
+        event_id = gcal_service.create_event(**calendar_event(
+            patient_name=appointment.patient_name,
+            patient_phone=appointment.patient_phone,
+            patient_email=appointment.patient_email,
+            doctor=appointment.preferred_doctor,
+            appointment_time=appointment.appointment_time,
+            summary=summary,
+        ))
+        if not event_id:
+            raise RuntimeError("Failed to create calendar event")
+
+        email_context = {
+            'patient_name': appointment.patient_name,
+            'appointment_time': appointment.appointment_time.strftime('%Y-%m-%d %H:%M %Z'),
+            'doctor': appointment.preferred_doctor,
+            'description': summary,
+            'clinic_name': 'CareSync',
+        }
+        patient_name, patient_email = appointment.patient_name, appointment.patient_email
+
+        # Recorded before the email so a cancellation from here on deletes the event itself
+        if not update_pending_booking(appointment_id, google_calendar_event_id=event_id):
+            return cancelled_during_booking(gcal_service, event_id, appointment_id)
+
+        email_sent = email_service.send_email(
+            template=Templates.APPOINTMENT_CONFIRMATION.value,
+            subject=f'Appointment Confirmation: {patient_name}',
+            body_context=email_context,
+            to_email=patient_email,
+        )
+        if not email_sent:
+            raise RuntimeError(f"Failed to send email to {patient_email}")
+
+        if not update_pending_booking(appointment_id, summary=summary, booking_status=BookingStatus.CONFIRMED.value):
+            return cancelled_during_booking(gcal_service, event_id, appointment_id)
+        appointment = db.session.get(Appointment, appointment_id)
+        logger.info(f"Appointment {appointment_id} confirmed.")
+
+    except Exception as e:
+        logger.warning(f"Booking pipeline failed for appointment {appointment_id}: {e}")
+        db.session.rollback()
+        if event_id:
+            delete_calendar_event(gcal_service, event_id, appointment_id)
+            db.session.execute(
+                update(Appointment)
+                .where(Appointment.id == appointment_id, Appointment.google_calendar_event_id == event_id)
+                .values(google_calendar_event_id=None)
+                .execution_options(synchronize_session=False)
+            )
+            db.session.commit()
+        if raise_errors and not isinstance(e, PERMANENT_BOOKING_ERRORS):
+            raise
+        mark_booking_failed(appointment_id)
+        appointment = db.session.get(Appointment, appointment_id)
+
+    # Best effort: the booking stands without the text. Only the queue backend guarantees
+    # a running worker (scripts/worker.py) to retry it
+    if appointment.booking_status == BookingStatus.CONFIRMED.value and current_app.config.get("SMS_CONFIRMATIONS"):
+        if not send_confirmation_sms(appointment_id, max_wait=CONFIRMATION_SMS_MAX_WAIT):
+            if current_app.config.get("BOOKING_PIPELINE_BACKEND") == "queue":
+                enqueue("sms.confirmation", {"appointment_id": appointment_id})
+            else:
+                logger.warning(f"Confirmation SMS for appointment {appointment_id} not sent; not retried with the thread backend")
+
+    return appointment.booking_status
+
+
+class BookingPipeline:
+    """
+    Runs process_booking for pending appointments, either on an in-process thread
+    pool ("thread" backend) or through the durable job queue ("queue" backend).
+    """
+
+    def __init__(self, max_workers: int = 4, backend: str = "thread", pending_timeout_minutes: float = 15):
+        self.max_workers = max_workers
+        self.backend = backend
+        self.pending_timeout_minutes = pending_timeout_minutes
+        self.app = None
+        self._executor = None
+        self._lock = threading.Lock()
+        self._swept_at = None
+
+    def init_app(self, app):
+        self.app = app
+        self.max_workers = app.config.get("BOOKING_PIPELINE_WORKERS", self.max_workers)
+        self.backend = app.config.get("BOOKING_PIPELINE_BACKEND", self.backend)
+        self.pending_timeout_minutes = app.config.get("BOOKING_PENDING_TIMEOUT_MINUTES", self.pending_timeout_minutes)
+        self._swept_at = None
+
+    def _get_executor(self):
+        # Created lazily so every forked gunicorn worker gets its own threads
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="booking")
+            return self._executor
+
+    def _run(self, appointment_id):
+        with self.app.app_context():
+            try:
+                return process_booking(appointment_id)
+            except Exception as e:
+                logger.error(f"Unexpected error processing appointment {appointment_id}: {e}")
+                raise
+
+    def _sweep(self):
+        with self.app.app_context():
+            try:
+                expire_stale_bookings(self.pending_timeout_minutes)
+            except Exception as e:
+                logger.error(f"Failed to expire stale pending bookings: {e}")
+                db.session.rollback()
+
+    def maybe_sweep(self):
+        """
+        Expire bookings left pending by a process that died while running them, at most
+        every PENDING_SWEEP_SECONDS, in the background. Called for synchronous and async
+        bookings alike; with the queue backend the worker's reaper sweeps instead.
+        """
+        if self.backend == "queue":
+            return None
+        now = time.monotonic()
+        with self._lock:
+            if self._swept_at is not None and now - self._swept_at < PENDING_SWEEP_SECONDS:
+                return None
+            self._swept_at = now
+        return self._get_executor().submit(self._sweep)
+
+    def submit(self, appointment_id: int):
+        if self.backend == "queue":
+            return enqueue("booking.process", {"appointment_id": appointment_id})
+        self.maybe_sweep()
+        return self._get_executor().submit(self._run, appointment_id)
+
+
+booking_pipeline = BookingPipeline()
@@ -0,0 +1,156 @@
+"""
+Incremental Google Calendar -> appointments sync. Each run pulls only the events changed
+since the stored sync token and applies cancellations and moves to the linked appointments.
+"""
+import time
+import logging
+from datetime import datetime
+from zoneinfo import ZoneInfo
+from sqlalchemy.exc import IntegrityError
+
+from database import db, is_slot_conflict, Appointment, BookingStatus, CalendarSyncState, INACTIVE_BOOKING_STATUSES
+from services.gcal_service import SyncTokenExpired
+from services.occupancy_cache import occupancy_cache
+from services.registry import service_registry
+from services.booking_pipeline import CLINIC_TIMEZONE
+from services.job_queue import utcnow
+
+logger = logging.getLogger(__name__)
+
+
+def event_start(event: dict):
+    """Naive clinic-local start time of a timed event, or None for all-day events."""
+    start = (event.get('start') or {}).get('dateTime')
+    if not start:
+        return None
+    return datetime.fromisoformat(start).astimezone(ZoneInfo(CLINIC_TIMEZONE)).replace(tzinfo=None)
+
+
+def apply_event_changes(events: list, stats: dict):
+    """
+    Apply one page of changed events to their active appointments (one indexed query per page).
+    Returns the (doctor, time) slots to release and to book once the changes are committed.
+    """
+    events_by_id = {event['id']: event for event in events if event.get('id')}
+    if not events_by_id:
+        return [], []
+
+    appointments = db.session.query(Appointment).filter(
+        Appointment.google_calendar_event_id.in_(list(events_by_id)),
+        Appointment.booking_status.notin_(INACTIVE_BOOKING_STATUSES),
+    ).all()
+
+    released, booked = [], []
+    for appointment in appointments:
+        event = events_by_id[appointment.google_calendar_event_id]
+        if event.get('status') == 'cancelled':
+            appointment.booking_status = BookingStatus.CANCELLED.value
+            released.append((appointment.preferred_doctor, appointment.appointment_time))
+            stats["cancelled"] += 1
+            continue
+
+        start = event_start(event)
+        if start is not None and start != appointment.appointment_time:
+            previous_time = appointment.appointment_time
+            try:
+                with db.session.begin_nested():
+                    appointment.appointment_time = start
+                    # The reminders sent for the old time no longer apply, on any channel
+                    appointment.reminder_sent = False
+                    appointment.email_reminder_sent_at = None
+                    appointment.sms_reminder_sent_at = None
+            except IntegrityError as e:
+                if not is_slot_conflict(e):
+                    raise
+                logger.warning(f"Appointment {appointment.id} moved in calendar to {start}, which is already booked; keeping {previous_time}")
+                stats["conflicts"] += 1
+                continue
+            logger.info(f"Appointment {appointment.id} moved in calendar from {previous_time} to {start}")
+            released.append((appointment.preferred_doctor, previous_time))
+            booked.append((appointment.preferred_doctor, start))
+            stats["moved"] += 1
+    return released, booked
+
+
+def update_occupancy(released: list, booked: list):
+    for doctor, appointment_time in released:
+        occupancy_cache.release(doctor, appointment_time)
+    for doctor, appointment_time in booked:
+        occupancy_cache.mark_booked(doctor, appointment_time)
+
+
+def pull_changes(calendar_service, sync_token, page_size, stats, seen_event_ids=None):
+    """Apply every page of changes since `sync_token`, committing per page. Returns the next sync token."""
+    next_sync_token = None
+    for events, page_sync_token in calendar_service.list_event_changes(sync_token, page_size):
+        stats["events"] += len(events)
+        if seen_event_ids is not None:
+            seen_event_ids.update(event['id'] for event in events if event.get('status') != 'cancelled')
+        released, booked = apply_event_changes(events, stats)
+        db.session.commit()
+        update_occupancy(released, booked)
+        next_sync_token = page_sync_token or next_sync_token
+    return next_sync_token
+
+
+def cancel_orphaned_appointments(seen_event_ids: set, created_before: datetime, stats: dict):
+    """
+    After a full sync, cancel active appointments whose event no longer exists.
+    Appointments created after the sync started are skipped since their event may postdate the listing.
+    """
+    rows = db.session.query(
+        Appointment.id, Appointment.preferred_doctor, Appointment.appointment_time, Appointment.google_calendar_event_id
+    ).filter(
+        Appointment.google_calendar_event_id.isnot(None),
+        Appointment.booking_status.notin_(INACTIVE_BOOKING_STATUSES),
+        Appointment.created_at < created_before,
+    ).yield_per(1000)
+    orphaned = [row for row in rows if row.google_calendar_event_id not in seen_event_ids]
+    if not orphaned:
+        return
+
+    db.session.query(Appointment).filter(Appointment.id.in_([row.id for row in orphaned])).update(
+        {Appointment.booking_status: BookingStatus.CANCELLED.value}, synchronize_session=False
+    )
+    db.session.commit()
+    update_occupancy([(row.preferred_doctor, row.appointment_time) for row in orphaned], [])
+    stats["cancelled"] += len(orphaned)
+    logger.info(f"Cancelled {len(orphaned)} appointments whose calendar events no longer exist.")
+
+
+def sync_calendar(calendar_service=None, full: bool = False, page_size: int = 250) -> dict:
+    """
+    Pull calendar changes since the last run into the appointments table. Falls back to a
+    full sync when there is no stored token, `full` is set, or Google expired the token.
+    """
+    calendar_service = calendar_service or service_registry.calendar
+    started = time.perf_counter()
+    started_at = utcnow()
+
+    state = db.session.get(CalendarSyncState, calendar_service.calendar_id)
+    if state is None:
+        state = CalendarSyncState(calendar_id=calendar_service.calendar_id)
+        db.session.add(state)
+    sync_token = None if full else state.sync_token
+
+    stats = {"full_sync": sync_token is None, "events": 0, "cancelled": 0, "moved": 0, "conflicts": 0}
+    seen_event_ids = set() if sync_token is None else None
+    try:
+        next_sync_token = pull_changes(calendar_service, sync_token, page_size, stats, seen_event_ids)
+    except SyncTokenExpired:
+        logger.warning("Calendar sync token expired, running a full sync.")
+        stats["full_sync"] = True
+        seen_event_ids = set()
+        next_sync_token = pull_changes(calendar_service, None, page_size, stats, seen_event_ids)
+
+    if seen_event_ids is not None:
+        cancel_orphaned_appointments(seen_event_ids, started_at, stats)
+        state.last_full_sync_at = started_at
+
+    state.sync_token = next_sync_token
+    state.last_synced_at = started_at
+    db.session.commit()
+
+    stats["duration_seconds"] = round(time.perf_counter() - started, 3)
+    logger.info(f"Calendar sync finished: {stats}")
+    return stats
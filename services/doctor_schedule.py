@@ -0,0 +1,203 @@
+"""
+Doctor schedules compiled into integer minute offsets and bitmasks. Bit N of a mask
+stands for minute-of-day N, the same encoding as the occupancy masks, so a doctor's
+free slots on a day are simply `slot_mask & ~booked_mask`.
+"""
+import time
+import logging
+import threading
+from datetime import date, timedelta
+from collections import defaultdict
+from sqlalchemy import select, func
+
+from database import db, Doctor, DoctorSchedule, ScheduleException
+
+logger = logging.getLogger(__name__)
+
+# Default schedule, used while the doctors table is empty
+DOCTOR_SLOTS = {
+    "Dr. Smith": [f"{hour}:00" for hour in range(8, 18)],  # 8AM to 5PM
+    "Dr. Lee": [f"{hour}:00" for hour in range(8, 18)],
+    "Dr. Patel": [f"{hour}:00" for hour in range(8, 18)],
+}
+
+MINUTES_PER_DAY = 24 * 60
+WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")  # index = date.weekday()
+WHOLE_DAY_MASK = (1 << MINUTES_PER_DAY) - 1
+
+
+def slot_to_minutes(slot: str) -> int:
+    """Convert an "H:MM" (or "HH:MM") slot string into its minute-of-day offset."""
+    hour, minute = slot.split(":")
+    minutes = int(hour) * 60 + int(minute)
+    if not 0 <= minutes < MINUTES_PER_DAY or not 0 <= int(minute) < 60:
+        raise ValueError(f"Invalid time of day '{slot}'")
+    return minutes
+
+
+def minutes_to_slot(minutes: int) -> str:
+    """Convert a minute-of-day offset back into the "H:MM" format used by the API."""
+    return f"{minutes // 60}:{minutes % 60:02d}"
+
+
+def range_mask(start_minute: int, end_minute: int) -> int:
+    """Mask with the bits for minutes [start_minute, end_minute) set."""
+    return ((1 << end_minute) - 1) ^ ((1 << start_minute) - 1)
+
+
+def mask_to_minutes(mask: int) -> list:
+    """Set bits of `mask` in ascending order, i.e. minute offsets in time order."""
+    minutes = []
+    while mask:
+        lowest = mask & -mask
+        minutes.append(lowest.bit_length() - 1)
+        mask ^= lowest
+    return minutes
+
+
+class CompiledSchedule:
+    """One doctor's weekly slots as per-weekday bitmasks, with date closures applied on lookup."""
+
+    __slots__ = ("name", "slot_minutes", "weekday_masks", "weekday_slots", "closed")
+
+    def __init__(self, name: str, slot_minutes: int, weekly_hours: dict, closures=()):
+        """
+        `weekly_hours` maps weekday (0 = Monday) to [(start_minute, end_minute), ...].
+        `closures` are (day, start_minute, end_minute) tuples; None bounds close the whole day.
+        """
+        self.name = name
+        self.slot_minutes = slot_minutes
+        masks = []
+        for weekday in range(7):
+            mask = 0
+            for start, end in weekly_hours.get(weekday, ()):
+                for minute in range(start, end - slot_minutes + 1, slot_minutes):
+                    mask |= 1 << minute
+            masks.append(mask)
+        self.weekday_masks = tuple(masks)
+        self.weekday_slots = tuple(tuple(mask_to_minutes(mask)) for mask in masks)
+
+        self.closed = {}
+        for day, start, end in closures:
+            if start is None or end is None:
+                blocked = WHOLE_DAY_MASK
+            else:
+                # Close every slot overlapping [start, end), not just those starting inside it
+                blocked = range_mask(max(0, start - slot_minutes + 1), end)
+            self.closed[day] = self.closed.get(day, 0) | blocked
+
+    def slot_mask(self, day: date) -> int:
+        return self.weekday_masks[day.weekday()] & ~self.closed.get(day, 0)
+
+    def slots(self, day: date):
+        """Slot minute offsets offered on `day`, in time order."""
+        if day in self.closed:
+            return tuple(mask_to_minutes(self.slot_mask(day)))
+        return self.weekday_slots[day.weekday()]
+
+    def has_slot(self, day: date, minute: int) -> bool:
+        return bool(self.slot_mask(day) >> minute & 1)
+
+
+def schedules_from_slots(doctor_slots: dict, slot_minutes: int = 60) -> dict:
+    """Compile a DOCTOR_SLOTS-style {doctor: ["H:MM", ...]} dict, offered every day of the week."""
+    schedules = {}
+    for doctor, slots in doctor_slots.items():
+        hours = [(minute, minute + slot_minutes) for minute in map(slot_to_minutes, slots)]
+        schedules[doctor] = CompiledSchedule(doctor, slot_minutes, {weekday: hours for weekday in range(7)})
+    return schedules
+
+
+# Row counts and last update of the three schedule tables; any change means a reload
+VERSION_QUERY = select(*(
+    expression
+    for model in (Doctor, DoctorSchedule, ScheduleException)
+    for expression in (
+        select(func.count()).select_from(model).scalar_subquery(),
+        select(func.max(model.updated_at)).scalar_subquery(),
+    )
+))
+
+
+class ScheduleStore:
+    """
+    Compiled schedules of every active doctor, loaded from the doctors, doctor_schedules
+    and schedule_exceptions tables, or from DOCTOR_SLOTS while no doctor exists. Writers
+    in this process call invalidate(); other processes notice changes through a cheap
+    version query run at most every `refresh_interval` seconds.
+    """
+
+    def __init__(self, refresh_interval: float = 60.0, schedules: dict = None):
+        """Passing `schedules` pins them and never touches the database."""
+        self.refresh_interval = refresh_interval
+        self._static = schedules is not None
+        self._schedules = schedules
+        self._version = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.refresh_interval = app.config.get("SCHEDULE_REFRESH_SECONDS", self.refresh_interval)
+        self.invalidate()
+
+    def invalidate(self):
+        if self._static:
+            return
+        with self._lock:
+            self._schedules = None
+            self._version = None
+
+    def _load(self) -> dict:
+        if db.session.query(Doctor.id).first() is None:
+            return schedules_from_slots(DOCTOR_SLOTS)
+
+        doctors = db.session.query(Doctor).filter(Doctor.active.is_(True)).order_by(Doctor.id).all()
+        weekly_hours = defaultdict(lambda: defaultdict(list))
+        for doctor_id, weekday, start, end in db.session.query(
+            DoctorSchedule.doctor_id, DoctorSchedule.weekday, DoctorSchedule.start_minute, DoctorSchedule.end_minute
+        ):
+            weekly_hours[doctor_id][weekday].append((start, end))
+
+        # Past exceptions no longer matter
+        closures = defaultdict(list)
+        for doctor_id, day, start, end in db.session.query(
+            ScheduleException.doctor_id, ScheduleException.day, ScheduleException.start_minute, ScheduleException.end_minute
+        ).filter(ScheduleException.day >= date.today() - timedelta(days=1)):
+            closures[doctor_id].append((day, start, end))
+
+        return {
+            doctor.name: CompiledSchedule(
+                doctor.name, doctor.slot_minutes, weekly_hours[doctor.id], closures[doctor.id] + closures[None]
+            )
+            for doctor in doctors
+        }
+
+    def _current(self) -> dict:
+        schedules = self._schedules
+        if self._static or (schedules is not None and time.monotonic() - self._checked_at < self.refresh_interval):
+            return schedules
+
+        with self._lock:
+            now = time.monotonic()
+            if self._schedules is not None and now - self._checked_at < self.refresh_interval:
+                return self._schedules
+            version = tuple(db.session.execute(VERSION_QUERY).one())
+            if self._schedules is None or version != self._version:
+                self._schedules = self._load()
+                self._version = version
+                logger.info(f"Compiled schedules for {len(self._schedules)} doctors.")
+            self._checked_at = now
+            return self._schedules
+
+    def get(self, doctor: str):
+        """The doctor's CompiledSchedule, or None for unknown or inactive doctors."""
+        return self._current().get(doctor)
+
+    def doctors(self) -> list:
+        return list(self._current())
+
+    def __contains__(self, doctor) -> bool:
+        return doctor in self._current()
+
+
+schedule_store = ScheduleStore()
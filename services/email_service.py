@@ -4,6 +4,9 @@ from enum import Enum
 from sendgrid import SendGridAPIClient
 from sendgrid.helpers.mail import Mail, From, To
 
+from services.metrics import metrics
+from services.template_engine import TemplateEngine
+
 logger = logging.getLogger(__name__)
 
 class Templates(Enum):
@@ -14,36 +17,30 @@ class Templates(Enum):
     APPOINTMENT_CONFIRMATION_SMS = 'APPOINTMENT_CONFIRMATION_SMS'
     
 class EmailService:
-    def __init__(self):
-        """Initializes the SendGrid client."""
+    def __init__(self, client=None, templates_folder: str = None, from_email: str = None):
+        """Initializes the SendGrid client. `client` replaces it, e.g. with services.fakes.FakeSendGridClient."""
         self.api_key = os.getenv('SENDGRID_API_KEY')
-        if not self.api_key:
+        if client is None and not self.api_key:
             raise ValueError("SENDGRID_API_KEY environment variable not set.")
         
-        self.templates_folder = os.getenv('EMAIL_TEMPLATES_FOLDER')
+        self.templates_folder = templates_folder or os.getenv('EMAIL_TEMPLATES_FOLDER')
         if not self.templates_folder:
             raise ValueError("EMAIL_TEMPLATES_FOLDER environment variable not set.")
         
         if not os.path.isdir(self.templates_folder):
             raise FileNotFoundError(f"Email templates folder not found at: {self.templates_folder}")
+        self.template_engine = TemplateEngine(self.templates_folder)
 
-        self.sg = SendGridAPIClient(self.api_key)
+        self.sg = client or SendGridAPIClient(self.api_key)
         self.sender_name = 'CareSync'
-        self.from_email = os.getenv('EMAIL_FROM')
+        self.from_email = from_email or os.getenv('EMAIL_FROM')
         if not self.from_email:
             raise ValueError("EMAIL_FROM environment variable not set.")
         
         logger.info("EmailService initialized successfully.")
 
     def load_template(self, template, body):
-        folder = os.getenv('EMAIL_TEMPLATES_FOLDER')
-        if not folder:
-            raise ValueError('Invalid email templates folder')
-        with open(f"{folder}/{template}") as f:
-            file = f.read()
-            for key, value in body.items():
-                file = file.replace(f"{{{key}}}", value)
-            return file
+        return self.template_engine.render(template, body)
 
     def send_email(self, to_email: str, subject: str, template: str, body_context: dict):
         if not to_email or not subject or not template:
@@ -58,7 +55,8 @@ class EmailService:
                 html_content=html_content
             )
 
-            response = self.sg.send(message)
+            with metrics.dependency("sendgrid", "send_email"):
+                response = self.sg.send(message)
             logger.info(f"Email sent to {to_email} with subject '{subject}'. Status Code: {response.status_code}")
             return response
 
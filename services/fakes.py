@@ -0,0 +1,275 @@
+"""
+Local stand-ins for external APIs, used by the CLIs' --fake flags and the benchmarks.
+Each fake can add a fixed latency to mimic network round trips.
+"""
+import re
+import json
+import time
+import uuid
+import httplib2
+import threading
+from googleapiclient.errors import HttpError
+from twilio.base.exceptions import TwilioRestException
+
+
+class FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeGenerativeModel:
+    """
+    Mimics google.generativeai.GenerativeModel.generate_content. Single-patient
+    prompts get a plain-text summary; batched prompts get the JSON array that
+    GeminiService.summarize_batch expects.
+    """
+
+    PATIENT_PATTERN = re.compile(r'^PATIENT (\d+)\nPatient Symptoms: "(.*)"$', re.MULTILINE)
+    SYMPTOMS_PATTERN = re.compile(r'^Patient Symptoms: "(.*)"$', re.MULTILINE)
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt: str, **kwargs):
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        patients = self.PATIENT_PATTERN.findall(prompt)
+        if patients:
+            return FakeResponse(json.dumps([
+                {"id": int(index), "summary": f"Patient reports {symptoms[:80]}."} for index, symptoms in patients
+            ]))
+        match = self.SYMPTOMS_PATTERN.search(prompt)
+        return FakeResponse(f"Patient reports {match.group(1)[:80] if match else 'unspecified symptoms'}.")
+
+
+def fake_http_error(status: int, message: str) -> HttpError:
+    content = json.dumps({"error": {"code": status, "message": message}}).encode()
+    return HttpError(httplib2.Response({"status": status}), content)
+
+
+class FakeRequest:
+    """A prepared call; execute() runs it like googleapiclient.http.HttpRequest."""
+
+    def __init__(self, api, call):
+        self._api = api
+        self._call = call
+
+    def execute(self):
+        self._api._round_trip()
+        return self._call()
+
+
+class FakeBatchRequest:
+    """Mimics BatchHttpRequest: every added call shares one round trip."""
+
+    def __init__(self, api, callback=None):
+        self._api = api
+        self._callback = callback
+        self._requests = []
+
+    def add(self, request, callback=None, request_id=None):
+        self._requests.append((request_id or str(len(self._requests)), request, callback or self._callback))
+
+    def execute(self):
+        self._api._round_trip()
+        for request_id, request, callback in self._requests:
+            try:
+                response, exception = request._call(), None
+            except HttpError as e:
+                response, exception = None, e
+            if callback:
+                callback(request_id, response, exception)
+
+
+class FakeEventsResource:
+    def __init__(self, api):
+        self._api = api
+
+    def insert(self, calendarId, body, **kwargs):
+        return FakeRequest(self._api, lambda: self._api.insert_event(body))
+
+    def get(self, calendarId, eventId, **kwargs):
+        return FakeRequest(self._api, lambda: self._api.get_event(eventId))
+
+    def patch(self, calendarId, eventId, body, **kwargs):
+        return FakeRequest(self._api, lambda: self._api.patch_event(eventId, body))
+
+    def delete(self, calendarId, eventId, **kwargs):
+        return FakeRequest(self._api, lambda: self._api.delete_event(eventId))
+
+    def list(self, calendarId, syncToken=None, pageToken=None, maxResults=250, showDeleted=False, **kwargs):
+        return FakeRequest(self._api, lambda: self._api.list_events(syncToken, pageToken, maxResults, showDeleted))
+
+
+class FakeCalendarApi:
+    """
+    In-memory stand-in for the Calendar v3 client returned by googleapiclient's build():
+    events insert/get/patch/delete/list (with sync tokens and paging) and batch requests.
+    Use it as GoogleCalendarService(service=FakeCalendarApi()). Deleted events are kept
+    as cancelled so incremental syncs report them, as Google does.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+        self._events = {}     # id -> event
+        self._versions = {}   # id -> change sequence number of its last modification
+        self._sequence = 0
+        self._oldest_valid_token = 0
+        self._lock = threading.Lock()
+
+    def _round_trip(self):
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def events(self):
+        return FakeEventsResource(self)
+
+    def new_batch_http_request(self, callback=None):
+        return FakeBatchRequest(self, callback)
+
+    def _touch(self, event_id):
+        self._sequence += 1
+        self._versions[event_id] = self._sequence
+
+    def insert_event(self, body: dict) -> dict:
+        with self._lock:
+            event = dict(body, id=body.get("id") or uuid.uuid4().hex, status="confirmed")
+            self._events[event["id"]] = event
+            self._touch(event["id"])
+            return dict(event)
+
+    def get_event(self, event_id: str) -> dict:
+        with self._lock:
+            event = self._events.get(event_id)
+            if event is None:
+                raise fake_http_error(404, "Not Found")
+            return dict(event)
+
+    def patch_event(self, event_id: str, body: dict) -> dict:
+        with self._lock:
+            event = self._events.get(event_id)
+            if event is None or event["status"] == "cancelled":
+                raise fake_http_error(404, "Not Found")
+            event.update(body)
+            self._touch(event_id)
+            return dict(event)
+
+    def delete_event(self, event_id: str) -> str:
+        with self._lock:
+            event = self._events.get(event_id)
+            if event is None:
+                raise fake_http_error(404, "Not Found")
+            if event["status"] == "cancelled":
+                raise fake_http_error(410, "Resource has been deleted")
+            event["status"] = "cancelled"
+            self._touch(event_id)
+            return ""
+
+    def expire_sync_tokens(self):
+        """Invalidate every issued sync token, so the next incremental list gets 410 Gone."""
+        with self._lock:
+            # Tokens issued from now on are past the cut-off and stay valid
+            self._sequence += 1
+            self._oldest_valid_token = self._sequence
+
+    def list_events(self, sync_token=None, page_token=None, max_results=250, show_deleted=False) -> dict:
+        with self._lock:
+            if page_token:
+                snapshot, after = (int(part) for part in page_token.split(":"))
+            else:
+                snapshot, after = self._sequence, 0
+                if sync_token:
+                    after = int(sync_token)
+                    if after < self._oldest_valid_token:
+                        raise fake_http_error(410, "Sync token is no longer valid, a full sync is required.")
+
+            # Pages are keyed by change sequence, so events edited while paging are never
+            # skipped: an incremental list leaves them for the next sync token, a full list
+            # returns them at the end.
+            changed = sorted(
+                (version, event_id) for event_id, version in self._versions.items()
+                if version > after
+                and (not sync_token or version <= snapshot)
+                and (sync_token or show_deleted or self._events[event_id]["status"] != "cancelled")
+            )
+            page = changed[:max_results]
+            response = {"items": [dict(self._events[event_id]) for _, event_id in page]}
+            if len(changed) > max_results:
+                response["nextPageToken"] = f"{snapshot}:{page[-1][0]}"
+            else:
+                response["nextSyncToken"] = str(max(snapshot, page[-1][0]) if page else snapshot)
+            return response
+
+
+class FakeSendGridResponse:
+    def __init__(self, status_code: int = 202):
+        self.status_code = status_code
+
+
+class FakeSendGridClient:
+    """Mimics SendGridAPIClient.send; use it as EmailService(client=FakeSendGridClient())."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.sent = 0
+        self._lock = threading.Lock()
+
+    def send(self, message):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.sent += 1
+        return FakeSendGridResponse()
+
+
+class FakeMessage:
+    def __init__(self, sid: str, to: str, body: str):
+        self.sid = sid
+        self.to = to
+        self.body = body
+
+
+class FakeMessagesResource:
+    def __init__(self, api):
+        self._api = api
+
+    def create(self, body, from_, to, **kwargs):
+        return self._api.create_message(body, from_, to)
+
+
+class FakeTwilioClient:
+    """
+    Mimics twilio.rest.Client.messages.create. Requests beyond `max_per_second`
+    within one second are rejected with HTTP 429, like Twilio's throughput limits.
+    """
+
+    def __init__(self, latency: float = 0.0, max_per_second: float = None):
+        self.latency = latency
+        self.max_per_second = max_per_second
+        self.messages = FakeMessagesResource(self)
+        self.sent = []
+        self.rejected = 0
+        self._window = []
+        self._lock = threading.Lock()
+
+    def create_message(self, body: str, from_: str, to: str) -> FakeMessage:
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            now = time.monotonic()
+            if self.max_per_second is not None:
+                self._window = [at for at in self._window if now - at < 1.0]
+                if len(self._window) >= self.max_per_second:
+                    self.rejected += 1
+                    raise TwilioRestException(429, "/Messages.json", "Too Many Requests", code=20429, method="POST")
+                self._window.append(now)
+            message = FakeMessage(f"SM{uuid.uuid4().hex}", to, body)
+            self.sent.append(message)
+        return message
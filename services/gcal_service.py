@@ -1,20 +1,44 @@
 import os
 import json
 import logging
+import httplib2
+import threading
+import google_auth_httplib2
 from datetime import datetime, timedelta
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
+from googleapiclient.http import HttpRequest
+
+from services.metrics import metrics
 
 
 logger = logging.getLogger(__name__)
 
+
+class SyncTokenExpired(Exception):
+    """Google rejected a sync token (HTTP 410 Gone); a full sync is required."""
+
+
 class GoogleCalendarService:
     SCOPES = ['https://www.googleapis.com/auth/calendar']
+    HTTP_TIMEOUT_SECONDS = 30
+    # Google Calendar accepts at most 50 calls per batch request
+    BATCH_LIMIT = 50
 
-    def __init__(self):
+    def __init__(self, service=None, calendar_id=None):
+        """`service` replaces the Calendar API client, e.g. with services.fakes.FakeCalendarApi."""
         self.creds_json_str = os.getenv('GOOGLE_CREDENTIALS_JSON')
-        self.calendar_id = os.getenv('GOOGLE_CALENDAR_ID')
+        self.calendar_id = calendar_id or os.getenv('GOOGLE_CALENDAR_ID')
+        # httplib2 is not thread-safe, so every request gets this thread's own
+        # keep-alive connection; the credentials (and their cached token) are shared.
+        self._local = threading.local()
+
+        if service is not None:
+            self.service = service
+            self.calendar_id = self.calendar_id or 'primary'
+            logger.info("GoogleCalendarService initialized with a provided API client.")
+            return
 
         if not self.creds_json_str or not self.calendar_id:
             raise ValueError("Google Calendar credentials or ID not set in environment.")
@@ -22,10 +46,15 @@ class GoogleCalendarService:
         try:
             # Load credentials from the JSON string
             creds_info = json.loads(self.creds_json_str)
-            creds = service_account.Credentials.from_service_account_info(
+            self.credentials = service_account.Credentials.from_service_account_info(
                 creds_info, scopes=self.SCOPES)
-            
-            self.service = build('calendar', 'v3', credentials=creds)
+
+            self.service = build(
+                'calendar', 'v3',
+                credentials=self.credentials,
+                requestBuilder=self._build_request,
+                cache_discovery=False
+            )
             logger.info("GoogleCalendarService initialized successfully.")
         except json.JSONDecodeError:
             logger.error("Failed to parse GOOGLE_CREDENTIALS_JSON. Please ensure it is a valid JSON string.")
@@ -34,32 +63,49 @@ class GoogleCalendarService:
             logger.error(f"Failed to initialize Google Calendar service: {e}")
             raise
 
+    def authorized_http(self):
+        """This thread's authorized keep-alive HTTP connection."""
+        http = getattr(self._local, 'http', None)
+        if http is None:
+            http = google_auth_httplib2.AuthorizedHttp(
+                self.credentials, http=httplib2.Http(timeout=self.HTTP_TIMEOUT_SECONDS))
+            self._local.http = http
+        return http
+
+    def _build_request(self, http, *args, **kwargs):
+        return HttpRequest(self.authorized_http(), *args, **kwargs)
+
+    @staticmethod
+    def build_event_body(summary: str, description: str, start_time: datetime, duration_minutes: int = 30, timezone: str = 'UTC') -> dict:
+        # Ensure start_time is timezone-aware or convert to specified timezone
+        if start_time.tzinfo is None:
+            from datetime import timezone as dt_timezone
+            start_time = start_time.replace(tzinfo=dt_timezone.utc)
+
+        end_time = start_time + timedelta(minutes=duration_minutes)
+
+        return {
+            'summary': f'Appointment: {summary}',
+            'description': description,
+            'start': {
+                'dateTime': start_time.isoformat(),
+                'timeZone': timezone,
+            },
+            'end': {
+                'dateTime': end_time.isoformat(),
+                'timeZone': timezone,
+            },
+        }
+
     def create_event(self, summary: str, description: str, start_time: datetime, duration_minutes: int = 30, timezone: str = 'UTC'):
         try:
-            # Ensure start_time is timezone-aware or convert to specified timezone
-            if start_time.tzinfo is None:
-                from datetime import timezone as dt_timezone
-                start_time = start_time.replace(tzinfo=dt_timezone.utc)
-
-            end_time = start_time + timedelta(minutes=duration_minutes)
-
-            event = {
-                'summary': f'Appointment: {summary}',
-                'description': description,
-                'start': {
-                    'dateTime': start_time.isoformat(),
-                    'timeZone': timezone,
-                },
-                'end': {
-                    'dateTime': end_time.isoformat(),
-                    'timeZone': timezone,
-                },
-            }
-
-            created_event = self.service.events().insert(
-                calendarId=self.calendar_id,
-                body=event
-            ).execute()
+            event = self.build_event_body(summary, description, start_time, duration_minutes, timezone)
+
+            with metrics.dependency("calendar", "create_event"):
+                created_event = self.service.events().insert(
+                    calendarId=self.calendar_id,
+                    body=event
+                ).execute()
             logger.info(f"Event created: {created_event.get('htmlLink')}")
             return created_event.get('id')
 
@@ -72,19 +118,115 @@ class GoogleCalendarService:
     
     def delete_event(self, event_id: str):
         try:
-            self.service.events().delete(
-                calendarId=self.calendar_id,
-                eventId=event_id
-            ).execute()
+            with metrics.dependency("calendar", "delete_event"):
+                self.service.events().delete(
+                    calendarId=self.calendar_id,
+                    eventId=event_id
+                ).execute()
             logger.info(f"Event {event_id} deleted successfully.")
             return True
         except HttpError as e:
+            if e.resp.status in (404, 410):
+                logger.info(f"Event {event_id} was already deleted.")
+                return True
             logger.error(f"HTTP error deleting Google Calendar event {event_id}: {e}")
             return False
         except Exception as e:
             logger.error(f"Unexpected error deleting Google Calendar event {event_id}: {e}")
             return False
             
+    def _execute_batch(self, requests: list, results: list, on_response):
+        """
+        Send `requests` (index, HttpRequest) in batches of BATCH_LIMIT, one HTTP round trip each.
+        `on_response(index, response, exception)` fills `results` for every item.
+        """
+        for start in range(0, len(requests), self.BATCH_LIMIT):
+            batch = self.service.new_batch_http_request(
+                callback=lambda request_id, response, exception: on_response(int(request_id), response, exception)
+            )
+            for index, request in requests[start:start + self.BATCH_LIMIT]:
+                batch.add(request, request_id=str(index))
+            try:
+                with metrics.dependency("calendar", "batch"):
+                    batch.execute()
+            except Exception as e:
+                logger.error(f"Google Calendar batch request failed: {e}")
+                for index, _ in requests[start:start + self.BATCH_LIMIT]:
+                    if results[index] is None:
+                        on_response(index, None, e)
+        return results
+
+    def create_events_batch(self, events: list) -> list:
+        """
+        Create many events using batched HTTP requests. Each item takes the create_event
+        keyword arguments. Returns one {"event_id", "error"} result per item, in order.
+        """
+        results = [None] * len(events)
+
+        def on_response(index, response, exception):
+            if exception is not None:
+                logger.error(f"Error creating Google Calendar event in batch: {exception}")
+                results[index] = {"event_id": None, "error": str(exception)}
+            else:
+                results[index] = {"event_id": response.get('id'), "error": None}
+
+        requests = [
+            (index, self.service.events().insert(calendarId=self.calendar_id, body=self.build_event_body(**event)))
+            for index, event in enumerate(events)
+        ]
+        self._execute_batch(requests, results, on_response)
+        logger.info(f"Batch created {sum(1 for r in results if r['event_id'])}/{len(events)} events.")
+        return results
+
+    def delete_events_batch(self, event_ids: list) -> list:
+        """
+        Delete many events using batched HTTP requests. Events that are already gone
+        count as deleted. Returns one {"event_id", "deleted", "error"} result per id, in order.
+        """
+        results = [None] * len(event_ids)
+
+        def on_response(index, response, exception):
+            already_gone = isinstance(exception, HttpError) and exception.resp.status in (404, 410)
+            if exception is not None and not already_gone:
+                logger.error(f"Error deleting Google Calendar event {event_ids[index]} in batch: {exception}")
+                results[index] = {"event_id": event_ids[index], "deleted": False, "error": str(exception)}
+            else:
+                results[index] = {"event_id": event_ids[index], "deleted": True, "error": None}
+
+        requests = [
+            (index, self.service.events().delete(calendarId=self.calendar_id, eventId=event_id))
+            for index, event_id in enumerate(event_ids)
+        ]
+        self._execute_batch(requests, results, on_response)
+        logger.info(f"Batch deleted {sum(1 for r in results if r['deleted'])}/{len(event_ids)} events.")
+        return results
+
+    def list_event_changes(self, sync_token: str = None, page_size: int = 250):
+        """
+        Yield (events, next_sync_token) pages of the events changed since `sync_token`,
+        cancelled ones included, or of every event when it is None. Only the last page
+        carries the next sync token. Raises SyncTokenExpired if the token is no longer valid.
+        """
+        page_token = None
+        while True:
+            params = {'calendarId': self.calendar_id, 'maxResults': page_size}
+            if sync_token:
+                params['syncToken'] = sync_token
+            if page_token:
+                params['pageToken'] = page_token
+            try:
+                with metrics.dependency("calendar", "list_event_changes"):
+                    response = self.service.events().list(**params).execute()
+            except HttpError as e:
+                if e.resp.status == 410:
+                    raise SyncTokenExpired(f"Sync token for calendar {self.calendar_id} expired.") from e
+                raise
+
+            page_token = response.get('nextPageToken')
+            yield response.get('items', []), response.get('nextSyncToken')
+            if not page_token:
+                return
+
     def list_calendars(self):
         """List all accessible calendars to verify access."""
         try:
@@ -1,39 +1,172 @@
 import os
+import json
 import google.generativeai as genai
 import logging
+from flask import current_app
+from concurrent.futures import ThreadPoolExecutor
+
+from database import db
+from services.metrics import metrics
+from services.summary_cache import build_summary_cache, summary_cache_key
 
 logger = logging.getLogger(__name__)
 
+MODEL_NAME = 'gemini-2.5-flash'
+# Bump when the prompt changes so cached summaries from the old prompt are not reused
+PROMPT_VERSION = '1'
+FALLBACK_SUMMARY = "Could not generate summary. Please review patient information manually."
+
+PROMPT_INSTRUCTIONS = (
+    "You are a helpful medical assistant. Summarize the following patient information "
+    "into a concise, one or two-sentence note for a doctor. Focus on the key complaints, "
+    "duration, severity, and relevant medical details such as allergies, medications, "
+    "medical history, and any additional notes provided.\n\n"
+)
+PATIENT_FIELDS = ("symptoms", "known_allergies", "current_medication", "medical_history", "additional_note")
+
+
+def patient_details(symptoms: str, known_allergies: str = None, current_medication: str = None, medical_history: str = None, additional_note: str = None) -> str:
+    return (
+        f"Patient Symptoms: \"{symptoms}\"\n"
+        f"Known Allergies: \"{known_allergies or 'None provided'}\"\n"
+        f"Current Medication: \"{current_medication or 'None provided'}\"\n"
+        f"Medical History: \"{medical_history or 'None provided'}\"\n"
+        f"Additional Notes: \"{additional_note or 'None provided'}\"\n"
+    )
+
+
+def batch_prompt(patients: list) -> str:
+    """One prompt covering several patients; the model must answer with a JSON array keyed by PATIENT id."""
+    blocks = "".join(
+        f"PATIENT {index}\n{patient_details(**patient)}\n" for index, patient in enumerate(patients)
+    )
+    return (
+        PROMPT_INSTRUCTIONS
+        + "Summarize each patient below independently.\n\n"
+        + blocks
+        + "Respond only with a JSON array of objects of the form "
+        '{"id": <PATIENT number>, "summary": "<summary>"}, one per patient.'
+    )
+
+
+def parse_batch_response(text: str, count: int) -> list:
+    """Map a batch response back to a list of `count` summaries; unparseable entries are None."""
+    summaries = [None] * count
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.strip("`")
+        text = text[text.find("["):]
+    try:
+        items = json.loads(text)
+    except ValueError:
+        logger.warning("Could not parse batched Gemini response as JSON.")
+        return summaries
+    for item in items if isinstance(items, list) else []:
+        if not isinstance(item, dict):
+            continue
+        index, summary = item.get("id"), item.get("summary")
+        if isinstance(index, int) and 0 <= index < count and isinstance(summary, str) and summary.strip():
+            summaries[index] = summary.strip()
+    return summaries
+
+
 class GeminiService:
-    def __init__(self):
-        api_key = os.getenv('GEMINI_API_KEY')
-        if not api_key:
-            raise ValueError("GEMINI_API_KEY not found in environment variables.")
-        
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-2.5-flash')
+    def __init__(self, model=None):
+        """
+        `model` replaces the Gemini model, e.g. with services.fakes.FakeGenerativeModel.
+        The summary cache follows the current app's SUMMARY_CACHE_* settings.
+        """
+        if model is None:
+            api_key = os.getenv('GEMINI_API_KEY')
+            if not api_key:
+                raise ValueError("GEMINI_API_KEY not found in environment variables.")
+
+            genai.configure(api_key=api_key)
+            model = genai.GenerativeModel(MODEL_NAME)
+        self.model = model
+        self.cache = build_summary_cache(current_app.config, db.engine)
         logger.info("GeminiService initialized.")
 
+    def _cache_key(self, **patient):
+        if self.cache is None:
+            return None
+        return summary_cache_key(MODEL_NAME, PROMPT_VERSION, **{field: patient.get(field) for field in PATIENT_FIELDS})
+
     def summarize_symptoms(self, symptoms: str, known_allergies: str = None, current_medication: str = None, medical_history: str = None, additional_note: str = None) -> str:
+        cache_key = self._cache_key(
+            symptoms=symptoms,
+            known_allergies=known_allergies,
+            current_medication=current_medication,
+            medical_history=medical_history,
+            additional_note=additional_note
+        )
+        if cache_key:
+            cached_summary = self.cache.get(cache_key)
+            if cached_summary is not None:
+                logger.info(f"Summary cache hit for symptoms: {symptoms[:50]}...")
+                return cached_summary
+
         prompt = (
-            "You are a helpful medical assistant. Summarize the following patient information "
-            "into a concise, one or two-sentence note for a doctor. Focus on the key complaints, "
-            "duration, severity, and relevant medical details such as allergies, medications, "
-            "medical history, and any additional notes provided.\n\n"
-            f"Patient Symptoms: \"{symptoms}\"\n"
-            f"Known Allergies: \"{known_allergies or 'None provided'}\"\n"
-            f"Current Medication: \"{current_medication or 'None provided'}\"\n"
-            f"Medical History: \"{medical_history or 'None provided'}\"\n"
-            f"Additional Notes: \"{additional_note or 'None provided'}\"\n\n"
-            "Summary:"
+            PROMPT_INSTRUCTIONS
+            + patient_details(symptoms, known_allergies, current_medication, medical_history, additional_note)
+            + "\nSummary:"
         )
 
         try:
-            response = self.model.generate_content(prompt)
+            with metrics.dependency("gemini", "summarize_symptoms"):
+                response = self.model.generate_content(prompt)
             summary = response.text.strip()
             logger.info(f"Successfully generated summary for symptoms: {symptoms[:50]}...")
+            # Only real summaries are cached; the fallback below never is
+            if cache_key and summary:
+                self.cache.set(cache_key, summary)
             return summary
         except Exception as e:
             logger.error(f"Error calling Gemini API: {e}")
             # Fallback in case of API error
-            return "Could not generate summary. Please review patient information manually."
\ No newline at end of file
+            return FALLBACK_SUMMARY
+
+    def _summarize_chunk(self, patients: list) -> list:
+        try:
+            with metrics.dependency("gemini", "summarize_batch"):
+                response = self.model.generate_content(
+                    batch_prompt(patients),
+                    generation_config={"response_mime_type": "application/json"}
+                )
+            summaries = parse_batch_response(response.text, len(patients))
+        except Exception as e:
+            logger.error(f"Error calling Gemini API for a batch of {len(patients)}: {e}")
+            summaries = [None] * len(patients)
+
+        # Anything the batch response did not cover is retried on its own
+        return [
+            summary if summary is not None else self.summarize_symptoms(**patient)
+            for patient, summary in zip(patients, summaries)
+        ]
+
+    def summarize_batch(self, patients: list, batch_size: int = 10, max_concurrency: int = 4) -> list:
+        """
+        Summarize many patients, packing `batch_size` patients into each model request
+        and running up to `max_concurrency` requests at once. Each patient is a dict of
+        summarize_symptoms keyword arguments. Returns summaries in input order.
+        """
+        summaries = [None] * len(patients)
+        cache_keys = [self._cache_key(**patient) for patient in patients]
+        misses = []
+        for index, cache_key in enumerate(cache_keys):
+            if cache_key:
+                summaries[index] = self.cache.get(cache_key)
+            if summaries[index] is None:
+                misses.append(index)
+
+        chunks = [misses[start:start + batch_size] for start in range(0, len(misses), batch_size)]
+        with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(chunks)))) as executor:
+            results = executor.map(lambda chunk: self._summarize_chunk([patients[i] for i in chunk]), chunks)
+            for chunk, chunk_summaries in zip(chunks, results):
+                for index, summary in zip(chunk, chunk_summaries):
+                    summaries[index] = summary
+                    if cache_keys[index] and summary and summary != FALLBACK_SUMMARY:
+                        self.cache.set(cache_keys[index], summary)
+
+        logger.info(f"Summarized {len(patients)} patients with {len(chunks)} batched request(s).")
+        return summaries
@@ -0,0 +1,45 @@
+"""
+Handlers for every job kind processed by scripts/worker.py. Importing this module registers them.
+"""
+import logging
+
+from services.job_queue import job_handler
+from services.booking_pipeline import process_booking, mark_booking_failed, send_confirmation_sms
+from services.reminder_service import send_due_reminders
+from services.calendar_sync import sync_calendar
+from services.registry import service_registry
+
+logger = logging.getLogger(__name__)
+
+
+def fail_booking(payload):
+    mark_booking_failed(payload["appointment_id"])
+
+
+# Transient Gemini/Calendar/SendGrid errors raise, so the booking is retried with backoff
+# and only marked failed once its last attempt has failed
+@job_handler("booking.process", on_failure=fail_booking)
+def handle_booking(payload):
+    process_booking(payload["appointment_id"], raise_errors=True)
+
+
+@job_handler("reminders.dispatch")
+def handle_reminders(payload):
+    send_due_reminders()
+
+
+@job_handler("sms.confirmation")
+def handle_sms_confirmation(payload):
+    if not send_confirmation_sms(payload["appointment_id"]):
+        raise RuntimeError(f"Failed to send confirmation SMS for appointment {payload['appointment_id']}")
+
+
+@job_handler("calendar.delete_event")
+def handle_delete_event(payload):
+    if not service_registry.calendar.delete_event(payload["event_id"]):
+        raise RuntimeError(f"Failed to delete calendar event {payload['event_id']}")
+
+
+@job_handler("calendar.sync")
+def handle_calendar_sync(payload):
+    sync_calendar(full=payload.get("full", False))
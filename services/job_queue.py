@@ -0,0 +1,254 @@
+import json
+import uuid
+import random
+import socket
+import logging
+import threading
+from datetime import datetime, timezone, timedelta
+from sqlalchemy import select, update, insert
+
+from database import db, Job, JobStatus
+
+logger = logging.getLogger(__name__)
+
+JOB_HANDLERS = {}
+# kind -> called with the payload once a job has failed its last attempt
+JOB_FAILURE_HANDLERS = {}
+
+RETRY_BASE_SECONDS = 10
+RETRY_MAX_SECONDS = 3600
+LOCK_TIMEOUT_SECONDS = 900
+
+
+def utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def job_handler(kind: str, on_failure=None):
+    """
+    Register a function as the handler for jobs of `kind`. It receives the decoded payload;
+    raising schedules a retry. `on_failure(payload)` runs when the last attempt has failed.
+    """
+    def decorator(func):
+        JOB_HANDLERS[kind] = func
+        if on_failure is not None:
+            JOB_FAILURE_HANDLERS[kind] = on_failure
+        return func
+    return decorator
+
+
+def enqueue(kind: str, payload: dict, run_at: datetime = None, max_attempts: int = 5, commit: bool = True) -> Job:
+    """Persist a job. Pass commit=False to enqueue in the caller's transaction."""
+    now = utcnow()
+    job = Job(
+        kind=kind,
+        payload=json.dumps(payload),
+        status=JobStatus.QUEUED.value,
+        attempts=0,
+        max_attempts=max_attempts,
+        run_at=run_at or now,
+        created_at=now,
+        updated_at=now,
+    )
+    db.session.add(job)
+    if commit:
+        db.session.commit()
+    else:
+        db.session.flush()
+    logger.info(f"Enqueued job {job.id} ({kind})")
+    return job
+
+
+def enqueue_many(kind: str, payloads: list, max_attempts: int = 5):
+    """Persist one job per payload with a single executemany, in the caller's transaction."""
+    now = utcnow()
+    db.session.execute(insert(Job), [
+        {
+            "kind": kind,
+            "payload": json.dumps(payload),
+            "status": JobStatus.QUEUED.value,
+            "attempts": 0,
+            "max_attempts": max_attempts,
+            "run_at": now,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for payload in payloads
+    ])
+    logger.info(f"Enqueued {len(payloads)} {kind} jobs")
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff with jitter for the given number of attempts so far."""
+    delay = min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** max(0, attempts - 1))
+    return delay * random.uniform(0.8, 1.2)
+
+
+def claim_jobs(worker_id: str, limit: int = 1, kinds=None) -> list:
+    """
+    Atomically claim up to `limit` due jobs for `worker_id` and mark them running.
+    Uses SELECT ... FOR UPDATE SKIP LOCKED where supported; SQLite serializes
+    writers, so there a single UPDATE ... WHERE id IN (subquery) is atomic.
+    """
+    now = utcnow()
+    claim_token = f"{worker_id}:{uuid.uuid4().hex[:12]}"
+    due = select(Job.id).where(
+        Job.status == JobStatus.QUEUED.value,
+        Job.run_at <= now,
+    ).order_by(Job.run_at, Job.id).limit(limit)
+    if kinds:
+        due = due.where(Job.kind.in_(list(kinds)))
+
+    if db.session.get_bind().dialect.name == "sqlite":
+        claimable = due
+    else:
+        claimable = list(db.session.execute(due.with_for_update(skip_locked=True)).scalars())
+        if not claimable:
+            db.session.commit()
+            return []
+
+    db.session.execute(
+        update(Job)
+        .where(Job.id.in_(claimable), Job.status == JobStatus.QUEUED.value)
+        .values(
+            status=JobStatus.RUNNING.value,
+            locked_by=claim_token,
+            locked_at=now,
+            attempts=Job.attempts + 1,
+            updated_at=now,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return list(db.session.execute(select(Job).where(Job.locked_by == claim_token)).scalars())
+
+
+def requeue_stale_jobs(lock_timeout: int = LOCK_TIMEOUT_SECONDS) -> int:
+    """Return jobs whose worker died mid-run to the queue."""
+    now = utcnow()
+    result = db.session.execute(
+        update(Job)
+        .where(
+            Job.status == JobStatus.RUNNING.value,
+            Job.locked_at < now - timedelta(seconds=lock_timeout),
+        )
+        .values(status=JobStatus.QUEUED.value, locked_by=None, locked_at=None, updated_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    if result.rowcount:
+        logger.warning(f"Requeued {result.rowcount} stale job(s)")
+    return result.rowcount
+
+
+def active_job_payloads(kind: str) -> list:
+    """Decoded payloads of the queued and running jobs of `kind`."""
+    payloads = db.session.scalars(
+        select(Job.payload).where(
+            Job.kind == kind,
+            Job.status.in_([JobStatus.QUEUED.value, JobStatus.RUNNING.value]),
+        )
+    ).all()
+    return [json.loads(payload) for payload in payloads]
+
+
+def run_job(job: Job) -> bool:
+    """Execute a claimed job and record success, a scheduled retry or final failure."""
+    job_id = job.id
+    handler = JOB_HANDLERS.get(job.kind)
+    try:
+        if handler is None:
+            raise LookupError(f"No handler registered for job kind '{job.kind}'")
+        handler(json.loads(job.payload))
+        job.status = JobStatus.SUCCEEDED.value
+        job.last_error = None
+        succeeded = True
+    except Exception as e:
+        db.session.rollback()
+        job = db.session.get(Job, job_id)
+        job.last_error = str(e)
+        if job.attempts < job.max_attempts:
+            delay = retry_delay(job.attempts)
+            job.status = JobStatus.QUEUED.value
+            job.run_at = utcnow() + timedelta(seconds=delay)
+            logger.warning(f"Job {job.id} ({job.kind}) failed on attempt {job.attempts}, retrying in {delay:.0f}s: {e}")
+        else:
+            job.status = JobStatus.FAILED.value
+            logger.error(f"Job {job.id} ({job.kind}) failed permanently after {job.attempts} attempts: {e}")
+            on_failure = JOB_FAILURE_HANDLERS.get(job.kind)
+            if on_failure is not None:
+                try:
+                    on_failure(json.loads(job.payload))
+                except Exception as failure_error:
+                    db.session.rollback()
+                    job = db.session.get(Job, job_id)
+                    logger.error(f"Failure handler for job {job_id} ({job.kind}) raised: {failure_error}")
+        succeeded = False
+
+    job.locked_by = None
+    job.locked_at = None
+    job.updated_at = utcnow()
+    db.session.commit()
+    return succeeded
+
+
+class Worker:
+    """
+    Runs `concurrency` consumer threads that claim and execute jobs until stopped. A reaper
+    thread requeues stale jobs and calls each `maintenance` function about once a minute.
+    """
+
+    def __init__(self, app, concurrency: int = 4, poll_interval: float = 1.0, kinds=None, maintenance=()):
+        self.app = app
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.kinds = kinds
+        self.maintenance = list(maintenance)
+        self.worker_id = f"{socket.gethostname()}:{threading.get_native_id()}"
+        self._stop = threading.Event()
+
+    def stop(self):
+        self._stop.set()
+
+    def _consume(self, index: int):
+        consumer_id = f"{self.worker_id}:{index}"
+        while not self._stop.is_set():
+            with self.app.app_context():
+                try:
+                    jobs = claim_jobs(consumer_id, limit=1, kinds=self.kinds)
+                    for job in jobs:
+                        run_job(job)
+                except Exception as e:
+                    logger.error(f"Consumer {consumer_id} error: {e}")
+                    db.session.rollback()
+                    jobs = []
+            if not jobs:
+                self._stop.wait(self.poll_interval)
+
+    def _reap(self):
+        while not self._stop.wait(max(self.poll_interval, 60)):
+            with self.app.app_context():
+                for task in [requeue_stale_jobs] + self.maintenance:
+                    try:
+                        task()
+                    except Exception as e:
+                        logger.error(f"Maintenance task {task.__name__} failed: {e}")
+                        db.session.rollback()
+
+    def run(self):
+        threads = [
+            threading.Thread(target=self._consume, args=(index,), name=f"job-consumer-{index}", daemon=True)
+            for index in range(self.concurrency)
+        ]
+        threads.append(threading.Thread(target=self._reap, name="job-reaper", daemon=True))
+        for thread in threads:
+            thread.start()
+        logger.info(f"Worker {self.worker_id} started with {self.concurrency} consumer(s)")
+        try:
+            while not self._stop.is_set():
+                self._stop.wait(1)
+        except KeyboardInterrupt:
+            self.stop()
+        for thread in threads:
+            thread.join(timeout=self.poll_interval + 5)
+        logger.info(f"Worker {self.worker_id} stopped")
@@ -0,0 +1,224 @@
+"""
+In-process metrics with Prometheus text exposition on /metrics: request latency per
+endpoint, SQL query counts and durations (per request too), outbound dependency
+calls and named operations. Every gunicorn worker keeps its own numbers, so a
+scrape sees the worker that served it; sum across scrapes by `instance`.
+"""
+import time
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from flask import Response, request
+from sqlalchemy import event
+
+# Seconds; covers fast cache hits up to slow Gemini calls
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# [queries, seconds] of the request being handled in this context
+_request_queries = ContextVar("request_queries", default=None)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs += [f'{name}="{value}"' for name, value in extra]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        return self._values.get(labels, 0)
+
+    def samples(self):
+        with self._lock:
+            values = list(self._values.items())
+        for labels, value in values:
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}  # labels -> [per-bucket counts (+Inf last), sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, *labels) -> int:
+        series = self._series.get(labels)
+        return series[2] if series else 0
+
+    def samples(self):
+        with self._lock:
+            series = [(labels, list(counts), total, count) for labels, (counts, total, count) in self._series.items()]
+        for labels, counts, total, count in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = (("le", _format_value(float(bound))),)
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}"
+
+
+class Metrics:
+    """
+    Process-wide metric registry. init_app() adds request timing, SQL timing on every
+    engine and the /metrics endpoint; services time their API calls with dependency()
+    and code paths with timed().
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self.enabled = True
+        self.http_requests = self.counter("http_requests_total", "HTTP requests handled", ("method", "endpoint", "status"))
+        self.http_latency = self.histogram(
+            "http_request_duration_seconds", "HTTP request latency", ("method", "endpoint"))
+        self.db_queries = self.counter("db_queries_total", "SQL statements executed", ("bind",))
+        self.db_latency = self.histogram("db_query_duration_seconds", "SQL statement latency", ("bind",))
+        self.request_queries = self.histogram(
+            "http_request_db_queries", "SQL statements per HTTP request", ("endpoint",), buckets=QUERY_COUNT_BUCKETS)
+        self.request_db_time = self.histogram(
+            "http_request_db_duration_seconds", "Time spent in SQL per HTTP request", ("endpoint",))
+        self.dependency_latency = self.histogram(
+            "dependency_call_duration_seconds", "Outbound API call latency", ("service", "method", "outcome"))
+        self.operation_latency = self.histogram(
+            "operation_duration_seconds", "Latency of named internal operations", ("operation",))
+
+    def counter(self, name, documentation, labelnames=()) -> Counter:
+        return self._metrics.setdefault(name, Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._metrics.setdefault(name, Histogram(name, documentation, labelnames, buckets))
+
+    def init_app(self, app):
+        self.enabled = app.config.get("METRICS_ENABLED", True)
+        if not self.enabled:
+            return
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        app.teardown_request(self._reset_request)
+        app.add_url_rule(app.config.get("METRICS_PATH", "/metrics"), "metrics", self.export)
+        app.extensions["metrics"] = self
+
+    def instrument_engine(self, bind: str, engine):
+        """Count and time every statement run on `engine`."""
+        if not self.enabled:
+            return
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            started = conn.info["metrics_query_start"].pop()
+            elapsed = time.perf_counter() - started
+            self.db_queries.inc(bind)
+            self.db_latency.observe(elapsed, bind)
+            stats = _request_queries.get()
+            if stats is not None:
+                stats[0] += 1
+                stats[1] += elapsed
+
+        @event.listens_for(engine, "handle_error")
+        def handle_error(exception_context):
+            connection = exception_context.connection
+            if connection is not None and connection.info.get("metrics_query_start"):
+                connection.info["metrics_query_start"].pop()
+
+    def _start_request(self):
+        request.environ["metrics.started"] = time.perf_counter()
+        request.environ["metrics.token"] = _request_queries.set([0, 0.0])
+
+    def _finish_request(self, response):
+        started = request.environ.get("metrics.started")
+        if started is None:
+            return response
+        # Route templates, not raw paths, keep label cardinality bounded
+        endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+        self.http_latency.observe(time.perf_counter() - started, request.method, endpoint)
+        self.http_requests.inc(request.method, endpoint, str(response.status_code))
+        stats = _request_queries.get()
+        if stats is not None:
+            self.request_queries.observe(stats[0], endpoint)
+            self.request_db_time.observe(stats[1], endpoint)
+        return response
+
+    def _reset_request(self, exception=None):
+        token = request.environ.pop("metrics.token", None)
+        if token is not None:
+            _request_queries.reset(token)
+
+    @contextmanager
+    def dependency(self, service: str, method: str):
+        """Time one call to an external API; outcome="error" when it raises."""
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            yield
+            outcome = "ok"
+        finally:
+            if self.enabled:
+                self.dependency_latency.observe(time.perf_counter() - started, service, method, outcome)
+
+    @contextmanager
+    def timed(self, operation: str):
+        """Time a block, or a function when used as a decorator, in operation_duration_seconds."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            if self.enabled:
+                self.operation_latency.observe(time.perf_counter() - started, operation)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+    def export(self):
+        return Response(self.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+metrics = Metrics()
@@ -0,0 +1,122 @@
+import time
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, date, timedelta
+
+from services.availability_service import load_booked_masks, minute_of_day
+
+logger = logging.getLogger(__name__)
+
+
+class OccupancyCache:
+    """
+    Process-local LRU cache of booked-slot bitmasks keyed by (doctor, date).
+    Bit N of a mask is set when minute-of-day N is booked. Bookings made by this
+    process are written through; entries older than `ttl_seconds` are reloaded so
+    bookings from other workers become visible.
+    """
+
+    def __init__(self, max_entries: int = 16384, ttl_seconds: float = 30):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped on every write-through so loads racing a booking don't store stale masks
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app):
+        self.max_entries = app.config.get("OCCUPANCY_CACHE_SIZE", self.max_entries)
+        self.ttl_seconds = app.config.get("OCCUPANCY_CACHE_TTL", self.ttl_seconds)
+        self.clear()
+
+    def _lookup(self, key, now):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        mask, loaded_at = entry
+        if self.ttl_seconds > 0 and now - loaded_at > self.ttl_seconds:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return mask
+
+    def _store(self, key, mask, loaded_at):
+        self._entries[key] = (mask, loaded_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get_masks(self, doctors, start_date: date, end_date: date) -> dict:
+        """
+        Return {(doctor, date): bitmask} for every doctor and day in [start_date, end_date).
+        Any miss reloads the whole window with a single range query.
+        """
+        doctors = list(doctors)
+        days = [start_date + timedelta(days=i) for i in range((end_date - start_date).days)]
+        keys = [(doctor, day) for day in days for doctor in doctors]
+        now = time.monotonic()
+        masks = {}
+        with self._lock:
+            for key in keys:
+                mask = self._lookup(key, now)
+                if mask is None:
+                    break
+                masks[key] = mask
+            else:
+                self.hits += 1
+                return masks
+            self.misses += 1
+            generation = self._generation
+
+        if len(keys) > self.max_entries:
+            logger.warning(
+                f"Occupancy window of {len(keys)} (doctor, day) entries exceeds OCCUPANCY_CACHE_SIZE="
+                f"{self.max_entries}; every lookup of it will miss"
+            )
+        loaded = load_booked_masks(start_date, end_date, doctors)
+        masks = {key: loaded.get(key, 0) for key in keys}
+
+        with self._lock:
+            if generation == self._generation:
+                for key, mask in masks.items():
+                    self._store(key, mask, now)
+        return masks
+
+    def _update(self, doctor, appointment_time, booked):
+        key = (doctor, appointment_time.date())
+        bit = 1 << minute_of_day(appointment_time)
+        with self._lock:
+            self._generation += 1
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            mask, loaded_at = entry
+            self._entries[key] = (mask | bit if booked else mask & ~bit, loaded_at)
+
+    def mark_booked(self, doctor: str, appointment_time: datetime):
+        """Write-through after an appointment for `doctor` at `appointment_time` is committed."""
+        self._update(doctor, appointment_time, booked=True)
+
+    def release(self, doctor: str, appointment_time: datetime):
+        """Write-through after an appointment is deleted or cancelled."""
+        self._update(doctor, appointment_time, booked=False)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+occupancy_cache = OccupancyCache()
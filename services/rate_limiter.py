@@ -0,0 +1,124 @@
+import time
+import threading
+from sqlalchemy import select, update, insert, case
+from sqlalchemy.exc import IntegrityError
+
+from database import RateLimitBucket
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: `rate` tokens per second refill up to `capacity`.
+    acquire() reserves a token and sleeps until it is due, so concurrent callers
+    are spaced out evenly instead of bursting and being rejected upstream.
+    """
+
+    def __init__(self, rate: float, capacity: float = None, clock=time.monotonic, sleep=time.sleep):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, max_wait: float = None, tokens: float = 1) -> bool:
+        """
+        Take `tokens` tokens, waiting for them if necessary. Returns False without
+        taking any when they would not be available within `max_wait` seconds.
+        """
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            # Tokens may go negative: each caller reserves the next free point in time
+            wait = max(0.0, (tokens - self._tokens) / self.rate)
+            if max_wait is not None and wait > max_wait:
+                return False
+            self._tokens -= tokens
+        if wait:
+            self._sleep(wait)
+        return True
+
+    def pause(self, seconds: float):
+        """Push every pending and future acquire back by `seconds`, e.g. after an HTTP 429."""
+        with self._lock:
+            self._refill(self._clock())
+            self._tokens = min(self._tokens, 0.0) - seconds * self.rate
+
+
+class DatabaseTokenBucket:
+    """
+    TokenBucket whose state lives in the rate_limit_buckets table, so every process
+    (gunicorn workers, scripts/worker.py, cron scripts) draws from one budget. Each
+    acquire() is a single conditional UPDATE, atomic on SQLite and PostgreSQL alike.
+    Processes should share one clock: refills are computed from Unix time.
+    """
+
+    def __init__(self, engine, name: str, rate: float, capacity: float = None, clock=time.time, sleep=time.sleep):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.engine = engine
+        self.name = name
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._clock = clock
+        self._sleep = sleep
+
+    def _refilled(self, now):
+        tokens = RateLimitBucket.tokens + (now - RateLimitBucket.updated_at) * self.rate
+        return case((tokens > self.capacity, self.capacity), else_=tokens)
+
+    def _execute(self, statement, now):
+        """
+        Run an UPDATE ... RETURNING tokens of this bucket's row, creating the row (full)
+        on first use. Returns None when the UPDATE's conditions did not match.
+        """
+        with self.engine.begin() as connection:
+            remaining = connection.execute(statement).scalar()
+            if remaining is None and connection.execute(
+                select(RateLimitBucket.name).where(RateLimitBucket.name == self.name)
+            ).first() is None:
+                try:
+                    with connection.begin_nested():
+                        connection.execute(
+                            insert(RateLimitBucket).values(name=self.name, tokens=self.capacity, updated_at=now)
+                        )
+                except IntegrityError:
+                    pass  # Created concurrently by another process
+                remaining = connection.execute(statement).scalar()
+            return remaining
+
+    def acquire(self, max_wait: float = None, tokens: float = 1) -> bool:
+        """Same contract as TokenBucket.acquire."""
+        now = self._clock()
+        refilled = self._refilled(now)
+        statement = update(RateLimitBucket).where(RateLimitBucket.name == self.name)
+        if max_wait is not None:
+            statement = statement.where(refilled - tokens >= -max_wait * self.rate)
+        remaining = self._execute(
+            statement.values(tokens=refilled - tokens, updated_at=now).returning(RateLimitBucket.tokens), now
+        )
+        if remaining is None:
+            return False
+        wait = max(0.0, -remaining / self.rate)
+        if wait:
+            self._sleep(wait)
+        return True
+
+    def pause(self, seconds: float):
+        """Same contract as TokenBucket.pause, for every process sharing the bucket."""
+        now = self._clock()
+        refilled = self._refilled(now)
+        self._execute(
+            update(RateLimitBucket)
+            .where(RateLimitBucket.name == self.name)
+            .values(tokens=case((refilled < 0, refilled), else_=0.0) - seconds * self.rate, updated_at=now)
+            .returning(RateLimitBucket.tokens),
+            now,
+        )
@@ -0,0 +1,99 @@
+import logging
+import threading
+from flask import has_app_context
+
+from services.sms_service import SmsService
+from services.email_service import EmailService
+from services.gemini_service import GeminiService
+from services.gcal_service import GoogleCalendarService
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceRegistry:
+    """
+    Application-scoped holder for long-lived external service clients.
+    Each client is built once per process on first use (or by warm_up) and shared
+    by all threads, so requests no longer pay for credential parsing, discovery
+    documents or new HTTP connections.
+    """
+
+    DEFAULT_FACTORIES = {
+        "gemini": GeminiService,
+        "calendar": GoogleCalendarService,
+        "email": EmailService,
+        "sms": SmsService,
+    }
+
+    def __init__(self):
+        self._factories = dict(self.DEFAULT_FACTORIES)
+        self._instances = {}
+        self._lock = threading.Lock()
+        self.app = None
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions["services"] = self
+        if app.config.get("SERVICES_WARM_UP"):
+            self.warm_up()
+
+    def register(self, name: str, factory):
+        """Replace the factory for `name` (e.g. with a fake) and drop any built instance."""
+        with self._lock:
+            self._factories[name] = factory
+            self._instances.pop(name, None)
+
+    def get(self, name: str):
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+        with self._lock:
+            instance = self._instances.get(name)
+            if instance is None:
+                instance = self._build(name)
+                self._instances[name] = instance
+            return instance
+
+    def _build(self, name: str):
+        # Clients read the app config (and Gemini the engine), so builds outside a
+        # request, e.g. warm_up from a gunicorn hook, run in the registered app's context
+        if has_app_context() or self.app is None:
+            return self._factories[name]()
+        with self.app.app_context():
+            return self._factories[name]()
+
+    @property
+    def gemini(self):
+        return self.get("gemini")
+
+    @property
+    def calendar(self):
+        return self.get("calendar")
+
+    @property
+    def email(self):
+        return self.get("email")
+
+    @property
+    def sms(self):
+        return self.get("sms")
+
+    def warm_up(self, names=None):
+        """
+        Build clients ahead of the first request, e.g. from gunicorn's post_fork hook.
+        Services that are not configured are skipped and retried on first use.
+        """
+        for name in names or list(self._factories):
+            try:
+                self.get(name)
+                logger.info(f"Service '{name}' warmed up.")
+            except Exception as e:
+                logger.warning(f"Could not warm up service '{name}': {e}")
+
+    def reset(self):
+        """Drop every built client, e.g. after fork so connections are not shared between processes."""
+        with self._lock:
+            self._instances.clear()
+
+
+service_registry = ServiceRegistry()
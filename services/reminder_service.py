@@ -0,0 +1,217 @@
+import time
+import pytz
+import logging
+from flask import current_app
+from sqlalchemy import update
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from database import db, Appointment, BookingStatus
+from services.email_service import Templates
+from services.registry import service_registry
+from services.sms_service import sms_templates, batch_summary
+
+logger = logging.getLogger(__name__)
+
+REMINDER_TIMEZONE = 'Africa/Addis_Ababa'
+REMINDER_WINDOW_HOURS = 24
+
+
+def find_appointments_to_remind():
+    """Confirmed appointments in the next 24 hours that have not been reminded yet."""
+    now = datetime.now(pytz.timezone(REMINDER_TIMEZONE))
+    return Appointment.query.filter(
+        Appointment.appointment_time >= now,
+        Appointment.appointment_time < now + timedelta(hours=REMINDER_WINDOW_HOURS),
+        Appointment.reminder_sent == False,
+        Appointment.booking_status == BookingStatus.CONFIRMED.value
+    ).order_by(Appointment.id.desc()).all()
+
+
+def build_reminder_email(appt) -> dict:
+    """Extract everything needed to send a reminder so worker threads never touch ORM objects."""
+    return {
+        'appointment_id': appt.id,
+        'to_email': appt.patient_email,
+        'subject': f'Appointment Reminder: {appt.patient_name}',
+        'body_context': {
+            'patient_name': appt.patient_name,
+            'appointment_time': appt.appointment_time.strftime('%Y-%m-%d %H:%M %Z'),
+            'doctor': appt.preferred_doctor,
+            'description': appt.summary,
+            'clinic_name': 'CareSync',
+        },
+    }
+
+
+def build_reminder_sms(appt) -> dict:
+    """SmsService.send_sms data for a reminder text; like the email, built before the threads start."""
+    return {
+        'appointment_id': appt.id,
+        'template': Templates.APPOINTMENT_REMINDER_SMS.value,
+        'phone_number': appt.patient_phone,
+        'patient_name': appt.patient_name,
+        'doctor': appt.preferred_doctor,
+        'appointment_time': appt.appointment_time.strftime('%Y-%m-%d %H:%M'),
+    }
+
+
+def send_reminder_email(email_service, reminder) -> bool:
+    try:
+        email_sent = email_service.send_email(
+            template=Templates.APPOINTMENT_REMINDER.value,
+            subject=reminder['subject'],
+            body_context=reminder['body_context'],
+            to_email=reminder['to_email']
+        )
+        if email_sent:
+            logger.info(f"Email sent for appointment {reminder['appointment_id']} to {reminder['to_email']}")
+            return True
+        logger.warning(f"Failed to send email for appointment {reminder['appointment_id']}")
+    except Exception as e:
+        logger.warning(f"Exception sending email for appointment {reminder['appointment_id']}: {str(e)}")
+    return False
+
+
+def send_reminder_sms(sms_service, reminder) -> bool:
+    # send_sms paces itself with the shared token bucket and never raises
+    if sms_service.send_sms(reminder):
+        logger.info(f"SMS sent for appointment {reminder['appointment_id']} to {reminder['phone_number']}")
+        return True
+    logger.warning(f"Failed to send SMS for appointment {reminder['appointment_id']}")
+    return False
+
+
+def prepare_sms_reminders(sms_service, reminders) -> dict:
+    """
+    Render every reminder text in one batch and attach body and segment count, so
+    the run's cost and duration at the sender's rate are known before sending.
+    """
+    rendered = sms_templates.render_batch(Templates.APPOINTMENT_REMINDER_SMS.value, reminders)
+    for reminder, message in zip(reminders, rendered):
+        reminder['body'], reminder['segments'] = message.body, message.segments
+    summary = batch_summary(rendered)
+    logger.info(
+        f"{summary['messages']} SMS reminders take {summary['segments']} segments "
+        f"({summary['ucs2']} UCS-2), about {sms_service.estimate_seconds(summary['segments']):.0f}s at the sender's rate."
+    )
+    return summary
+
+
+# channel: (sent_at column, build, send, service name in the registry, pool size config key)
+REMINDER_CHANNELS = {
+    "email": (Appointment.email_reminder_sent_at, build_reminder_email, send_reminder_email, "email", "REMINDER_CONCURRENCY"),
+    "sms": (Appointment.sms_reminder_sent_at, build_reminder_sms, send_reminder_sms, "sms", "SMS_CONCURRENCY"),
+}
+
+
+def mark_channel_sent(channel, appointment_ids):
+    """Record one channel's reminders as sent for a batch of appointments with a single UPDATE."""
+    if not appointment_ids:
+        return
+    column = REMINDER_CHANNELS[channel][0]
+    db.session.execute(
+        update(Appointment)
+        .where(Appointment.id.in_(appointment_ids))
+        .values({column: datetime.utcnow()})
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+
+
+def mark_reminders_sent(appointment_ids, channels, batch_size: int = 200):
+    """Flag appointments as reminded once every channel in `channels` has been sent."""
+    done = [REMINDER_CHANNELS[channel][0].isnot(None) for channel in channels]
+    for offset in range(0, len(appointment_ids), batch_size):
+        db.session.execute(
+            update(Appointment)
+            .where(Appointment.id.in_(appointment_ids[offset:offset + batch_size]), *done)
+            .values(reminder_sent=True)
+            .execution_options(synchronize_session=False)
+        )
+    db.session.commit()
+
+
+def send_due_reminders(concurrency: int = None, batch_size: int = None, channels=None) -> dict:
+    """
+    Find appointments needing reminders and send each enabled channel (REMINDER_CHANNELS)
+    that has not gone out yet, every channel on its own bounded thread pool. Sent
+    reminders are recorded with one UPDATE per `batch_size` sends and channel; an
+    appointment counts as reminded once all channels are through, so a failed SMS is
+    retried on the next run without emailing the patient twice.
+    Returns throughput metrics for the run.
+    """
+    config = current_app.config
+    batch_size = batch_size or config.get("REMINDER_BATCH_SIZE", 200)
+    channels = [channel for channel in channels or config.get("REMINDER_CHANNELS", ("email",)) if channel in REMINDER_CHANNELS]
+    started = time.perf_counter()
+
+    appointments = find_appointments_to_remind()
+    if not appointments:
+        logger.info("No appointments found needing reminders.")
+        return reminder_metrics(0, {}, started)
+
+    # Read before the first commit expires the loaded rows
+    appointment_ids = [appt.id for appt in appointments]
+    results = {channel: {"sent": 0, "failed": 0} for channel in channels}
+    pending_ids = {channel: [] for channel in channels}
+    futures = {}
+    executors = []
+    try:
+        for channel in channels:
+            column, build, send, service_name, concurrency_key = REMINDER_CHANNELS[channel]
+            reminders = [build(appt) for appt in appointments if getattr(appt, column.key) is None]
+            if not reminders:
+                continue
+            try:
+                service = service_registry.get(service_name)
+            except Exception as e:
+                logger.error(f"Reminder channel '{channel}' is unavailable: {e}")
+                results[channel]["failed"] += len(reminders)
+                continue
+            if channel == "sms":
+                results[channel]["segments"] = prepare_sms_reminders(service, reminders)["segments"]
+            workers = concurrency if concurrency and channel == "email" else config.get(concurrency_key, 8)
+            logger.info(f"Sending {len(reminders)} {channel} reminders with concurrency {workers}.")
+            executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"reminder-{channel}")
+            executors.append(executor)
+            for reminder in reminders:
+                futures[executor.submit(send, service, reminder)] = (channel, reminder['appointment_id'])
+
+        for future in as_completed(futures):
+            channel, appointment_id = futures[future]
+            if future.result():
+                results[channel]["sent"] += 1
+                pending_ids[channel].append(appointment_id)
+                if len(pending_ids[channel]) >= batch_size:
+                    mark_channel_sent(channel, pending_ids[channel])
+                    pending_ids[channel] = []
+            else:
+                results[channel]["failed"] += 1
+    finally:
+        for executor in executors:
+            executor.shutdown(wait=True)
+    for channel, channel_ids in pending_ids.items():
+        mark_channel_sent(channel, channel_ids)
+    # Every fetched appointment, so rows whose channels all went out on an earlier run are flagged too
+    mark_reminders_sent(appointment_ids, channels, batch_size)
+
+    metrics = reminder_metrics(len(appointments), results, started)
+    logger.info(
+        f"Completed reminders. Sent {metrics['sent']}, {metrics['failed']} failed "
+        f"({results}) in {metrics['duration_seconds']}s."
+    )
+    return metrics
+
+
+def reminder_metrics(found, channels, started) -> dict:
+    duration = time.perf_counter() - started
+    sent = sum(result["sent"] for result in channels.values())
+    return {
+        "found": found,
+        "sent": sent,
+        "failed": sum(result["failed"] for result in channels.values()),
+        "channels": channels,
+        "duration_seconds": round(duration, 3),
+        "sent_per_second": round(sent / duration, 2) if duration > 0 else 0.0,
+    }
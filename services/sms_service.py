@@ -1,11 +1,78 @@
-import os
+import string
 import logging
+from typing import NamedTuple, Optional
+from flask import current_app
 from twilio.rest import Client
+from twilio.http.http_client import TwilioHttpClient
+from twilio.base.exceptions import TwilioRestException
+
+from services.metrics import metrics
+from database import db
+from services.rate_limiter import TokenBucket, DatabaseTokenBucket
 
 # Create a dedicated logger for SmsService
 logger = logging.getLogger('services.SmsService')
 
-class SmsTemplateManager:    
+RETRY_BACKOFF_SECONDS = 0.25
+
+# GSM 03.38 default alphabet (one septet each) and its extension table (escape + char, two septets)
+GSM7_BASIC = frozenset(
+    "@£$¥èéùìòÇ\nØø\rÅåΔ_ΦΓΛΩΠΨΣΘΞÆæßÉ !\"#¤%&'()*+,-./0123456789:;<=>?"
+    "¡ABCDEFGHIJKLMNOPQRSTUVWXYZÄÖÑÜ§¿abcdefghijklmnopqrstuvwxyzäöñüà"
+)
+GSM7_EXTENDED = frozenset("\f^{}\\[~]|€")
+GSM7_CHARS = GSM7_BASIC | GSM7_EXTENDED
+
+# Characters per segment for a single message and for each part of a concatenated one
+SEGMENT_LIMITS = {"GSM-7": (160, 153), "UCS-2": (70, 67)}
+
+_formatter = string.Formatter()
+
+
+class RenderedSms(NamedTuple):
+    body: Optional[str]
+    encoding: Optional[str]
+    segments: int
+    error: Optional[str] = None
+
+
+def sms_segments(text: str):
+    """(encoding, segments) Twilio bills `text` as: GSM-7 when every character fits, else UCS-2."""
+    characters = set(text)
+    if characters <= GSM7_BASIC:
+        encoding, units = "GSM-7", len(text)
+    elif characters <= GSM7_CHARS:
+        encoding, units = "GSM-7", len(text) + sum(text.count(char) for char in characters & GSM7_EXTENDED)
+    else:
+        # UTF-16 code units: characters outside the BMP (emoji) take two
+        encoding, units = "UCS-2", len(text.encode("utf-16-le")) // 2
+    single, part = SEGMENT_LIMITS[encoding]
+    return encoding, 1 if units <= single else -(-units // part)
+
+
+class CompiledSmsTemplate:
+    """An SMS template parsed once: its placeholders are known up front, so validation is a set check."""
+
+    __slots__ = ("name", "source", "fields", "required_params", "_required")
+
+    def __init__(self, name: str, source: str, required_params=()):
+        self.name = name
+        self.source = source
+        self.fields = tuple(dict.fromkeys(
+            field_name for _, field_name, _, _ in _formatter.parse(source) if field_name is not None
+        ))
+        # Declared parameters first so the error names the same one as before
+        self.required_params = tuple(dict.fromkeys([*required_params, *self.fields]))
+        self._required = frozenset(self.required_params)
+
+    def render(self, data: dict) -> str:
+        if not self._required.issubset(data):
+            missing = next(param for param in self.required_params if param not in data)
+            raise ValueError(f"Missing required parameter '{missing}' for template '{self.name}'")
+        return self.source.format_map(data)
+
+
+class SmsTemplateManager:
     TEMPLATES = {
         "APPOINTMENT_CONFIRMATION_SMS": {
             "template": "Hi {patient_name}, your appointment with {doctor} at CareSync is confirmed for {appointment_time}. Contact us if needed.",
@@ -17,52 +84,131 @@ class SmsTemplateManager:
         },
     }
 
-    def load_template(self, template_name: str, data: dict) -> str: 
-        template_data = self.TEMPLATES.get(template_name)
-        if not template_data:
+    def __init__(self, templates: dict = None):
+        self.compiled = {
+            name: CompiledSmsTemplate(name, spec["template"], spec.get("required_params", ()))
+            for name, spec in (templates or self.TEMPLATES).items()
+        }
+
+    def get(self, template_name: str) -> CompiledSmsTemplate:
+        template = self.compiled.get(template_name)
+        if template is None:
             raise ValueError(f"Template '{template_name}' is not defined.")
+        return template
+
+    def load_template(self, template_name: str, data: dict) -> str:
+        return self.get(template_name).render(data)
+
+    def render_batch(self, template_name: str, rows) -> list:
+        """
+        Render one message per row with its encoding and segment count. Rows that
+        cannot be rendered get an `error` instead of failing the whole batch.
+        """
+        template = self.get(template_name)
+        rendered = []
+        for row in rows:
+            try:
+                body = template.render(row)
+            except (ValueError, KeyError, IndexError, AttributeError) as e:
+                rendered.append(RenderedSms(None, None, 0, str(e)))
+                continue
+            rendered.append(RenderedSms(body, *sms_segments(body)))
+        return rendered
 
-        template = template_data["template"]
-        required_params = template_data["required_params"]
-        for param in required_params:
-            if param not in data:
-                raise ValueError(f"Missing required parameter '{param}' for template '{template_name}'")
 
-        return template.format(**data)
+def batch_summary(rendered: list) -> dict:
+    """Message, segment and encoding totals of a render_batch result, to price a batch before sending."""
+    summary = {"messages": 0, "segments": 0, "gsm7": 0, "ucs2": 0, "errors": 0}
+    for message in rendered:
+        if message.error:
+            summary["errors"] += 1
+            continue
+        summary["messages"] += 1
+        summary["segments"] += message.segments
+        summary["gsm7" if message.encoding == "GSM-7" else "ucs2"] += 1
+    return summary
+
+
+# Compiled once per process and shared by every SmsService
+sms_templates = SmsTemplateManager()
 
 
 class SmsService:
-    def __init__(self):
-        account_sid = os.getenv('TWILIO_ACCOUNT_SID')
-        auth_token = os.getenv('TWILIO_AUTH_TOKEN')
-        
-        if not account_sid or not auth_token:
-            raise ValueError('Twilio credentials are not set correctly')
-        self.client = Client(account_sid, auth_token)
-        self.template_manager = SmsTemplateManager()
-
-    def send_sms(self, data):
+    def __init__(self, client=None, from_phone: str = None, rate_per_second: float = None, burst: float = None):
+        """
+        `client` defaults to a pooled Twilio client built from TWILIO_ACCOUNT_SID and
+        TWILIO_AUTH_TOKEN and `from_phone` to TWILIO_PHONE_NUMBER. Sends are paced by a
+        token bucket at the current app's SMS_RATE_PER_SECOND, which should match the
+        sender's throughput (1 message/s for a long code); with SMS_RATE_LIMITER=database
+        the bucket is shared by every process sending from the same number. SMS_BURST,
+        SMS_MAX_WAIT_SECONDS and SMS_MAX_RETRIES also come from the app config.
+        """
+        config = current_app.config
+        if client is None:
+            account_sid = config.get('TWILIO_ACCOUNT_SID')
+            auth_token = config.get('TWILIO_AUTH_TOKEN')
+
+            if not account_sid or not auth_token:
+                raise ValueError('Twilio credentials are not set correctly')
+            # Pooled keep-alive session shared by every message sent through this client
+            client = Client(account_sid, auth_token, http_client=TwilioHttpClient(pool_connections=True, timeout=30))
+        self.client = client
+        self.from_phone = from_phone or config.get('TWILIO_PHONE_NUMBER')
+        rate_per_second = rate_per_second or config.get('SMS_RATE_PER_SECOND', 1)
+        burst = burst or config.get('SMS_BURST', 1)
+        if config.get('SMS_RATE_LIMITER', 'database') == 'database':
+            self.rate_limiter = DatabaseTokenBucket(db.engine, f"sms:{self.from_phone}", rate_per_second, burst)
+        else:
+            self.rate_limiter = TokenBucket(rate_per_second, burst)
+        self.max_wait = config.get('SMS_MAX_WAIT_SECONDS', 60)
+        self.max_retries = config.get('SMS_MAX_RETRIES', 2)
+        self.template_manager = sms_templates
+
+    def send_sms(self, data, max_wait: float = None):
+        """
+        Send the templated message described by `data` and return its SID, or None on
+        failure. Gives up without sending when no rate-limit slot frees up within
+        `max_wait` seconds (SMS_MAX_WAIT_SECONDS by default).
+        """
         try:
-            from_phone = os.getenv('TWILIO_FROM_PHONE')
             to_phone = data.get('phone_number')
 
-            # Message
-            template_name = data.get("template")
-            message_body = self.template_manager.load_template(template_name, data)
+            # Message, unless already rendered by SmsTemplateManager.render_batch
+            message_body = data.get("body") or self.template_manager.load_template(data.get("template"), data)
+            segments = data.get("segments") or sms_segments(message_body)[1]
 
-            if not from_phone:
+            if not self.from_phone:
                 raise ValueError('Invalid sender phone number')
             if not to_phone:
                 raise ValueError('Invalid recipient phone number')
 
-            message = self.client.messages.create(
-                body=message_body,
-                from_=from_phone,
-                to=to_phone
-            )
+            for attempt in range(self.max_retries + 1):
+                # Sender throughput is counted in segments, not messages
+                if not self.rate_limiter.acquire(max_wait=self.max_wait if max_wait is None else max_wait, tokens=segments):
+                    logger.warning(f"SmsService [send_sms]: Rate limit wait too long, SMS to {to_phone} not sent")
+                    return None
+                try:
+                    with metrics.dependency("twilio", "send_sms"):
+                        message = self.client.messages.create(
+                            body=message_body,
+                            from_=self.from_phone,
+                            to=to_phone
+                        )
+                    break
+                except TwilioRestException as e:
+                    if e.status != 429 or attempt == self.max_retries:
+                        raise
+                    # Slow every sender down, not just this thread
+                    backoff = RETRY_BACKOFF_SECONDS * 2 ** attempt
+                    logger.warning(f"SmsService [send_sms]: Twilio returned 429, backing off {backoff}s")
+                    self.rate_limiter.pause(backoff)
 
             logger.info(f"SmsService [send_sms]: SMS sent to {to_phone}, SID: {message.sid}")
             return message.sid
         except Exception as e:
             logger.error(f"SmsService [send_sms]: Error sending SMS: {str(e)}")
-            return None
\ No newline at end of file
+            return None
+
+    def estimate_seconds(self, segments: int) -> float:
+        """Time the rate limiter needs to let `segments` segments through."""
+        return segments / self.rate_limiter.rate
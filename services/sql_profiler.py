@@ -0,0 +1,223 @@
+"""
+Opt-in SQL profiler. A profiled request logs its query count, statements repeated
+often enough to look like N+1 loops and the EXPLAIN plan of slow SELECTs, and
+returns a short summary in the X-SQL-Profile response header. assert_max_queries()
+reuses the same bookkeeping to catch query-count regressions in tests and benchmarks.
+"""
+import re
+import time
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from flask import request
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+PROFILER_MODES = ("off", "header", "always")
+STATEMENT_LOG_LENGTH = 300
+
+# Profiles collecting the current context's queries; nested profiles all see them
+_active_profiles = ContextVar("active_profiles", default=())
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*(?:\?|%\(\w+\)s|%s|:\w+)(?:\s*,\s*(?:\?|%\(\w+\)s|%s|:\w+))*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint(statement: str) -> str:
+    """`statement` with literals and IN lists collapsed, so repeats of one query compare equal."""
+    normalized = _STRING_LITERAL.sub("?", statement)
+    normalized = _NUMBER_LITERAL.sub("?", normalized)
+    normalized = _PLACEHOLDER_LIST.sub("(...)", normalized)
+    return _WHITESPACE.sub(" ", normalized).strip()
+
+
+def explain(connection, statement: str, parameters):
+    """EXPLAIN plan rows for a SELECT, run on the raw DBAPI connection so no events fire."""
+    if not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+        return None
+    prefix = "EXPLAIN QUERY PLAN " if connection.dialect.name == "sqlite" else "EXPLAIN "
+    cursor = connection.connection.cursor()
+    try:
+        cursor.execute(prefix + statement, parameters or ())
+        # The plan text is the last column (SQLite prefixes node ids, PostgreSQL has one column)
+        return [str(row[-1]) for row in cursor.fetchall()]
+    except Exception as e:
+        logger.debug(f"EXPLAIN failed: {e}")
+        return None
+    finally:
+        cursor.close()
+
+
+class QueryProfile:
+    """Queries seen while the profile was active, grouped by fingerprint."""
+
+    def __init__(self, slow_ms: float = 100, repeat_threshold: int = 5, explain_slow: bool = True):
+        self.slow_ms = slow_ms
+        self.repeat_threshold = repeat_threshold
+        self.explain_slow = explain_slow
+        self.queries = 0
+        self.duration = 0.0
+        self.fingerprints = {}  # fingerprint -> [count, seconds]
+        self.slow = []
+
+    def record(self, statement: str, elapsed: float, plan=None):
+        self.queries += 1
+        self.duration += elapsed
+        stats = self.fingerprints.setdefault(fingerprint(statement), [0, 0.0])
+        stats[0] += 1
+        stats[1] += elapsed
+        if elapsed * 1000 >= self.slow_ms:
+            self.slow.append({"statement": statement, "duration_ms": round(elapsed * 1000, 2), "plan": plan})
+
+    def repeated(self) -> list:
+        """(fingerprint, count, seconds) of statements run at least repeat_threshold times, most frequent first."""
+        return sorted(
+            ((fp, count, seconds) for fp, (count, seconds) in self.fingerprints.items() if count >= self.repeat_threshold),
+            key=lambda item: item[1],
+            reverse=True,
+        )
+
+    def summary(self) -> dict:
+        return {
+            "queries": self.queries,
+            "distinct": len(self.fingerprints),
+            "duration_ms": round(self.duration * 1000, 2),
+            "repeated": [{"statement": fp, "count": count} for fp, count, _ in self.repeated()],
+            "slow": self.slow,
+        }
+
+    def header_value(self) -> str:
+        return (
+            f"queries={self.queries}; distinct={len(self.fingerprints)}; "
+            f"duration_ms={self.duration * 1000:.2f}; repeated={len(self.repeated())}; slow={len(self.slow)}"
+        )
+
+
+class SqlProfiler:
+    """
+    SQL_PROFILER_MODE picks which requests are profiled: "off", "header" (requests
+    sending SQL_PROFILER_HEADER) or "always". Engine listeners stay installed in
+    every mode but cost a context variable lookup per query when nothing is profiling.
+    """
+
+    def __init__(self):
+        self.mode = "off"
+        self.header = "X-SQL-Profile"
+        self.slow_ms = 100.0
+        self.repeat_threshold = 5
+
+    def init_app(self, app):
+        self.mode = app.config.get("SQL_PROFILER_MODE", "off")
+        if self.mode not in PROFILER_MODES:
+            raise ValueError(f"SQL_PROFILER_MODE must be one of {PROFILER_MODES}, got '{self.mode}'")
+        self.header = app.config.get("SQL_PROFILER_HEADER", self.header)
+        self.slow_ms = app.config.get("SQL_PROFILER_SLOW_MS", self.slow_ms)
+        self.repeat_threshold = app.config.get("SQL_PROFILER_REPEAT_THRESHOLD", self.repeat_threshold)
+        if self.mode != "off":
+            app.before_request(self._start_request)
+            app.after_request(self._finish_request)
+            app.teardown_request(self._reset_request)
+        app.extensions["sql_profiler"] = self
+
+    def instrument_engine(self, engine):
+        @event.listens_for(engine, "before_cursor_execute")
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            if _active_profiles.get():
+                conn.info.setdefault("profiler_query_start", []).append(time.perf_counter())
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            profiles = _active_profiles.get()
+            if not profiles or not conn.info.get("profiler_query_start"):
+                return
+            elapsed = time.perf_counter() - conn.info["profiler_query_start"].pop()
+            plan = None
+            if not executemany and any(p.explain_slow and elapsed * 1000 >= p.slow_ms for p in profiles):
+                plan = explain(conn, statement, parameters)
+            for profile in profiles:
+                profile.record(statement, elapsed, plan)
+
+        @event.listens_for(engine, "handle_error")
+        def handle_error(exception_context):
+            connection = exception_context.connection
+            if connection is not None and connection.info.get("profiler_query_start"):
+                connection.info["profiler_query_start"].pop()
+
+    @contextmanager
+    def profile(self, slow_ms: float = None, repeat_threshold: int = None, explain_slow: bool = True):
+        """Collect the queries run inside the block into the yielded QueryProfile."""
+        profile = QueryProfile(
+            slow_ms=self.slow_ms if slow_ms is None else slow_ms,
+            repeat_threshold=self.repeat_threshold if repeat_threshold is None else repeat_threshold,
+            explain_slow=explain_slow,
+        )
+        token = _active_profiles.set(_active_profiles.get() + (profile,))
+        try:
+            yield profile
+        finally:
+            _active_profiles.reset(token)
+
+    def _wants_profile(self) -> bool:
+        if self.mode == "always":
+            return True
+        return request.headers.get(self.header, "").lower() in ("1", "true", "yes")
+
+    def _start_request(self):
+        if not self._wants_profile():
+            return
+        profile = QueryProfile(slow_ms=self.slow_ms, repeat_threshold=self.repeat_threshold)
+        request.environ["sql_profiler.profile"] = profile
+        request.environ["sql_profiler.token"] = _active_profiles.set(_active_profiles.get() + (profile,))
+
+    def _finish_request(self, response):
+        profile = request.environ.get("sql_profiler.profile")
+        if profile is None:
+            return response
+        response.headers[self.header] = profile.header_value()
+        logger.info(f"SQL profile {request.method} {request.path}: {profile.header_value()}")
+        for statement, count, seconds in profile.repeated():
+            logger.warning(
+                f"Possible N+1 in {request.method} {request.path}: {count} executions "
+                f"({seconds * 1000:.2f} ms) of {statement[:STATEMENT_LOG_LENGTH]}"
+            )
+        for slow in profile.slow:
+            logger.warning(
+                f"Slow query in {request.method} {request.path} ({slow['duration_ms']} ms): "
+                f"{slow['statement'][:STATEMENT_LOG_LENGTH]}\nPlan: {slow['plan']}"
+            )
+        return response
+
+    def _reset_request(self, exception=None):
+        token = request.environ.pop("sql_profiler.token", None)
+        if token is not None:
+            _active_profiles.reset(token)
+
+
+sql_profiler = SqlProfiler()
+
+
+@contextmanager
+def assert_max_queries(limit: int, repeat_limit: int = None):
+    """
+    Fail with AssertionError when the block runs more than `limit` SQL statements, or
+    any one statement more than `repeat_limit` times. Works with the Flask test client.
+    """
+    with sql_profiler.profile(explain_slow=False) as profile:
+        yield profile
+    problems = []
+    if profile.queries > limit:
+        problems.append(f"{profile.queries} queries, expected at most {limit}")
+    if repeat_limit is not None:
+        problems += [
+            f"{count}x {statement[:STATEMENT_LOG_LENGTH]}"
+            for statement, (count, _) in profile.fingerprints.items() if count > repeat_limit
+        ]
+    if problems:
+        counts = "\n".join(
+            f"  {count}x {statement[:STATEMENT_LOG_LENGTH]}"
+            for statement, (count, _) in sorted(profile.fingerprints.items(), key=lambda item: -item[1][0])
+        )
+        raise AssertionError("; ".join(problems) + f"\nStatements:\n{counts}")
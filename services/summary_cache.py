@@ -0,0 +1,174 @@
+import json
+import time
+import hashlib
+import logging
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime, timezone, timedelta
+from sqlalchemy import select, insert, update
+from sqlalchemy.exc import IntegrityError
+
+from database import SummaryCacheEntry
+
+logger = logging.getLogger(__name__)
+
+
+def normalize(value) -> str:
+    """Case- and whitespace-insensitive form of a prompt input; None and blanks collapse to ''."""
+    return " ".join((value or "").split()).casefold()
+
+
+def summary_cache_key(model_name: str, prompt_version: str, **inputs) -> str:
+    """Content address for a summary: hash of the model, prompt version and normalized inputs."""
+    normalized = {name: normalize(value) for name, value in sorted(inputs.items())}
+    raw = json.dumps([model_name, prompt_version, normalized], separators=(",", ":"))
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class SummaryCache(ABC):
+    """Base class keeping hit/miss counters; subclasses implement _get and _set."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._counter_lock = threading.Lock()
+
+    def get(self, key: str):
+        try:
+            value = self._get(key)
+        except Exception as e:
+            logger.warning(f"Summary cache lookup failed: {e}")
+            value = None
+        with self._counter_lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key: str, summary: str):
+        try:
+            self._set(key, summary)
+        except Exception as e:
+            logger.warning(f"Summary cache store failed: {e}")
+
+    def stats(self) -> dict:
+        with self._counter_lock:
+            return {"backend": type(self).__name__, "hits": self.hits, "misses": self.misses}
+
+    @abstractmethod
+    def _get(self, key):
+        """The cached summary for `key`, or None."""
+
+    @abstractmethod
+    def _set(self, key, summary):
+        """Store `summary` under `key`."""
+
+
+class MemorySummaryCache(SummaryCache):
+    """In-process LRU with a per-entry TTL."""
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 86400):
+        super().__init__()
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            summary, stored_at = entry
+            if self.ttl_seconds > 0 and time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return summary
+
+    def _set(self, key, summary):
+        with self._lock:
+            self._entries[key] = (summary, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class DatabaseSummaryCache(SummaryCache):
+    """
+    Persistent cache in the summary_cache table, shared by every process.
+    Uses its own short transactions on `engine`, so the caller's session is never
+    committed and no app context is needed (e.g. in summarize_batch's threads).
+    """
+
+    def __init__(self, engine, ttl_seconds: float = 30 * 86400):
+        super().__init__()
+        self.engine = engine
+        self.ttl_seconds = ttl_seconds
+
+    @staticmethod
+    def _now():
+        return datetime.now(timezone.utc).replace(tzinfo=None)
+
+    def _get(self, key):
+        statement = select(SummaryCacheEntry.summary).where(SummaryCacheEntry.key_hash == key)
+        if self.ttl_seconds > 0:
+            statement = statement.where(SummaryCacheEntry.created_at >= self._now() - timedelta(seconds=self.ttl_seconds))
+        with self.engine.connect() as connection:
+            return connection.execute(statement).scalar()
+
+    def _set(self, key, summary):
+        values = {"summary": summary, "created_at": self._now()}
+        with self.engine.begin() as connection:
+            try:
+                with connection.begin_nested():
+                    connection.execute(insert(SummaryCacheEntry).values(key_hash=key, **values))
+            except IntegrityError:
+                connection.execute(
+                    update(SummaryCacheEntry).where(SummaryCacheEntry.key_hash == key).values(**values))
+
+
+class TieredSummaryCache(SummaryCache):
+    """Memory cache in front of the database cache; database hits are promoted to memory."""
+
+    def __init__(self, memory: MemorySummaryCache, database: DatabaseSummaryCache):
+        super().__init__()
+        self.memory = memory
+        self.database = database
+
+    def _get(self, key):
+        summary = self.memory.get(key)
+        if summary is None:
+            summary = self.database.get(key)
+            if summary is not None:
+                self.memory.set(key, summary)
+        return summary
+
+    def _set(self, key, summary):
+        self.memory.set(key, summary)
+        self.database.set(key, summary)
+
+
+def build_summary_cache(config, engine=None):
+    """
+    Build the cache selected by the app config's SUMMARY_CACHE_BACKEND: memory (default),
+    database, tiered (memory in front of database) or none. The database backends
+    store entries through `engine`.
+    """
+    backend = config.get('SUMMARY_CACHE_BACKEND', 'memory')
+    ttl_seconds = config.get('SUMMARY_CACHE_TTL', 86400)
+    max_entries = config.get('SUMMARY_CACHE_SIZE', 10000)
+
+    if backend == 'none':
+        return None
+    if backend == 'memory':
+        return MemorySummaryCache(max_entries, ttl_seconds)
+    if backend not in ('database', 'tiered'):
+        raise ValueError(f"Unknown SUMMARY_CACHE_BACKEND '{backend}'.")
+    if engine is None:
+        raise ValueError(f"SUMMARY_CACHE_BACKEND '{backend}' needs a database engine.")
+    if backend == 'database':
+        return DatabaseSummaryCache(engine, ttl_seconds)
+    return TieredSummaryCache(MemorySummaryCache(max_entries, ttl_seconds), DatabaseSummaryCache(engine, ttl_seconds))
@@ -0,0 +1,75 @@
+import os
+import re
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+PLACEHOLDER_PATTERN = re.compile(r"\{(\w+)\}")
+
+
+class CompiledTemplate:
+    """
+    A template pre-split into literal and `{placeholder}` segments.
+    Rendering fills the placeholder slots and joins the segments once, instead of
+    running one full-string replace per context key.
+    """
+
+    def __init__(self, source: str):
+        # re.split with one group alternates literal, name, literal, name, ..., literal
+        self._segments = PLACEHOLDER_PATTERN.split(source)
+        self._slots = [(index, self._segments[index]) for index in range(1, len(self._segments), 2)]
+        for index, name in self._slots:
+            # Unknown placeholders are left untouched, as str.replace would
+            self._segments[index] = f"{{{name}}}"
+        self.placeholders = frozenset(name for _, name in self._slots)
+
+    def render(self, context: dict) -> str:
+        segments = self._segments.copy()
+        for index, name in self._slots:
+            if name in context:
+                value = context[name]
+                segments[index] = "" if value is None else str(value)
+        return "".join(segments)
+
+
+class TemplateEngine:
+    """
+    Loads and compiles each template in `folder` once. A template is recompiled
+    when its file's mtime changes, checked at most every `check_interval` seconds.
+    """
+
+    def __init__(self, folder: str, check_interval: float = 2.0):
+        self.folder = os.path.realpath(folder)
+        self.check_interval = check_interval
+        self._cache = {}  # name -> (CompiledTemplate, mtime, checked_at)
+        self._lock = threading.Lock()
+
+    def _path(self, name: str) -> str:
+        path = os.path.realpath(os.path.join(self.folder, name))
+        if os.path.commonpath([path, self.folder]) != self.folder:
+            raise PermissionError(f"Template '{name}' is outside the templates folder.")
+        return path
+
+    def get(self, name: str) -> CompiledTemplate:
+        now = time.monotonic()
+        entry = self._cache.get(name)
+        if entry is not None and now - entry[2] < self.check_interval:
+            return entry[0]
+
+        path = self._path(name)
+        mtime = os.stat(path).st_mtime_ns
+        with self._lock:
+            entry = self._cache.get(name)
+            if entry is not None and entry[1] == mtime:
+                self._cache[name] = (entry[0], mtime, now)
+                return entry[0]
+            with open(path) as f:
+                compiled = CompiledTemplate(f.read())
+            self._cache[name] = (compiled, mtime, now)
+            logger.info(f"Compiled email template '{name}'.")
+            return compiled
+
+    def render(self, name: str, context: dict) -> str:
+        return self.get(name).render(context)
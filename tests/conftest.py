@@ -0,0 +1,39 @@
+import pytest
+
+from app import create_app
+from database import db
+from services.registry import service_registry, ServiceRegistry
+from services.occupancy_cache import occupancy_cache
+
+
+@pytest.fixture
+def app_config():
+    """Config overrides for the `app` fixture; override this fixture in a test module to change them."""
+    return {}
+
+
+@pytest.fixture
+def app(tmp_path, app_config):
+    """An app on a throwaway SQLite database with the schema created, inside an app context."""
+    app = create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'test.db'}",
+        "SQLALCHEMY_ENGINE_OPTIONS": {},
+        "SQLALCHEMY_BINDS": {},
+        **app_config,
+    })
+    with app.app_context():
+        db.create_all()
+        occupancy_cache.clear()
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+    occupancy_cache.clear()
+
+
+@pytest.fixture
+def services():
+    """The service registry; factories registered by a test are restored to the real services afterwards."""
+    yield service_registry
+    for name, factory in ServiceRegistry.DEFAULT_FACTORIES.items():
+        service_registry.register(name, factory)
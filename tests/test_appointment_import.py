@@ -0,0 +1,61 @@
+import pytest
+
+import services.appointment_import
+from database import db, Doctor
+from services.appointment_import import import_appointments
+from services.doctor_schedule import schedule_store
+
+
+def record():
+    return {
+        "patient_name": "Abebe Kebede",
+        "patient_email": "abebe@example.com",
+        "patient_phone": "+251911000000",
+        "date_of_birth": "1990-01-01",
+        "symptoms": "Headache",
+        "preferred_doctor": "Dr. Lee",
+        "appointment_time": "2030-03-04T09:00:00",
+    }
+
+
+@pytest.mark.parametrize("options", [{"check_schedule": "false"}, {"dry_run": "true"}, {"check_schedule": 0}])
+def test_flags_must_be_booleans(app, options):
+    response = app.test_client().post("/api/appointments/import", json={"appointments": [record()], **options})
+
+    assert response.status_code == 400
+    assert "must be true or false" in response.get_json()["message"]
+
+
+def test_boolean_flags_are_accepted(app):
+    response = app.test_client().post(
+        "/api/appointments/import", json={"appointments": [record()], "check_schedule": False, "dry_run": True})
+
+    assert response.status_code == 200
+    assert response.get_json()["data"]["valid"] == 1
+
+
+def test_slots_booked_before_the_import_are_reported(app, monkeypatch):
+    monkeypatch.setattr(services.appointment_import, "TAKEN_SLOTS_QUERY_SIZE", 1)
+    schedule_store.invalidate()
+    import_appointments([record()])
+    later = dict(record(), appointment_time="2031-03-04T09:00:00")
+
+    result = import_appointments([later, record()])
+
+    assert result["imported"] == 1
+    assert result["errors"] == [{"row": 1, "errors": {"appointment_time": ["Time slot already booked."]}}]
+
+
+def test_inactive_doctors_are_accepted_only_without_the_schedule_check(app):
+    db.session.add_all([Doctor(name="Dr. Lee", active=True), Doctor(name="Dr. Retired", active=False)])
+    db.session.commit()
+    schedule_store.invalidate()
+    former = dict(record(), preferred_doctor="Dr. Retired")
+
+    checked = import_appointments([former], dry_run=True)
+    unchecked = import_appointments([former], check_schedule=False)
+    unknown = import_appointments([dict(record(), preferred_doctor="Dr. Nobody")], check_schedule=False)
+
+    assert checked["errors"][0]["errors"] == {"preferred_doctor": ["Unknown doctor. Available doctors: ['Dr. Lee']"]}
+    assert unchecked["imported"] == 1
+    assert unknown["imported"] == 0
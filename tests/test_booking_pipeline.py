@@ -0,0 +1,177 @@
+import os
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+import services.job_handlers  # noqa: F401  registers the job handlers
+from database import db, Appointment, BookingStatus, Job, JobStatus
+from services.fakes import FakeGenerativeModel, FakeCalendarApi, FakeSendGridClient, FakeTwilioClient
+from services.gcal_service import GoogleCalendarService
+from services.gemini_service import GeminiService
+from services.email_service import EmailService
+from services.sms_service import SmsService
+from services.job_queue import enqueue, claim_jobs, run_job, utcnow
+from services.booking_pipeline import expire_stale_bookings, process_booking, booking_pipeline
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SLOT = datetime(2030, 3, 4, 9, 0)
+
+
+class FlakySendGridClient(FakeSendGridClient):
+    """Fails the first `failures` sends, like a SendGrid outage."""
+
+    def __init__(self, failures):
+        super().__init__()
+        self.failures = failures
+
+    def send(self, message):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("SendGrid unavailable")
+        return super().send(message)
+
+
+@pytest.fixture
+def calendar(services):
+    calendar = FakeCalendarApi()
+    services.register("gemini", lambda: GeminiService(model=FakeGenerativeModel()))
+    services.register("calendar", lambda: GoogleCalendarService(service=calendar))
+    return calendar
+
+
+def use_email_client(services, client):
+    services.register("email", lambda: EmailService(
+        client=client, templates_folder=os.path.join(ROOT, "email-templates"), from_email="clinic@example.com",
+    ))
+
+
+def pending_booking(max_attempts=5, queued=True, age=timedelta(0), slot=SLOT):
+    appointment = Appointment(
+        patient_name="Abebe Kebede",
+        patient_email="abebe@example.com",
+        patient_phone="+251911000000",
+        date_of_birth=datetime(1990, 1, 1),
+        symptoms="Headache",
+        appointment_time=slot,
+        preferred_doctor="Dr. Lee",
+        booking_status=BookingStatus.PENDING.value,
+        created_at=utcnow() - age,
+    )
+    db.session.add(appointment)
+    db.session.commit()
+    if not queued:
+        return appointment.id, None
+    job = enqueue("booking.process", {"appointment_id": appointment.id}, max_attempts=max_attempts)
+    return appointment.id, job.id
+
+
+def run_due_job(job_id):
+    db.session.execute(db.update(Job).where(Job.id == job_id).values(run_at=utcnow()))
+    db.session.commit()
+    [job] = claim_jobs("test-worker", kinds=["booking.process"])
+    return run_job(job)
+
+
+def test_transient_failure_is_retried_and_leaves_the_booking_pending(app, services, calendar):
+    use_email_client(services, FlakySendGridClient(failures=1))
+    appointment_id, job_id = pending_booking(max_attempts=3)
+
+    assert run_due_job(job_id) is False
+    assert db.session.get(Job, job_id).status == JobStatus.QUEUED.value
+    assert db.session.get(Appointment, appointment_id).booking_status == BookingStatus.PENDING.value
+    assert calendar.list_events()["items"] == []  # the event of the failed attempt was deleted
+
+    assert run_due_job(job_id) is True
+    appointment = db.session.get(Appointment, appointment_id)
+    assert appointment.booking_status == BookingStatus.CONFIRMED.value
+    assert appointment.google_calendar_event_id is not None
+
+
+def test_booking_is_marked_failed_after_its_last_attempt(app, services, calendar):
+    use_email_client(services, FlakySendGridClient(failures=2))
+    appointment_id, job_id = pending_booking(max_attempts=2)
+
+    run_due_job(job_id)
+    assert db.session.get(Appointment, appointment_id).booking_status == BookingStatus.PENDING.value
+    run_due_job(job_id)
+
+    assert db.session.get(Job, job_id).status == JobStatus.FAILED.value
+    assert db.session.get(Appointment, appointment_id).booking_status == BookingStatus.FAILED.value
+
+
+def test_stale_pending_bookings_without_a_job_are_expired(app):
+    orphaned, _ = pending_booking(queued=False, age=timedelta(minutes=30))
+    waiting_for_retry, _ = pending_booking(age=timedelta(minutes=30), slot=SLOT + timedelta(hours=1))
+    in_flight, _ = pending_booking(queued=False, age=timedelta(minutes=1), slot=SLOT + timedelta(hours=2))
+
+    assert expire_stale_bookings(timeout_minutes=15) == 1
+
+    assert db.session.get(Appointment, orphaned).booking_status == BookingStatus.FAILED.value
+    assert db.session.get(Appointment, waiting_for_retry).booking_status == BookingStatus.PENDING.value
+    assert db.session.get(Appointment, in_flight).booking_status == BookingStatus.PENDING.value
+    assert expire_stale_bookings(timeout_minutes=15) == 0
+
+
+class CancellingSendGridClient(FakeSendGridClient):
+    """Cancels the doctor's day through the API while the confirmation email is being sent."""
+
+    def __init__(self, client):
+        super().__init__()
+        self.client = client
+
+    def send(self, message):
+        response = self.client.post("/api/appointments/cancel-day", json={"doctor": "Dr. Lee", "date": SLOT.date().isoformat()})
+        assert response.status_code == 200
+        return super().send(message)
+
+
+def test_booking_cancelled_while_it_is_processed_stays_cancelled(app, services, calendar):
+    use_email_client(services, CancellingSendGridClient(app.test_client()))
+    appointment_id, _ = pending_booking(queued=False)
+
+    assert process_booking(appointment_id) == BookingStatus.CANCELLED.value
+
+    db.session.expire_all()
+    assert db.session.get(Appointment, appointment_id).booking_status == BookingStatus.CANCELLED.value
+    assert calendar.list_events()["items"] == []
+
+
+@pytest.mark.parametrize("app_config, queued", [
+    ({"SMS_CONFIRMATIONS": True, "BOOKING_PIPELINE_BACKEND": "queue"}, 1),
+    ({"SMS_CONFIRMATIONS": True, "BOOKING_PIPELINE_BACKEND": "thread"}, 0),
+])
+def test_unsent_confirmation_sms_is_queued_only_with_the_queue_backend(app, services, calendar, queued):
+    use_email_client(services, FakeSendGridClient())
+    # A burst of 1 already spent and a 5 second wait: the text misses the rate limiter
+    services.register("sms", lambda: SmsService(client=FakeTwilioClient(), from_phone="+15550000000", rate_per_second=0.01))
+    services.sms.rate_limiter.acquire(max_wait=0)
+    appointment_id, _ = pending_booking(queued=False)
+
+    assert process_booking(appointment_id) == BookingStatus.CONFIRMED.value
+    assert db.session.query(Job).filter(Job.kind == "sms.confirmation").count() == queued
+
+
+def test_synchronous_bookings_sweep_stale_pending_bookings(app, services, calendar):
+    use_email_client(services, FakeSendGridClient())
+    orphaned, _ = pending_booking(queued=False, age=timedelta(minutes=30))
+
+    response = app.test_client().post("/api/appointments", json={
+        "patient_name": "Abebe Kebede",
+        "patient_phone": "+251911000000",
+        "patient_email": "abebe@example.com",
+        "date_of_birth": "1990-01-01",
+        "symptoms": "Headache",
+        "preferred_doctor": "Dr. Lee",
+        "appointment_date": SLOT.date().isoformat(),
+        "time_slot": "10:00",
+    })
+    assert response.status_code == 201
+
+    # The sweep runs on the pipeline's threads
+    deadline = time.monotonic() + 5
+    while db.session.get(Appointment, orphaned).booking_status == BookingStatus.PENDING.value and time.monotonic() < deadline:
+        time.sleep(0.05)
+        db.session.expire_all()
+    assert db.session.get(Appointment, orphaned).booking_status == BookingStatus.FAILED.value
+    assert booking_pipeline.maybe_sweep() is None  # at most once per PENDING_SWEEP_SECONDS
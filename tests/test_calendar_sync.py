@@ -0,0 +1,156 @@
+import os
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from database import db, Appointment, BookingStatus, CalendarSyncState
+from services.fakes import FakeCalendarApi, FakeSendGridClient
+from services.email_service import EmailService
+from services.gcal_service import GoogleCalendarService, SyncTokenExpired
+from services.booking_pipeline import CLINIC_TIMEZONE
+from services.calendar_sync import sync_calendar
+from services.reminder_service import send_due_reminders
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+NINE = datetime(2030, 3, 4, 9, 0)
+TEN = datetime(2030, 3, 4, 10, 0)
+ELEVEN = datetime(2030, 3, 4, 11, 0)
+
+
+def local_start(appointment_time: datetime) -> dict:
+    return {"dateTime": appointment_time.replace(tzinfo=ZoneInfo(CLINIC_TIMEZONE)).isoformat()}
+
+
+@pytest.fixture
+def calendar():
+    return FakeCalendarApi()
+
+
+@pytest.fixture
+def calendar_service(calendar):
+    return GoogleCalendarService(service=calendar)
+
+
+def book(calendar, appointment_time, doctor="Dr. Lee", event=True):
+    """A confirmed appointment, with its calendar event unless `event` is False."""
+    event_id = calendar.insert_event({"start": local_start(appointment_time)})["id"] if event else "gone"
+    appointment = Appointment(
+        patient_name="Abebe Kebede",
+        patient_email="abebe@example.com",
+        patient_phone="+251911000000",
+        date_of_birth=datetime(1990, 1, 1),
+        symptoms="Headache",
+        appointment_time=appointment_time,
+        preferred_doctor=doctor,
+        booking_status=BookingStatus.CONFIRMED.value,
+        google_calendar_event_id=event_id,
+        reminder_sent=True,
+    )
+    db.session.add(appointment)
+    db.session.commit()
+    return appointment
+
+
+def test_first_sync_is_full_and_stores_the_token(app, calendar, calendar_service):
+    book(calendar, NINE)
+
+    stats = sync_calendar(calendar_service)
+
+    assert stats["full_sync"] is True
+    assert stats["events"] == 1
+    state = db.session.get(CalendarSyncState, calendar_service.calendar_id)
+    assert state.sync_token is not None
+    assert state.last_full_sync_at is not None
+
+
+def test_incremental_sync_only_pulls_changes_since_the_token(app, calendar, calendar_service):
+    book(calendar, NINE)
+    moved = book(calendar, TEN)
+    sync_calendar(calendar_service)
+
+    calendar.patch_event(moved.google_calendar_event_id, {"start": local_start(ELEVEN)})
+    stats = sync_calendar(calendar_service)
+
+    assert stats["full_sync"] is False
+    assert stats["events"] == 1
+    assert stats["moved"] == 1
+    db.session.refresh(moved)
+    assert moved.appointment_time == ELEVEN
+    assert moved.reminder_sent is False
+
+    assert sync_calendar(calendar_service)["events"] == 0
+
+
+def test_deleted_event_cancels_the_appointment(app, calendar, calendar_service):
+    appointment = book(calendar, NINE)
+    sync_calendar(calendar_service)
+
+    calendar.delete_event(appointment.google_calendar_event_id)
+    stats = sync_calendar(calendar_service)
+
+    assert stats["cancelled"] == 1
+    db.session.refresh(appointment)
+    assert appointment.booking_status == BookingStatus.CANCELLED.value
+
+
+def test_expired_token_falls_back_to_a_full_sync(app, calendar, calendar_service):
+    kept = book(calendar, NINE)
+    sync_calendar(calendar_service)
+    # Created after the last sync, with an event that no longer exists
+    orphaned = book(calendar, TEN, event=False)
+    calendar.expire_sync_tokens()
+
+    with pytest.raises(SyncTokenExpired):
+        next(calendar_service.list_event_changes(db.session.get(CalendarSyncState, calendar_service.calendar_id).sync_token))
+    stats = sync_calendar(calendar_service)
+
+    assert stats["full_sync"] is True
+    assert stats["cancelled"] == 1
+    db.session.refresh(kept)
+    db.session.refresh(orphaned)
+    assert kept.booking_status == BookingStatus.CONFIRMED.value
+    assert orphaned.booking_status == BookingStatus.CANCELLED.value
+    assert sync_calendar(calendar_service)["full_sync"] is False
+
+
+def test_move_onto_a_booked_slot_keeps_the_appointment_and_applies_the_rest(app, calendar, calendar_service):
+    blocked = book(calendar, NINE)
+    occupant = book(calendar, TEN)
+    cancelled = book(calendar, ELEVEN)
+    sync_calendar(calendar_service)
+
+    # One page: a move onto the occupied 10:00 slot and an unrelated cancellation
+    calendar.patch_event(blocked.google_calendar_event_id, {"start": local_start(TEN)})
+    calendar.delete_event(cancelled.google_calendar_event_id)
+    stats = sync_calendar(calendar_service)
+
+    assert stats["conflicts"] == 1
+    assert stats["moved"] == 0
+    assert stats["cancelled"] == 1
+    for appointment in (blocked, occupant, cancelled):
+        db.session.refresh(appointment)
+    assert blocked.appointment_time == NINE
+    assert occupant.appointment_time == TEN
+    assert cancelled.booking_status == BookingStatus.CANCELLED.value
+
+
+def test_moved_appointment_is_reminded_again_for_its_new_time(app, services, calendar, calendar_service):
+    services.register("email", lambda: EmailService(
+        client=FakeSendGridClient(), templates_folder=os.path.join(ROOT, "email-templates"), from_email="clinic@example.com",
+    ))
+    now = datetime.now(ZoneInfo(CLINIC_TIMEZONE)).replace(tzinfo=None, second=0, microsecond=0)
+    appointment = book(calendar, now + timedelta(hours=6))
+    appointment.email_reminder_sent_at = datetime.utcnow()
+    db.session.commit()
+    sync_calendar(calendar_service)
+
+    calendar.patch_event(appointment.google_calendar_event_id, {"start": local_start(now + timedelta(hours=3))})
+    assert sync_calendar(calendar_service)["moved"] == 1
+    stats = send_due_reminders(channels=["email"])
+
+    assert stats["sent"] == 1
+    db.session.refresh(appointment)
+    assert appointment.reminder_sent is True
+    assert appointment.email_reminder_sent_at is not None
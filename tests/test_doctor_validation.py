@@ -0,0 +1,80 @@
+from datetime import date, timedelta
+
+import pytest
+
+from database import db, Doctor
+from services.doctor_schedule import schedule_store
+from services.occupancy_cache import OccupancyCache
+
+
+def add_doctor(name, active):
+    db.session.add(Doctor(name=name, active=active))
+    db.session.commit()
+    schedule_store.invalidate()
+
+
+def test_booking_a_time_without_active_doctors_is_a_conflict(app):
+    add_doctor("Dr. Retired", active=False)
+
+    response = app.test_client().post("/api/appointments", json={
+        "patient_name": "Abebe Kebede",
+        "patient_phone": "+251911000000",
+        "patient_email": "abebe@example.com",
+        "date_of_birth": "1990-01-01",
+        "symptoms": "Headache",
+        "appointment_date": "2030-03-04",
+        "time_slot": "09:00 AM",
+    })
+
+    assert response.status_code == 409
+    assert response.get_json()["message"] == "No doctors are currently accepting appointments"
+
+
+def test_cancel_day_rejects_unknown_doctors_but_not_inactive_ones(app):
+    add_doctor("Dr. Retired", active=False)
+    client = app.test_client()
+
+    unknown = client.post("/api/appointments/cancel-day", json={"doctor": "Dr. Nobody", "date": "2030-03-04"})
+    inactive = client.post("/api/appointments/cancel-day", json={"doctor": "Dr. Retired", "date": "2030-03-04"})
+
+    assert unknown.status_code == 400
+    assert inactive.status_code == 200
+
+
+def test_occupancy_cache_holds_a_30_day_search_over_200_doctors(app):
+    cache = OccupancyCache()
+    doctors = [f"Dr. {index}" for index in range(200)]
+    start = date(2030, 3, 4)
+
+    cache.get_masks(doctors, start, start + timedelta(days=30))
+    cache.get_masks(doctors, start, start + timedelta(days=30))
+
+    assert cache.stats()["hits"] == 1
+
+
+def test_doctor_active_flag_must_be_a_boolean(app):
+    client = app.test_client()
+    weekly_hours = {"mon": [["9:00", "12:00"]]}
+
+    rejected = client.post("/api/doctors", json={"name": "Dr. Retired", "weekly_hours": weekly_hours, "active": "false"})
+    accepted = client.post("/api/doctors", json={"name": "Dr. Retired", "weekly_hours": weekly_hours, "active": False})
+
+    assert rejected.status_code == 400
+    assert accepted.status_code == 201
+    assert db.session.query(Doctor.active).filter_by(name="Dr. Retired").scalar() is False
+
+
+@pytest.mark.parametrize("doctors", [5, {"name": "Dr. Lee"}, ["Dr. Lee", 5]])
+def test_availability_calendar_rejects_doctors_that_are_not_names(app, doctors):
+    response = app.test_client().post("/api/available-slots/calendar", json={"start_date": "2030-03-04", "doctors": doctors})
+
+    assert response.status_code == 400
+
+
+def test_availability_calendar_accepts_a_single_doctor_name(app):
+    schedule_store.invalidate()
+
+    response = app.test_client().post("/api/available-slots/calendar", json={"start_date": "2030-03-04", "doctors": "Dr. Lee"})
+
+    assert response.status_code == 200
+    assert list(response.get_json()["data"]["availability"]) == ["Dr. Lee"]
@@ -0,0 +1,128 @@
+import json
+import itertools
+from datetime import datetime, timedelta
+
+import pytest
+
+from database import db, Appointment
+from services.fakes import FakeGenerativeModel, FakeResponse
+from services.gemini_service import GeminiService, FALLBACK_SUMMARY, parse_batch_response
+from scripts.backfill_summaries import backfill_summaries
+
+
+class ScriptedModel(FakeGenerativeModel):
+    """Answers batch prompts with `batch_reply(expected JSON items)`; single prompts as the fake does."""
+
+    def __init__(self, batch_reply):
+        super().__init__()
+        self.batch_reply = batch_reply
+        self.batch_calls = 0
+
+    def generate_content(self, prompt, **kwargs):
+        response = super().generate_content(prompt, **kwargs)
+        if "generation_config" not in kwargs:
+            return response
+        self.batch_calls += 1
+        return FakeResponse(self.batch_reply(json.loads(response.text)))
+
+
+def patients(count):
+    return [{"symptoms": f"Fever for {day} days"} for day in range(count)]
+
+
+def expected(count):
+    return [f"Patient reports Fever for {day} days." for day in range(count)]
+
+
+@pytest.mark.parametrize("text, summaries", [
+    ('[{"id": 1, "summary": " b "}, {"id": 0, "summary": "a"}]', ["a", "b"]),
+    ('```json\n[{"id": 0, "summary": "a"}, {"id": 1, "summary": "b"}]\n```', ["a", "b"]),
+    ('[{"id": 0, "summary": "a"}]', ["a", None]),
+    ('[{"id": 0, "summary": ""}, {"id": 5, "summary": "x"}, "b", {"id": "1", "summary": "b"}]', [None, None]),
+    ('{"id": 0, "summary": "a"}', [None, None]),
+    ('Here are your summaries', [None, None]),
+])
+def test_parse_batch_response(text, summaries):
+    assert parse_batch_response(text, 2) == summaries
+
+
+def test_summarize_batch_packs_patients_into_requests(app):
+    model = FakeGenerativeModel()
+    service = GeminiService(model=model)
+
+    assert service.summarize_batch(patients(7), batch_size=3) == expected(7)
+    assert model.calls == 3
+
+    model.calls = 0
+    assert service.summarize_batch(patients(7), batch_size=3) == expected(7)
+    assert model.calls == 0
+
+
+def test_patients_missing_from_a_short_response_are_summarized_one_by_one(app):
+    model = ScriptedModel(lambda items: json.dumps(items[:-1]))
+    service = GeminiService(model=model)
+
+    assert service.summarize_batch(patients(6), batch_size=3) == expected(6)
+    assert model.batch_calls == 2
+    assert model.calls == 2 + 2
+
+
+def test_malformed_response_falls_back_to_one_request_per_patient(app):
+    model = ScriptedModel(lambda items: json.dumps(items)[:-10])
+    service = GeminiService(model=model)
+
+    assert service.summarize_batch(patients(4), batch_size=4) == expected(4)
+    assert model.calls == 1 + 4
+
+
+SLOTS = (datetime(2030, 3, 4, 9, 0) + timedelta(hours=hour) for hour in itertools.count())
+
+
+def add_appointment(symptoms, summary=None):
+    appointment = Appointment(
+        patient_name="Abebe Kebede",
+        patient_email="abebe@example.com",
+        patient_phone="+251911000000",
+        date_of_birth=datetime(1990, 1, 1),
+        symptoms=symptoms,
+        summary=summary,
+        appointment_time=next(SLOTS),
+        preferred_doctor="Dr. Lee",
+    )
+    db.session.add(appointment)
+    return appointment
+
+
+def test_backfill_walks_every_stale_appointment_in_chunks(app):
+    stale = [add_appointment(f"Fever for {day} days") for day in range(5)]
+    stale.append(add_appointment("Cough", summary=FALLBACK_SUMMARY))
+    done = add_appointment("Rash", summary="Already summarized.")
+    db.session.commit()
+
+    # Fails every request, so no summary is written and the loop must still end
+    class DownModel(FakeGenerativeModel):
+        def generate_content(self, prompt, **kwargs):
+            raise ConnectionError("Gemini unavailable")
+
+    assert backfill_summaries(GeminiService(model=DownModel()), chunk_size=2)["updated"] == 0
+
+    stats = backfill_summaries(GeminiService(model=FakeGenerativeModel()), chunk_size=2, batch_size=2)
+
+    assert stats["processed"] == stats["updated"] == 6
+    for appointment in stale + [done]:
+        db.session.refresh(appointment)
+    assert [a.summary for a in stale] == expected(5) + ["Patient reports Cough."]
+    assert done.summary == "Already summarized."
+    assert backfill_summaries(GeminiService(model=FakeGenerativeModel()), chunk_size=2)["processed"] == 0
+
+
+def test_backfill_regenerate_all_respects_the_limit(app):
+    appointments = [add_appointment(f"Fever for {day} days", summary="Old prompt.") for day in range(5)]
+    db.session.commit()
+
+    stats = backfill_summaries(GeminiService(model=FakeGenerativeModel()), chunk_size=2, regenerate_all=True, limit=3)
+
+    assert stats["processed"] == stats["updated"] == 3
+    for appointment in appointments:
+        db.session.refresh(appointment)
+    assert [a.summary for a in appointments] == expected(3) + ["Old prompt.", "Old prompt."]
@@ -0,0 +1,91 @@
+import logging
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from database import db, Appointment, BookingStatus
+from services.sql_profiler import assert_max_queries
+from services.doctor_schedule import schedule_store
+from api.appointment import availability_service, find_next_available_slot
+
+START = date(2030, 3, 4)
+
+
+@pytest.fixture
+def appointments(app):
+    """60 confirmed appointments over four days, with the doctor schedules already loaded."""
+    schedule_store.invalidate()
+    doctors = availability_service.doctors()
+    for index in range(60):
+        db.session.add(Appointment(
+            patient_name=f"Patient {index}",
+            patient_email=f"patient{index}@example.com",
+            patient_phone=f"+2519{index:08d}",
+            date_of_birth=datetime(1990, 1, 1),
+            symptoms="Headache",
+            appointment_time=datetime.combine(START + timedelta(days=index // 15), datetime.min.time())
+            + timedelta(hours=9 + index % 5),
+            preferred_doctor=doctors[index % len(doctors)],
+            booking_status=BookingStatus.CONFIRMED.value,
+        ))
+    db.session.commit()
+    return doctors
+
+
+def test_listing_appointments_is_one_query_per_page(app, appointments):
+    client = app.test_client()
+    cursor, listed = None, 0
+    while True:
+        with assert_max_queries(1):
+            response = client.get("/api/appointments", query_string={"limit": 25, **({"cursor": cursor} if cursor else {})})
+        page = response.get_json()
+        listed += len(page["data"])
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+
+    assert listed == 60
+
+
+def test_availability_search_loads_bookings_once_then_serves_from_the_cache(app, appointments):
+    client = app.test_client()
+    search = {"doctor": appointments[0], "date": START.isoformat()}
+
+    with assert_max_queries(1):
+        first = client.post("/api/available-slots", json=search)
+    with assert_max_queries(0):
+        second = client.post("/api/available-slots", json=search)
+
+    assert first.status_code == 200
+    assert first.get_json()["data"] == second.get_json()["data"]
+
+
+def test_availability_calendar_is_one_query_for_every_doctor_and_day(app, appointments):
+    with assert_max_queries(1):
+        response = app.test_client().post("/api/available-slots/calendar", json={
+            "start_date": START.isoformat(), "end_date": (START + timedelta(days=27)).isoformat(),
+        })
+
+    assert response.status_code == 200
+    assert set(response.get_json()["data"]["availability"]) == set(appointments)
+
+
+def test_next_available_slot_runs_no_queries_with_a_warm_cache(app, appointments):
+    expected = find_next_available_slot(start_date=START)
+
+    with assert_max_queries(0):
+        assert find_next_available_slot(start_date=START) == expected
+
+
+@pytest.mark.parametrize("app_config", [{"SQL_PROFILER_MODE": "header"}])
+def test_header_mode_profiles_only_requests_that_ask(app, appointments, caplog):
+    client = app.test_client()
+
+    with caplog.at_level(logging.INFO, logger="services.sql_profiler"):
+        profiled = client.get("/api/appointments", headers={"X-SQL-Profile": "1"})
+        plain = client.get("/api/appointments")
+
+    assert profiled.headers["X-SQL-Profile"].startswith("queries=1; distinct=1;")
+    assert "X-SQL-Profile" not in plain.headers
+    profile_logs = [record.getMessage() for record in caplog.records if record.getMessage().startswith("SQL profile")]
+    assert profile_logs == [f"SQL profile GET /api/appointments: {profiled.headers['X-SQL-Profile']}"]
@@ -0,0 +1,19 @@
+import threading
+
+from services.fakes import FakeGenerativeModel, FakeTwilioClient
+from services.gemini_service import GeminiService
+from services.sms_service import SmsService
+
+
+def test_warm_up_outside_an_app_context_builds_config_dependent_services(app, services, caplog):
+    services.register("gemini", lambda: GeminiService(model=FakeGenerativeModel()))
+    services.register("sms", lambda: SmsService(client=FakeTwilioClient(), from_phone="+15550000000"))
+
+    # A fresh thread has no app context, like gunicorn's worker hooks
+    warm_up = threading.Thread(target=services.warm_up, kwargs={"names": ["gemini", "sms"]})
+    warm_up.start()
+    warm_up.join()
+
+    assert "Could not warm up" not in caplog.text
+    assert isinstance(services.get("gemini"), GeminiService)
+    assert services.get("sms").max_retries == app.config["SMS_MAX_RETRIES"]
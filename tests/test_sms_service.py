@@ -0,0 +1,46 @@
+import pytest
+
+from services.fakes import FakeTwilioClient
+from services.sms_service import SmsService
+
+
+@pytest.fixture
+def app_config():
+    return {"SMS_RATE_PER_SECOND": 30.0, "SMS_BURST": 5.0, "SMS_MAX_WAIT_SECONDS": 3.0, "SMS_MAX_RETRIES": 0}
+
+
+def test_settings_come_from_the_app_config(app):
+    service = SmsService(client=FakeTwilioClient(), from_phone="+15550000000")
+
+    assert (service.rate_limiter.rate, service.rate_limiter.capacity) == (30.0, 5.0)
+    assert service.max_wait == 3.0
+    assert service.max_retries == 0
+
+
+def test_arguments_override_the_app_config(app):
+    service = SmsService(client=FakeTwilioClient(), from_phone="+15550000000", rate_per_second=1, burst=1)
+
+    assert (service.rate_limiter.rate, service.rate_limiter.capacity) == (1, 1)
+
+
+@pytest.mark.parametrize("app_config", [{"SMS_RATE_PER_SECOND": 1.0, "SMS_BURST": 1.0, "SMS_RATE_LIMITER": "database"}])
+def test_processes_sending_from_one_number_share_the_rate_limit(app):
+    # Two services stand in for two gunicorn workers: each has its own limiter object
+    first = SmsService(client=FakeTwilioClient(), from_phone="+15550000000")
+    second = SmsService(client=FakeTwilioClient(), from_phone="+15550000000")
+    other_number = SmsService(client=FakeTwilioClient(), from_phone="+15550000001")
+
+    assert first.rate_limiter.acquire(max_wait=0)
+    assert not second.rate_limiter.acquire(max_wait=0)
+    assert other_number.rate_limiter.acquire(max_wait=0)
+
+
+@pytest.mark.parametrize("app_config", [{"SMS_RATE_PER_SECOND": 2.0, "SMS_BURST": 1.0, "SMS_RATE_LIMITER": "database"}])
+def test_a_pause_holds_back_every_process(app):
+    first = SmsService(client=FakeTwilioClient(), from_phone="+15550000000")
+    second = SmsService(client=FakeTwilioClient(), from_phone="+15550000000")
+
+    first.rate_limiter.pause(10)
+
+    assert not second.rate_limiter.acquire(max_wait=5)
+    assert not first.rate_limiter.acquire(max_wait=5)
@@ -0,0 +1,57 @@
+import threading
+
+import pytest
+
+from database import db, SummaryCacheEntry
+from services.fakes import FakeGenerativeModel, FakeResponse
+from services.gemini_service import GeminiService
+from services.summary_cache import SummaryCache, DatabaseSummaryCache, TieredSummaryCache, build_summary_cache
+
+
+@pytest.fixture
+def app_config():
+    return {"SUMMARY_CACHE_BACKEND": "database"}
+
+
+class UnbatchedModel(FakeGenerativeModel):
+    """Answers batch prompts with prose, so every patient falls back to its own call on a worker thread."""
+
+    def __init__(self):
+        super().__init__()
+        self.threads = set()
+
+    def generate_content(self, prompt, **kwargs):
+        self.threads.add(threading.get_ident())
+        if "generation_config" in kwargs:
+            return FakeResponse("Sorry, here are the summaries in prose.")
+        return super().generate_content(prompt, **kwargs)
+
+
+def test_summary_cache_base_class_is_abstract():
+    with pytest.raises(TypeError):
+        SummaryCache()
+
+
+def test_cache_is_built_from_the_app_config(app):
+    assert isinstance(GeminiService(model=FakeGenerativeModel()).cache, DatabaseSummaryCache)
+    assert isinstance(build_summary_cache({"SUMMARY_CACHE_BACKEND": "tiered"}, db.engine), TieredSummaryCache)
+    assert build_summary_cache({"SUMMARY_CACHE_BACKEND": "none"}) is None
+    with pytest.raises(ValueError):
+        build_summary_cache({"SUMMARY_CACHE_BACKEND": "database"})
+
+
+def test_database_cache_works_from_summarize_batch_threads(app, caplog):
+    model = UnbatchedModel()
+    service = GeminiService(model=model)
+    patients = [{"symptoms": f"Cough for {days} days"} for days in range(6)]
+
+    summaries = service.summarize_batch(patients, batch_size=2, max_concurrency=3)
+
+    assert threading.get_ident() not in model.threads
+    assert "Summary cache" not in caplog.text
+    assert summaries == [f"Patient reports Cough for {days} days." for days in range(6)]
+    assert db.session.query(SummaryCacheEntry).count() == 6
+
+    model.calls = 0
+    assert service.summarize_batch(patients, batch_size=2) == summaries
+    assert model.calls == 0